@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Policies that choose how often a `Trader` polls the market based on what the
+market has been doing.
+"""
+
+
+class VolatilityAdaptiveInterval:
+    """
+    Polls quickly while the price is moving and slowly while it isn't. Every
+    price whose relative change from the previous one exceeds `threshold`
+    shrinks the interval by `shrink`; every quieter price stretches it by
+    `grow`. The interval always stays between `min_interval` and
+    `max_interval`.
+    """
+
+    def __init__(self, min_interval, max_interval, threshold=0.005,
+                 shrink=0.5, grow=1.25, initial_interval=None):
+        """
+        Parameters
+        ----------
+        min_interval: float (seconds)
+            The shortest interval used, however volatile the market
+
+        max_interval: float (seconds)
+            The longest interval used, however quiet the market
+
+        threshold: float
+            The relative price change between two consecutive prices above
+            which the market counts as volatile, e.g. 0.005 for 0.5%
+
+        shrink: float
+            What the interval is multiplied by after a volatile price. Must be
+            in (0, 1].
+
+        grow: float
+            What the interval is multiplied by after a quiet price. Must be
+            at least 1.
+
+        initial_interval: float (seconds) or None
+            The interval before any price was seen. Defaults to `max_interval`.
+        """
+        if min_interval <= 0:
+            raise ValueError('min_interval must be > 0')
+        if max_interval < min_interval:
+            raise ValueError('max_interval must be >= min_interval')
+        if not 0 < shrink <= 1:
+            raise ValueError('shrink must be in (0, 1]')
+        if grow < 1:
+            raise ValueError('grow must be >= 1')
+        if threshold < 0:
+            raise ValueError('threshold must be >= 0')
+
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.threshold = float(threshold)
+        self.shrink = float(shrink)
+        self.grow = float(grow)
+        if initial_interval is None:
+            initial_interval = max_interval
+        self.interval = self._clamp(float(initial_interval))
+        self._last_price = None
+
+    def update(self, price):
+        """
+        Adjust the interval to a new price
+
+        Parameters
+        ----------
+        price: PriceSample
+            The latest price
+
+        Returns
+        -------
+        interval: float (seconds)
+            The interval to wait before the next price
+        """
+        value = price.price
+        last = self._last_price
+        self._last_price = value
+        if not last:
+            return self.interval
+
+        change = abs(value - last) / abs(last)
+        if change > self.threshold:
+            self.interval = self._clamp(self.interval * self.shrink)
+        else:
+            self.interval = self._clamp(self.interval * self.grow)
+        return self.interval
+
+    def _clamp(self, interval):
+        return min(max(interval, self.min_interval), self.max_interval)
@@ -7,20 +7,75 @@ have performed had it been used at that time. This is useful for evaluation the
 performance of new algorithms and for checking for bugs before going live.
 """
 from datetime import datetime
+import numpy as np
 from .TransationRecord import TransationRecord
-from .utils import read_price_history
+from .utils import read_price_history, downsample_minmax, price_arrays
+from .utils import resample_price_history, resample_price_bars
+from .performance import equity_curve, drawdown, performance_metrics
 
 
 class AlgorithmValidator:
 
-    def __init__(self, logfile, algorithm, holdings, balance):
+    def __init__(self, logfile, algorithm, holdings, balance, cache=None,
+                 replay_interval=None, replay_bars=False, order_book=None):
+        """
+        Parameters
+        ----------
+        logfile: string
+            Path to the price log the algorithm will be run against
+
+        algorithm: instance of `Algorithm`
+            The algorithm to validate
+
+        holdings: float
+            The number of coins held at the start of the simulation
+
+        balance: float
+            The account balance at the start of the simulation
+
+        cache: instance of `PriceLogCache` or None
+            If given, the parsed log is loaded from this cache instead of being
+            reparsed every time a validator is created.
+
+        replay_interval: float or None (seconds)
+            If given, the log is resampled to one price per `replay_interval`
+            seconds before it is replayed, keeping the last price of each
+            interval. Setting this to a `Trader`'s `update_interval` replays
+            the market the way that trader would have seen it.
+
+        replay_bars: boolean (default False)
+            Only used with `replay_interval`. If True, each interval is replayed
+            as an OHLC `PriceBar` through `Algorithm.process_bars` and trades
+            are made at the closing price of the bar.
+
+        order_book: instance of `OrderBook` or None
+            A typical order book of the market, used as a liquidity profile.
+            If given, trades are made at the price they would have been filled
+            at against a book of that shape around each sample, so that large
+            trades pay for their market impact. Trades the book is too thin
+            for are not made. If None, every trade is made at the sample price.
+        """
         self.logfile = logfile
         self.algorithm = algorithm
         self.holdings = holdings
         self.balance = balance
+        self.order_book = order_book
         self.buys = []
         self.sells = []
-        self.sample_history = read_price_history(logfile)
+        if cache is not None:
+            self.sample_history = cache.read_price_history(logfile)
+        else:
+            self.sample_history = read_price_history(logfile)
+
+        self.bar_history = None
+        if replay_interval is not None and replay_bars:
+            self.bar_history = resample_price_bars(self.sample_history,
+                                                   replay_interval)
+            self.sample_history = resample_price_history(self.sample_history,
+                                                         replay_interval)
+        elif replay_interval is not None:
+            self.sample_history = resample_price_history(self.sample_history,
+                                                         replay_interval)
         self.holdings_history = []
         self.balance_history = []
 
@@ -29,31 +84,68 @@ class AlgorithmValidator:
         self.sells = []
         self._update_history(date=self.sample_history[-1].date)
 
-        for sample in self.sample_history:
-            self.algorithm.process_data([sample])
+        # `sample_history` is newest first, but the market is replayed in the
+        # order it happened
+        for i in range(len(self.sample_history) - 1, -1, -1):
+            sample = self.sample_history[i]
+            if self.bar_history is not None:
+                self.algorithm.process_bars([self.bar_history[i]])
+            else:
+                self.algorithm.process_data([sample])
             if self.algorithm.check_should_buy():
                 buy_volume = self.algorithm.determine_buy_volume(
                     sample, self.holdings, self.balance)
+                try:
+                    price = self._fill_price(sample, 'buy', buy_volume)
+                except ValueError:
+                    continue
                 self.holdings += buy_volume
-                self.balance -= sample.price * buy_volume
+                self.balance -= price * buy_volume
                 record = TransationRecord('buy', sample.date, sample.currency,
-                                          sample.price,
-                                          buy_volume, sample.price * buy_volume, sample.price_currency)
+                                          price, buy_volume,
+                                          price * buy_volume,
+                                          sample.price_currency)
                 self.buys.append(record)
                 self._update_history(date=sample.date)
             elif self.algorithm.check_should_sell():
                 sell_volume = self.algorithm.determine_sell_volume(
                     sample, self.holdings, self.balance)
+                try:
+                    price = self._fill_price(sample, 'sell', sell_volume)
+                except ValueError:
+                    continue
                 self.holdings -= sell_volume
-                self.balance += sell_volume * sample.price
-                record = TransationRecord('sell', sample.date, sample.currency,
-                                          sample.price, sell_volume, sample.price * sell_volume, sample.price)
+                self.balance += sell_volume * price
+                record = TransationRecord('sell', sample.date,
+                                          sample.currency, price, sell_volume,
+                                          price * sell_volume,
+                                          sample.price_currency)
                 self.sells.append(record)
                 self._update_history(date=sample.date)
 
-    def data_pairs_for_plotting(self):
-        dates = [sample.date for sample in self.sample_history]
-        prices = [sample.price for sample in self.sample_history]
+    def data_pairs_for_plotting(self, max_points=None):
+        """
+        Collect the price, trade, balance and holdings series of the last
+        simulation in a form that is easy to plot.
+
+        Parameters
+        ----------
+        max_points: int or None
+            If given, the price, balance and holdings series are each reduced
+            to at most this many points using min/max-per-bucket downsampling
+            and every series is returned as numpy arrays. Buys and sells are
+            never downsampled. If None, every sample is returned as lists.
+
+        Returns
+        -------
+        pairs: dict
+            Maps each series name to a dict with "dates" and "values"
+        """
+        if max_points is not None:
+            dates, prices = price_arrays(self.sample_history)
+        else:
+            dates = [sample.date for sample in self.sample_history]
+            prices = [sample.price for sample in self.sample_history]
         buy_dates = [action.date for action in self.buys]
         buy_prices = [action.price for action in self.buys]
         sell_dates = [action.date for action in self.sells]
@@ -63,6 +155,17 @@ class AlgorithmValidator:
         holdings_dates = [x[1] for x in self.holdings_history]
         holdings_values = [x[0] for x in self.holdings_history]
 
+        if max_points is not None:
+            dates, prices = downsample_minmax(dates, prices, max_points)
+            balance_dates, balance_values = downsample_minmax(
+                balance_dates, balance_values, max_points)
+            holdings_dates, holdings_values = downsample_minmax(
+                holdings_dates, holdings_values, max_points)
+            buy_dates = np.array(buy_dates, dtype='datetime64[us]')
+            buy_prices = np.array(buy_prices, dtype=np.float64)
+            sell_dates = np.array(sell_dates, dtype='datetime64[us]')
+            sell_prices = np.array(sell_prices, dtype=np.float64)
+
         return {
             "prices": {
                 "dates": dates,
@@ -86,6 +189,78 @@ class AlgorithmValidator:
             }
         }
 
+    def equity_curve(self):
+        """
+        The value of the simulated account, marked to market at every sample
+        of the last simulation.
+
+        Returns
+        -------
+        dates: numpy array of datetime64[us]
+            The date of every sample in chronological order
+
+        equity: numpy array of float
+            The balance plus the value of the holdings at every sample
+
+        drawdown: numpy array of float
+            How far below its running maximum the equity is at every sample,
+            as a fraction of that maximum
+        """
+        dates, prices, held, equity = self._mark_to_market()
+        return dates, equity, drawdown(equity)
+
+    def performance_metrics(self, risk_free_rate=0.0):
+        """
+        Summarize the last simulation: returns, risk and trade statistics. All
+        of the work is done with numpy, so this is cheap enough to call for
+        every run of a parameter sweep.
+
+        Parameters
+        ----------
+        risk_free_rate: float
+            The annual return of a riskless investment, used for the Sharpe
+            ratio. Defaults to 0.
+
+        Returns
+        -------
+        metrics: dict
+            See `performance.performance_metrics` for the keys
+        """
+        dates, prices, held, equity = self._mark_to_market()
+        return performance_metrics(dates, equity, held, prices, self.buys,
+                                   self.sells, risk_free_rate=risk_free_rate)
+
+    def _mark_to_market(self):
+        dates, prices = price_arrays(self.sample_history)
+        order = np.argsort(dates, kind='stable')
+        dates = dates[order]
+        prices = prices[order]
+
+        if self.balance_history:
+            state_dates = [x[1] for x in self.balance_history]
+            balances = [x[0] for x in self.balance_history]
+            holdings = [x[0] for x in self.holdings_history]
+        else:
+            state_dates = dates[:1]
+            balances = [self.balance]
+            holdings = [self.holdings]
+        equity, held = equity_curve(dates, prices, state_dates, balances,
+                                    holdings)
+        return dates, prices, held, equity
+
+    def _fill_price(self, sample, side, volume):
+        """
+        The average price a trade of `volume` at `sample` is filled at
+
+        Raises
+        ------
+        ValueError
+            If `order_book` is too thin to fill the trade
+        """
+        if self.order_book is None or volume <= 0:
+            return sample.price
+        return sample.price * self.order_book.impact(side, volume)
+
     def _update_history(self, date):
         self.holdings_history.append((self.holdings, date))
         self.balance_history.append((self.balance, date))
@@ -6,6 +6,7 @@ any algorithm used to determine when to buy and sell.
 """
 from abc import ABC, abstractmethod
 from ..PriceSample import PriceSample
+from ..PriceBar import PriceBar
 
 
 class Algorithm(ABC):
@@ -29,6 +30,82 @@ class Algorithm(ABC):
         assert all(isinstance(item, PriceSample) for item in price_samples), \
             "Not all items in price_samples were `PriceSample` objects"
 
+    def load_history(self, price_samples):
+        """
+        Called once with a large batch of past prices, for example by
+        `Trader.warm_up` before trading starts. By default the samples are
+        passed on to `process_data`. Override this if your algorithm can ingest
+        many samples at once faster than it can one update at a time.
+
+        Parameters
+        ----------
+        price_samples: array of PriceSample
+            Past prices in no particular order
+        """
+        self.process_data(list(price_samples))
+
+    def process_bars(self, price_bars):
+        """
+        Called instead of `process_data` when prices are replayed as OHLC bars.
+        By default each bar is reduced to a `PriceSample` of its closing price
+        and passed on to `process_data`. Override this if your algorithm can
+        make use of the open, high and low prices.
+
+        Parameters
+        ----------
+        price_bars: array of PriceBar
+            An array of `PriceBar` data points
+        """
+        assert all(isinstance(item, PriceBar) for item in price_bars), \
+            "Not all items in price_bars were `PriceBar` objects"
+        self.process_data([PriceSample(bar.close, bar.date, bar.currency,
+                                       bar.price_currency)
+                           for bar in price_bars])
+
+    def order_filled(self, side, volume, price):
+        """
+        Called after an order placed on the algorithm's behalf went through.
+        Does nothing by default. When the `Trader` uses an `OrderWorker` this
+        is called from the worker's thread.
+
+        Parameters
+        ----------
+        side: string
+            'buy' or 'sell'
+
+        volume: float
+            The number of shares bought or sold
+
+        price: PriceSample
+            The price the decision to trade was based on
+        """
+        pass
+
+    def order_failed(self, side, volume, price, error):
+        """
+        Called when an order placed on the algorithm's behalf failed or timed
+        out. Does nothing by default. When the `Trader` uses an `OrderWorker`
+        this is called from the worker's thread.
+
+        Parameters
+        ----------
+        side: string
+            'buy' or 'sell'
+
+        volume: float
+            The number of shares that were to be bought or sold
+
+        price: PriceSample
+            The price the decision to trade was based on
+
+        error: Exception
+            Why the order failed. A `ValueError` means it was rejected before
+            reaching the market. A `TimeoutError` means it didn't return in
+            time and may still go through, in which case `order_filled` is
+            called when it does.
+        """
+        pass
+
     @abstractmethod
     def check_should_buy(self):
         """
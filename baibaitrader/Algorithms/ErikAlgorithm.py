@@ -5,9 +5,9 @@
 This file contains an `Algorithm` developed by Erik Hornberger for automatically
 determing when to buy and sell virtual currencies.
 """
-import numpy as np
 from datetime import datetime, timedelta
 from .Algorithm import Algorithm
+from ..PriceSample import PriceSample
 from ..TransationRecord import TransationRecord
 
 
@@ -76,6 +76,13 @@ class ErikAlgorithm(Algorithm):
         for sample in price_samples:
             self.data.insert(0, sample)
 
+    def load_history(self, price_samples):
+        # One sort instead of inserting every sample at the front of the list
+        assert all(isinstance(item, PriceSample) for item in price_samples), \
+            "Not all items in price_samples were `PriceSample` objects"
+        self.data = sorted(self.data + list(price_samples),
+                           key=lambda x: x.date, reverse=True)
+
     def check_should_buy(self):
         super().check_should_buy()
         if not self.check_enough_data() or not self.check_far_enough_in_past(self.last_buy):
@@ -144,10 +151,12 @@ class ErikAlgorithm(Algorithm):
         return [sample for sample in self.data if sample.date > min_date]
 
     def recent_mean(self):
+        import numpy as np
         prices = [sample.price for sample in self.recent_prices()]
         return np.array(prices).mean()
 
     def recent_stddev(self):
+        import numpy as np
         prices = [sample.price for sample in self.recent_prices()]
         return np.array(prices).std()
 
@@ -168,6 +177,7 @@ class ErikAlgorithm(Algorithm):
         return was_rising and is_falling
 
     def check_if_last_sample_is_outlier(self):
+        import numpy as np
         prices = np.array([sample.price for sample in self.data])
         stddev = prices.std()
         mean = prices.mean()
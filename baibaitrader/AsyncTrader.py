@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Implementation for an automated trader that runs as a coroutine, so that many
+traders can share a single asyncio event loop and thread.
+"""
+import asyncio
+from .Markets.Authenticator import Authenticator
+from .Markets.AsyncAuthenticator import SyncAuthenticatorAdapter
+from .utils import build_logger
+
+
+class AsyncTrader:
+    """
+    The asyncio counterpart of `Trader`. It owns an `AsyncAuthenticator` and an
+    `Algorithm` and runs the same trading cycle, but waits for the market
+    without blocking, so hundreds of traders can run in one event loop.
+    """
+
+    def __init__(self, name, authenticator, algorithm,
+                 update_interval=300.0, output_console=True, executor=None,
+                 timestamp_precision='s'):
+        """
+        Create a new `AsyncTrader`
+
+        Parameters
+        ----------
+        name: string
+            The name given to the trader will be used to generate logs, the
+            same way as for `Trader`.
+
+        authenticator: instance of `AsyncAuthenticator` or `Authenticator`
+            The authenticator responsible for retrieving market data and place
+            buy/sell orders. A regular `Authenticator` is wrapped in a
+            `SyncAuthenticatorAdapter`.
+
+        algorithm: instance of `Algorithm`
+            The algorithm that will be responsible for determing if it's time
+            to buy or sell
+
+        update_interval: float (seconds)
+            How frequency the market price is checked and a new decision is
+            made. Defaults to 300 seconds (5 minutes).
+
+        output_console: boolean (default True)
+            Determines if logs will be printed to the console in addition to
+            written to disk.
+
+        executor: `concurrent.futures.Executor` or None
+            Only used when `authenticator` is a regular `Authenticator`. The
+            executor its blocking calls are run on.
+
+        timestamp_precision: 's', 'ms' or 'us' (default 's')
+            The precision of the timestamps in the trader's logs. Use 'ms' or
+            'us' when polling more than once a second, so that every price in
+            the price log keeps its own time.
+        """
+        if isinstance(authenticator, Authenticator):
+            authenticator = SyncAuthenticatorAdapter(authenticator, executor)
+
+        self.name = name
+        self.authenticator = authenticator
+        self.algorithm = algorithm
+        self.update_interval = float(update_interval)
+        self.is_running = False
+        self._stop = None
+
+        self.log = build_logger(self.name + 'Debug',
+                                self.name + '_debug.log',
+                                output_console=output_console,
+                                precision=timestamp_precision)
+
+        self.trade_log = build_logger(self.name + 'Records',
+                                      self.name + '_trade_records.log',
+                                      output_console=output_console,
+                                      precision=timestamp_precision)
+
+        self.price_log = build_logger(self.name + 'Prices',
+                                      self.name + '_price_log.log',
+                                      output_console=output_console,
+                                      precision=timestamp_precision)
+
+    async def begin_trading(self):
+        """
+        Poll the market and trade until `stop_trading` is called. Cycles start
+        on a fixed grid of `update_interval` seconds measured with the event
+        loop's clock; cycles that would have started while a previous cycle
+        was still running are skipped.
+        """
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self.is_running = True
+        self.log.info('Began trading')
+
+        deadline = loop.time()
+        try:
+            while not self._stop.is_set():
+                try:
+                    await self.perform_one_cycle()
+                except Exception as e:
+                    self.log.error('Cycle failed with error: %s', e)
+
+                deadline += self.update_interval
+                now = loop.time()
+                if now > deadline:
+                    missed = int((now - deadline) // self.update_interval) + 1
+                    deadline += missed * self.update_interval
+                    self.log.warning('Cycle overran update interval, skipped '
+                                     '%s cycles', missed)
+                try:
+                    await asyncio.wait_for(self._stop.wait(),
+                                           deadline - loop.time())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.is_running = False
+            self.log.info('Stop trading')
+
+    def stop_trading(self):
+        """
+        Stop trading after the cycle in progress, if any, has finished. Must be
+        called from the event loop the trader is running in.
+        """
+        if self._stop is not None:
+            self._stop.set()
+
+    async def perform_one_cycle(self):
+        """
+        Get the market price, provide the data to the algorithm, make a decision
+        about what to do, and either buy or sell if appropriate.
+        """
+        # Checking price
+        try:
+            price = await self.authenticator.get_current_price()
+            self.log.info('Received price update: %s', price)
+            self.price_log.info('%s %s = %s',
+                                self.authenticator.target_currency(),
+                                self.authenticator.price_currency(),
+                                price.price)
+
+        except Exception as e:
+            self.log.error('Failed to get price with error: %s', e)
+            return
+
+        self.algorithm.process_data([price])
+
+        # Buying
+        if self.algorithm.check_should_buy():
+
+            balance, holdings = await asyncio.gather(
+                self.authenticator.get_account_balance(),
+                self.authenticator.get_holdings())
+            volume = self.algorithm.determine_buy_volume(
+                price, holdings, balance)
+
+            try:
+                self.log.debug('Trying to buy %s shares at %s', volume, price)
+                await self.authenticator.buy(volume)
+                self.trade_log.info('Bought %s shares of %s at %s', volume,
+                                    self.authenticator.target_currency(), price)
+            except Exception as e:
+                self.log.error('Failed to buy with error: %s', e)
+
+        # Selling
+        elif self.algorithm.check_should_sell():
+
+            balance, holdings = await asyncio.gather(
+                self.authenticator.get_account_balance(),
+                self.authenticator.get_holdings())
+            volume = self.algorithm.determine_sell_volume(
+                price, holdings, balance)
+
+            try:
+                self.log.debug('Trying to sell %s shares at %s', volume, price)
+                await self.authenticator.sell(volume)
+                self.trade_log.info('Sold %s shares of %s at %s', volume,
+                                    self.authenticator.target_currency(), price)
+            except Exception as e:
+                self.log.error('Failed to sell with error: %s', e)
+
+
+async def run_traders(traders):
+    """
+    Run several `AsyncTrader`s concurrently in the current event loop until all
+    of them have been stopped
+
+    Parameters
+    ----------
+    traders: list of AsyncTrader
+        The traders to run
+    """
+    await asyncio.gather(*(trader.begin_trading() for trader in traders))
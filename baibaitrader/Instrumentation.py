@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lightweight counters, gauges and fixed-bucket histograms, and a small HTTP
+server that exposes them in the Prometheus text format.
+"""
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, suitable for anything from a local function call to
+# a slow exchange request
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('%s="%s"' % (name, str(value).replace('"', '\\"'))
+                          for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Counter:
+    """
+    A value that only ever goes up, such as the number of failed cycles
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, description=''):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, key, value) for key, value in items]
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down, such as the current polling interval
+    """
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """
+    Counts observations, typically durations in seconds, in fixed buckets.
+    Observing a value costs one binary search and a few additions.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, description='', buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1),
+                                              0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(labels))
+        return sum(series[0]) if series is not None else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total)
+                     for key, (counts, total) in self._series.items()]
+        samples = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', key,
+                                cumulative, (('le', _format_value(bound)),)))
+            samples.append((self.name + '_sum', key, total))
+            samples.append((self.name + '_count', key, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    A named collection of metrics that can be rendered in the Prometheus text
+    format. Asking for an existing metric by name returns it.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, description=''):
+        return self._get(Counter, name, description)
+
+    def gauge(self, name, description=''):
+        return self._get(Gauge, name, description)
+
+    def histogram(self, name, description='', buckets=DEFAULT_BUCKETS):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, description, buckets)
+            return self._metrics[name]
+
+    def render(self):
+        """
+        Returns
+        -------
+        text: string
+            Every metric in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append('# HELP %s %s' % (metric.name, metric.description))
+            lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+            for sample in metric.samples():
+                name, key, value = sample[:3]
+                extra = sample[3] if len(sample) > 3 else ()
+                lines.append('%s%s %s' % (name, _format_labels(key, extra),
+                                          _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def _get(self, cls, name, description):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, description)
+            return self._metrics[name]
+
+
+"""
+The registry used by `Trader` unless it is given another one
+"""
+REGISTRY = MetricsRegistry()
+
+
+class MetricsServer:
+    """
+    Serves the metrics of a `MetricsRegistry` at `/metrics` from a background
+    thread, for Prometheus to scrape.
+    """
+
+    def __init__(self, registry=REGISTRY, port=0, host='127.0.0.1'):
+        """
+        Parameters
+        ----------
+        registry: `MetricsRegistry`
+            The metrics to serve
+
+        port: int
+            The port to listen on. 0 picks a free port, which is then available
+            as the `port` attribute.
+
+        host: string
+            The address to listen on. Defaults to local connections only.
+        """
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(handler):
+                if handler.path.split('?')[0] != '/metrics':
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                handler.send_response(200)
+                handler.send_header('Content-Type',
+                                    'text/plain; version=0.0.4; charset=utf-8')
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        """
+        Start serving in a daemon thread
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='MetricsServer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop serving and release the port
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
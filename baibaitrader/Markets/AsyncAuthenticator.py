@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This file contains an abstract base class (ABC) that serves as an interface for
+trading on any market from an asyncio event loop, along with an adapter that
+lets any regular `Authenticator` be used where an `AsyncAuthenticator` is
+expected.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+
+from .Authenticator import shared_executor
+
+
+def default_executor():
+    """
+    The executor shared by all `SyncAuthenticatorAdapter`s that are not given
+    one of their own. It is created on first use with a bounded number of
+    worker threads.
+    """
+    return shared_executor('Authenticator', 16)
+
+
+class AsyncAuthenticator(ABC):
+    """
+    The asyncio counterpart of `Authenticator`. Everything that talks to the
+    market is a coroutine; see `Authenticator` for the meaning of each method.
+    """
+
+    @abstractmethod
+    def target_currency(self):
+        """
+        Get the currency being traded for
+
+        Returns
+        -------
+        ticker_symbol: string
+            The ticker symbol for the currency being traded, i.e. BTC for
+            Bitcoin or ETC for Etherium.
+        """
+        pass
+
+    @abstractmethod
+    def price_currency(self):
+        """
+        Specify the currency that price will be returned in
+
+        Returns
+        -------
+        currency: string
+            A capitalized 3 letter currency code such as USD or JPY
+        """
+        pass
+
+    @abstractmethod
+    async def get_current_price(self):
+        """
+        Get the present price of the target currency. Raise an exception if
+        unable to get the price.
+
+        Returns
+        -------
+        price: PriceSample
+            The current price of the currency
+        """
+        pass
+
+    @abstractmethod
+    async def get_account_balance(self):
+        """
+        Check the balance of the currency used for purchasing
+
+        Returns
+        -------
+        balance: float
+            The current balance of the purchasing account
+        """
+        pass
+
+    @abstractmethod
+    async def get_holdings(self):
+        """
+        Return the amount of target currency currently availble for selling
+
+        Returns
+        -------
+        holdings: float
+            The number of coins held
+        """
+        pass
+
+    @abstractmethod
+    async def buy(self, n_shares):
+        """
+        Buy a certain number of the target currency
+
+        Raises
+        ------
+        ValueError
+            If you try to buy 0 or fewer shares
+        """
+        if n_shares <= 0:
+            raise ValueError("You can only buy a positive number of shares")
+
+    @abstractmethod
+    async def sell(self, n_shares):
+        """
+        Sell a number of coins at the current market price
+
+        Raises
+        ------
+        ValueError
+            If you try to sell 0 or fewer shares
+        """
+        if n_shares <= 0:
+            raise ValueError("You can only sell a positive number of shares")
+
+
+class SyncAuthenticatorAdapter(AsyncAuthenticator):
+    """
+    Runs the blocking calls of a regular `Authenticator` on a bounded thread
+    pool so they don't block the event loop.
+    """
+
+    def __init__(self, authenticator, executor=None):
+        """
+        Parameters
+        ----------
+        authenticator: instance of `Authenticator`
+            The authenticator to adapt
+
+        executor: `concurrent.futures.Executor` or None
+            Where the blocking calls are run. Defaults to an executor shared by
+            all adapters, see `default_executor`.
+        """
+        self.authenticator = authenticator
+        self.executor = executor if executor is not None \
+            else default_executor()
+
+    def target_currency(self):
+        return self.authenticator.target_currency()
+
+    def price_currency(self):
+        return self.authenticator.price_currency()
+
+    async def get_current_price(self):
+        return await self._run(self.authenticator.get_current_price)
+
+    async def get_account_balance(self):
+        return await self._run(self.authenticator.get_account_balance)
+
+    async def get_holdings(self):
+        return await self._run(self.authenticator.get_holdings)
+
+    async def buy(self, n_shares):
+        return await self._run(self.authenticator.buy, n_shares)
+
+    async def sell(self, n_shares):
+        return await self._run(self.authenticator.sell, n_shares)
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
@@ -4,7 +4,25 @@
 This file contains the an abstract base class (ABC) that serves as an interface
 for trading on any market.
 """
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def shared_executor(name, max_workers):
+    """
+    A process-wide thread pool for blocking market calls, one per `name`. It
+    is created with `max_workers` threads the first time it is asked for and
+    shared by every later caller.
+    """
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=max_workers,
+                                                  thread_name_prefix=name)
+        return _executors[name]
 
 
 class Authenticator(ABC):
@@ -64,6 +82,21 @@ class Authenticator(ABC):
         """
         pass
 
+    def update_price(self, price):
+        """
+        Called when a price for this authenticator's pair was obtained from
+        somewhere else, such as a `MarketDataHub`, instead of through
+        `get_current_price`. Authenticators that remember the last price, e.g.
+        to fill simulated orders, should override this. Does nothing by
+        default.
+
+        Parameters
+        ----------
+        price: PriceSample
+            The latest price of the target currency
+        """
+        pass
+
     @abstractmethod
     def get_account_balance(self):
         """
@@ -107,6 +140,33 @@ class Authenticator(ABC):
         """
         pass
 
+    def get_account_state(self):
+        """
+        Get the account balance and the holdings together. By default both are
+        requested concurrently, so this takes about as long as the slower of
+        `get_account_balance` and `get_holdings`. Markets that report both in
+        one response should override this to make a single request.
+
+        Returns
+        -------
+        balance: float
+            The current balance of the purchasing account
+
+        holdings: float
+            The number of coins available for selling
+
+        Raises
+        ------
+        RuntimeError
+            If fetching fails for some reason
+
+        RequestException
+            If there is a networking problem
+        """
+        holdings = shared_executor('AccountState', 8).submit(self.get_holdings)
+        balance = self.get_account_balance()
+        return balance, holdings.result()
+
     @abstractmethod
     def buy(self, n_shares):
         """
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Record and replay the HTTP traffic of a `Transport`. Recording stores every
+request and response, with how long it took, in a gzipped JSON lines
+cassette; replaying answers the same requests from the cassette, optionally
+with the recorded timing, so that everything above the HTTP layer (krakenex,
+retries, rate limiting and the authenticators' parsing) can be profiled and
+regression tested offline and reproducibly.
+"""
+import gzip
+import json
+import time
+import threading
+from collections import defaultdict, deque
+from datetime import timedelta
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Form fields that change with every request and are ignored when matching
+VOLATILE_FIELDS = frozenset(['nonce'])
+
+# Errors that are recorded and raised again on replay
+_ERRORS = {'ConnectionError': requests.ConnectionError,
+           'Timeout': requests.Timeout}
+
+
+class CassetteError(RuntimeError):
+    """
+    Raised on replay for a request the cassette holds no answer to
+    """
+    pass
+
+
+class Cassette:
+    """
+    A file of recorded HTTP interactions. Give it to a `Transport` to record
+    the queries made through it, or to answer them from the file instead of
+    the network:
+
+        with Cassette('kraken.jsonl.gz', mode='record') as cassette:
+            auth = KrakenAuthenticator(key_file, 'XBT', 'USD',
+                                       transport=Transport(cassette=cassette))
+            ...
+
+    Requests are matched by HTTP method, path and form fields, ignoring the
+    nonce of private queries. Identical requests are answered in the order
+    they were recorded.
+    """
+
+    def __init__(self, path, mode=REPLAY, time_scale=0.0, sleep=time.sleep):
+        """
+        Parameters
+        ----------
+        path: string
+            The cassette file. Recording overwrites it.
+
+        mode: 'record' or 'replay'
+            Whether to record real traffic or answer from the file
+
+        time_scale: float
+            On replay, each response is delayed by its recorded duration
+            times this. 1 reproduces the original timing, 0 (the default)
+            answers right away.
+
+        sleep: callable
+            Waits for the given number of seconds on replay
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError("mode must be 'record' or 'replay'")
+        if time_scale < 0:
+            raise ValueError('time_scale must be >= 0')
+        self.path = path
+        self.mode = mode
+        self.time_scale = float(time_scale)
+        self.sleep = sleep
+        self.n_played = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._interactions = defaultdict(deque)
+        if mode == RECORD:
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    interaction = json.loads(line)
+                    key = tuple(interaction['request'])
+                    self._interactions[key].append(interaction)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def n_remaining(self):
+        """
+        The number of recorded interactions not replayed yet
+        """
+        with self._lock:
+            return sum(len(queue) for queue in self._interactions.values())
+
+    def adapter(self, adapter):
+        """
+        Wrap the `requests` transport adapter of a session. When recording,
+        requests are passed on to `adapter`; when replaying, it is not used.
+        """
+        return CassetteAdapter(self, adapter)
+
+    def close(self):
+        """
+        Finish writing a recording. Does nothing on replay.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def record(self, request, response=None, error=None, elapsed=0.0):
+        """
+        Add an interaction to the recording
+        """
+        interaction = {'request': list(request_key(request)),
+                       'elapsed': round(elapsed, 6)}
+        if error is not None:
+            interaction['error'] = type(error).__name__
+        else:
+            interaction['status'] = response.status_code
+            interaction['reason'] = response.reason
+            interaction['content_type'] = response.headers.get(
+                'Content-Type', 'application/json')
+            interaction['body'] = response.content.decode('utf-8')
+        line = json.dumps(interaction, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                raise CassetteError('The cassette is closed')
+            self._file.write(line + '\n')
+
+    def play(self, request):
+        """
+        Answer a request from the recording, after its scaled duration
+
+        Raises
+        ------
+        CassetteError
+            If no recorded interaction matches the request
+
+        requests.ConnectionError, requests.Timeout
+            If the matching interaction failed this way when recorded
+        """
+        key = request_key(request)
+        with self._lock:
+            queue = self._interactions.get(key)
+            if not queue:
+                raise CassetteError('No recorded answer to %s %s' % key[:2])
+            interaction = queue.popleft()
+            self.n_played += 1
+
+        if self.time_scale > 0:
+            self.sleep(interaction['elapsed'] * self.time_scale)
+        if 'error' in interaction:
+            raise _ERRORS.get(interaction['error'],
+                              requests.ConnectionError)(
+                'Recorded %s' % interaction['error'], request=request)
+
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction['reason']
+        response.headers = CaseInsensitiveDict(
+            {'Content-Type': interaction['content_type']})
+        response._content = interaction['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction['elapsed'])
+        return response
+
+
+def request_key(request):
+    """
+    What a request is matched by: its HTTP method, path and form fields
+    without `VOLATILE_FIELDS`
+
+    Parameters
+    ----------
+    request: `requests.PreparedRequest`
+    """
+    url = urlsplit(request.url)
+    body = request.body or ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    fields = sorted((name, value) for name, value in
+                    parse_qsl(url.query) + parse_qsl(body)
+                    if name not in VOLATILE_FIELDS)
+    return (request.method, url.path,
+            '&'.join('%s=%s' % field for field in fields))
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    A `requests` transport adapter that records to or replays from a
+    `Cassette`
+    """
+
+    def __init__(self, cassette, adapter):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == REPLAY:
+            return self.cassette.play(request)
+
+        start = time.perf_counter()
+        try:
+            response = self.adapter.send(request, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.cassette.record(request, error=e,
+                                 elapsed=time.perf_counter() - start)
+            raise
+        # Reading the body here keeps it in the response for the caller
+        response.content
+        self.cassette.record(request, response,
+                             elapsed=time.perf_counter() - start)
+        return response
+
+    def close(self):
+        self.adapter.close()
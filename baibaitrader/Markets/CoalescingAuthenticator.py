@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Single flight price lookups. Traders that trade the same pair ask for its price
+at nearly the same moment; instead of each sending an identical query, the
+first caller fetches the price and everyone else waits for and shares its
+result, which is then reused for a short freshness window.
+"""
+import time
+import threading
+
+from .Authenticator import Authenticator
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def default_coalescer():
+    """
+    The `PriceCoalescer` shared by all `CoalescingAuthenticator`s that are not
+    given one of their own. It is created on first use.
+    """
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = PriceCoalescer()
+        return _coalescer
+
+
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.price = None
+        self.error = None
+
+
+class PriceCoalescer:
+    """
+    Shares price lookups between callers. Concurrent lookups of the same key
+    result in a single call to `fetch`, and its result is returned without
+    fetching again until it is older than `freshness` seconds.
+    """
+
+    def __init__(self, freshness=1.0, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        freshness: float (seconds)
+            How long a fetched price is reused. The age is counted from the
+            moment the fetch started, so no caller gets a price older than
+            this. Set to 0 to only share fetches that are in flight.
+
+        clock: callable
+            Returns the current time in seconds. Must be monotonic.
+        """
+        if freshness < 0:
+            raise ValueError('freshness must be >= 0')
+        self.freshness = float(freshness)
+        self.clock = clock
+        self.n_fetches = 0
+        self.n_shared = 0
+        self._prices = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """
+        Get the price for `key`, fetching it only if no fresh price is known
+        and no fetch is in flight
+
+        Parameters
+        ----------
+        key: hashable
+            Identifies the price, e.g. a (target, price currency) pair
+
+        fetch: callable
+            Called without arguments to fetch the price
+
+        Raises
+        ------
+        Exception
+            Whatever `fetch` raised. Every caller waiting for the same fetch
+            gets the same exception.
+        """
+        with self._lock:
+            cached = self._prices.get(key)
+            if cached is not None and \
+                    self.clock() - cached[0] <= self.freshness:
+                self.n_shared += 1
+                return cached[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.n_fetches += 1
+            else:
+                self.n_shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.price
+
+        started = self.clock()
+        try:
+            flight.price = fetch()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._prices[key] = (started, flight.price)
+                del self._flights[key]
+            flight.done.set()
+        return flight.price
+
+    def clear(self):
+        """
+        Forget every cached price
+        """
+        with self._lock:
+            self._prices.clear()
+
+
+class CoalescingAuthenticator(Authenticator):
+    """
+    Wraps any `Authenticator` so that its price lookups go through a shared
+    `PriceCoalescer`. Wrap the authenticators of every trader that trades the
+    same pair on the same market with the same coalescer, and only one of them
+    queries the market at a time. Prices are shared between wrapped
+    authenticators of the same class and currency pair. Everything else is
+    passed on unchanged.
+    """
+
+    def __init__(self, authenticator, coalescer=None):
+        """
+        Parameters
+        ----------
+        authenticator: instance of `Authenticator`
+            The authenticator to wrap
+
+        coalescer: `PriceCoalescer` or None
+            Where prices are shared. Defaults to one shared by the whole
+            process, see `default_coalescer`.
+        """
+        self.authenticator = authenticator
+        self.coalescer = coalescer if coalescer is not None \
+            else default_coalescer()
+
+    def __getattr__(self, name):
+        # Market specific extras such as `get_pair` or `last_price`
+        if name == 'authenticator':
+            raise AttributeError(name)
+        return getattr(self.authenticator, name)
+
+    def target_currency(self):
+        return self.authenticator.target_currency()
+
+    def price_currency(self):
+        return self.authenticator.price_currency()
+
+    def get_current_price(self):
+        key = (type(self.authenticator).__name__, self.target_currency(),
+               self.price_currency())
+        fetched = []
+
+        def fetch():
+            fetched.append(True)
+            return self.authenticator.get_current_price()
+
+        price = self.coalescer.get(key, fetch)
+        # Only pass on prices fetched by another lookup. Passing on its own
+        # price would make e.g. `PracticeAuthenticator` drop the order book it
+        # fetched along with it.
+        if not fetched and \
+                price is not getattr(self.authenticator, 'last_price', None):
+            self.authenticator.update_price(price)
+        return price
+
+    def update_price(self, price):
+        self.authenticator.update_price(price)
+
+    def get_account_balance(self):
+        return self.authenticator.get_account_balance()
+
+    def get_holdings(self):
+        return self.authenticator.get_holdings()
+
+    def get_account_state(self):
+        return self.authenticator.get_account_state()
+
+    def buy(self, n_shares):
+        return self.authenticator.buy(n_shares)
+
+    def sell(self, n_shares):
+        return self.authenticator.sell(n_shares)
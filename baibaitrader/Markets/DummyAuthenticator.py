@@ -4,43 +4,92 @@
 A dummy market and server that always returns the same price
 """
 from datetime import datetime
-from http.server import BaseHTTPRequestHandler, HTTPServer
-import os
-import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
 
 from .Authenticator import Authenticator
 from ..PriceSample import PriceSample
 
+RESPONSES = {
+    '/current_price': {'price': 100},
+    '/balance': {'balance': 1000},
+    '/holdings': {'holdings': 5},
+}
+
+
 class GetHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
     def do_GET(self):
-        self.send_response(200)
+        response = RESPONSES.get(self.path)
+        payload = json.dumps(response if response is not None else
+                             {'error': 'Not found'}).encode('utf_8')
+        self.send_response(200 if response is not None else 404)
         self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
         self.end_headers()
+        self.wfile.write(payload)
 
-        if 'current_price' in self.path:
-            self.wfile.write('{"price":100}'.encode('utf_8'))
-
-        if 'balance' in self.path:
-            self.wfile.write('{"balance": 1000'.encode('utf_8'))
-
-        if 'holdings' in self.path:
-            self.wfile.write('{"holdings": 5'.encode('utf_8'))
+    def log_message(self, format, *args):
+        pass
 
 
 class DummyAuthenticator(Authenticator):
-    
-    server_process = None
-
-    def start_server(self):
-        # In the new process __name__ == "__main__". See bottom of file.
-        print('Starting server at http://localhost:8080')
-        command = 'python -m baibaitrader.Markets.DummyAuthenticator'
-        self.server_process = os.popen(command)
+    """
+    Talks to a tiny local server that always reports the same price, balance
+    and holdings. The server runs on a background thread of this process and
+    listens on a port picked by the system. For a stand-in that behaves like
+    Kraken, see `LocalExchange`.
+    """
+
+    server = None
+
+    def start_server(self, timeout=5.0):
+        """
+        Start the server and wait until it accepts requests
+
+        Raises
+        ------
+        RuntimeError
+            If the server isn't ready within `timeout` seconds
+        """
+        if self.server is not None:
+            return
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), GetHandler)
+        self.server.daemon_threads = True
+        ready = threading.Event()
+
+        def serve():
+            ready.set()
+            self.server.serve_forever(poll_interval=0.05)
+
+        self._thread = threading.Thread(target=serve, name='DummyServer',
+                                        daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise RuntimeError('Dummy server did not start in time')
 
     def stop_server(self):
-        print('Stopping server')
-        if self.server_process is not None:
-            self.server_process.kill()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self._thread.join()
+            self.server = None
+
+    @property
+    def url(self):
+        """
+        The base URL of the running server
+
+        Raises
+        ------
+        RuntimeError
+            If the server wasn't started
+        """
+        if self.server is None:
+            raise RuntimeError('The dummy server is not running')
+        return 'http://127.0.0.1:%d' % self.server.server_address[1]
 
     def target_currency(self):
         return "XBT"
@@ -49,28 +98,34 @@ class DummyAuthenticator(Authenticator):
         return "USD"
 
     def get_account_balance(self):
-        r = requests.get('http://localhost:8080/balance')
-        return r.json()['balance']
+        return self._get('/balance')['balance']
 
     def get_holdings(self):
-        r = requests.get('http://localhost:8080/holdings')
-        return r.json()['holdings']
+        return self._get('/holdings')['holdings']
 
     def get_current_price(self):
-        r = requests.get('http://localhost:8080/current_price')
-        price = r.json()['price']
-        return PriceSample(price, datetime.now(), 
-                           self.target_currency(), 
+        price = self._get('/current_price')['price']
+        return PriceSample(price, datetime.now(),
+                           self.target_currency(),
                            self.price_currency())
 
-    def buy(self):
-        pass
+    def buy(self, n_shares):
+        super().buy(n_shares)
+
+    def sell(self, n_shares):
+        super().sell(n_shares)
+
+    def _get(self, path):
+        import requests
+        return requests.get(self.url + path, timeout=10.0).json()
 
-    def sell(self):
-        pass
 
 # When this file is run as a script instead of loaded as module, start server
 if __name__ == '__main__':
-    server = HTTPServer(('localhost', 8080), GetHandler)
-    print('Starting server at http://localhost:8080')
-    server.serve_forever()
\ No newline at end of file
+    auth = DummyAuthenticator()
+    auth.start_server()
+    print('Serving at ' + auth.url)
+    try:
+        auth._thread.join()
+    except KeyboardInterrupt:
+        auth.stop_server()
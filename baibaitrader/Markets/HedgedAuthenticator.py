@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Hedged price lookups across several price sources. If the primary source
+hasn't answered by the time it usually has, the same lookup is sent to the
+next source and whichever valid answer comes first is used, which cuts the
+tail latency of fetching a price at the cost of a few extra queries.
+"""
+import math
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .Authenticator import Authenticator
+
+
+class _LatencyWindow:
+    """
+    The latencies of the last successful lookups of one source
+    """
+
+    def __init__(self, size):
+        self._latencies = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def add(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def quantile(self, q):
+        import numpy as np
+        with self._lock:
+            latencies = list(self._latencies)
+        return float(np.percentile(latencies, 100 * q))
+
+
+class HedgedAuthenticator(Authenticator):
+    """
+    Wraps several authenticators of the same currency pair. Prices are asked
+    from the first one, the primary, and if it hasn't answered after the
+    hedge delay, from the next one as well, and so on. The first valid price
+    wins. The hedge delay is the `quantile` of the primary's recent latencies,
+    so only its slowest lookups are hedged. Balances and orders always go to
+    the primary.
+    """
+
+    def __init__(self, authenticators, quantile=0.95, initial_delay=1.0,
+                 min_delay=0.01, max_delay=5.0, window=100, min_samples=10):
+        """
+        Parameters
+        ----------
+        authenticators: list of `Authenticator`
+            The price sources in order of preference. The first one is the
+            primary.
+
+        quantile: float
+            Which quantile of the primary's latency to wait for before
+            hedging. 0.95 hedges about one lookup in twenty.
+
+        initial_delay: float (seconds)
+            The hedge delay until `min_samples` latencies have been seen
+
+        min_delay, max_delay: float (seconds)
+            Bounds of the hedge delay
+
+        window: int
+            The number of recent latencies kept per source
+
+        min_samples: int
+            How many latencies are needed before the quantile is used
+
+        Raises
+        ------
+        ValueError
+            If there are no authenticators, they trade different pairs, or
+            the bounds are inconsistent
+        """
+        authenticators = list(authenticators)
+        if not authenticators:
+            raise ValueError('At least one authenticator is needed')
+        pairs = set((auth.target_currency(), auth.price_currency())
+                    for auth in authenticators)
+        if len(pairs) != 1:
+            raise ValueError('All authenticators must trade the same pair')
+        if not 0 < quantile < 1:
+            raise ValueError('quantile must be in (0, 1)')
+        if not 0 <= min_delay <= max_delay:
+            raise ValueError('min_delay must be in [0, max_delay]')
+
+        self.authenticators = authenticators
+        self.quantile = float(quantile)
+        self.initial_delay = float(initial_delay)
+        self.min_delay = float(min_delay)
+        self.max_delay = float(max_delay)
+        self.min_samples = int(min_samples)
+        self.n_lookups = 0
+        self.n_hedged = 0
+        self.n_hedge_wins = 0
+        self._latencies = [_LatencyWindow(window) for _ in authenticators]
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * len(authenticators),
+            thread_name_prefix='HedgedLookup')
+
+    @property
+    def primary(self):
+        return self.authenticators[0]
+
+    def hedge_delay(self, source=0):
+        """
+        How long a lookup of `source` is given before the next source is
+        asked as well
+        """
+        latencies = self._latencies[source]
+        if len(latencies) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            delay = latencies.quantile(self.quantile)
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def latency_quantile(self, source, q):
+        """
+        A quantile of the recent latencies of a source, or None if it has not
+        answered yet
+        """
+        latencies = self._latencies[source]
+        return latencies.quantile(q) if len(latencies) else None
+
+    def close(self):
+        """
+        Stop the lookup threads. Lookups still in flight are left to finish.
+        """
+        self._executor.shutdown(wait=False)
+
+    def target_currency(self):
+        return self.primary.target_currency()
+
+    def price_currency(self):
+        return self.primary.price_currency()
+
+    def get_current_price(self):
+        """
+        Get the price from whichever source answers first with a valid price
+
+        Raises
+        ------
+        RuntimeError
+            If every source failed. The message lists their errors.
+        """
+        self.n_lookups += 1
+        futures = {}
+        errors = []
+        n_started = 0
+        while True:
+            if n_started < len(self.authenticators):
+                futures[self._start(n_started)] = n_started
+                if n_started > 0:
+                    self.n_hedged += 1
+                n_started += 1
+            if not futures:
+                raise RuntimeError('Every price source failed: ' +
+                                   '; '.join(errors))
+
+            # Wait for an answer, or until it's time to ask the next source.
+            # A source that fails is hedged right away.
+            timeout = None
+            if n_started < len(self.authenticators):
+                timeout = self.hedge_delay(n_started - 1)
+            done, _ = wait(futures, timeout=timeout,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                source = futures.pop(future)
+                try:
+                    price = future.result()
+                except Exception as e:
+                    errors.append('%s: %s' % (
+                        type(self.authenticators[source]).__name__, e))
+                    continue
+                if source > 0:
+                    self.n_hedge_wins += 1
+                    self.primary.update_price(price)
+                return price
+
+    def update_price(self, price):
+        self.primary.update_price(price)
+
+    def get_account_balance(self):
+        return self.primary.get_account_balance()
+
+    def get_holdings(self):
+        return self.primary.get_holdings()
+
+    def get_account_state(self):
+        return self.primary.get_account_state()
+
+    def buy(self, n_shares):
+        return self.primary.buy(n_shares)
+
+    def sell(self, n_shares):
+        return self.primary.sell(n_shares)
+
+    def _start(self, source):
+        return self._executor.submit(self._lookup, source)
+
+    def _lookup(self, source):
+        start = time.perf_counter()
+        price = self.authenticators[source].get_current_price()
+        value = float(price.price)
+        if not math.isfinite(value) or value <= 0:
+            raise ValueError('Invalid price %s' % price.price)
+        self._latencies[source].add(time.perf_counter() - start)
+        return price
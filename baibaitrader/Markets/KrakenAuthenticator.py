@@ -4,7 +4,6 @@
 Support for the Kraken Exchange
 """
 import datetime
-import krakenex
 
 from .Authenticator import Authenticator
 from ..PriceSample import PriceSample
@@ -16,7 +15,8 @@ class KrakenAuthenticator(Authenticator):
     Currently only supports BitCoin/USD
     """
 
-    def __init__(self, key_file, target_currency, account_currency):
+    def __init__(self, key_file, target_currency, account_currency,
+                 transport=None):
         """
         Create a new authenticator using a key file. The keyfile should be a 
         plain text file with the key on the first line and the secret on the
@@ -28,9 +28,16 @@ class KrakenAuthenticator(Authenticator):
             The path to a plain text file containing your accounts key on the 
             first line and your secret on the second line. Make sure to keep
             this data secret!
+
+        transport: `Transport` or None
+            The HTTP transport queries are sent through. Defaults to the one
+            shared by all authenticators, see `default_transport`.
         """
-        self._api = krakenex.API()
-        self._api.load_key(key_file)
+        if transport is None:
+            # Importing the transport loads krakenex and requests
+            from .Transport import default_transport
+            transport = default_transport()
+        self._api = transport.api(key_file)
         self._target_currency = target_currency
         self._account_currency = account_currency
 
@@ -91,14 +98,14 @@ class KrakenAuthenticator(Authenticator):
 
         # Query the public API
         response = self._api.query_public(
-            'Depth', {'pair': self.get_pair(), 'count': '1'}, timeout=10.0)
+            'Depth', {'pair': self.get_pair(), 'count': '1'})
 
         # Check for errors
         if len(response['error']) is not 0:
             raise RuntimeError(str(response['error']))
 
         # Build a `PriceSample` to return
-        cost = response['result'][self.get_pair()]['asks'][0][0]
+        cost = float(response['result'][self.get_pair()]['asks'][0][0])
         date = datetime.datetime.now()
         price = PriceSample(
             cost, date, self.target_currency(), self.price_currency())
@@ -121,7 +128,7 @@ class KrakenAuthenticator(Authenticator):
         RequestException
             If there is a networking problem
         """
-        pass
+        return self.get_account_state()[0]
 
     def get_holdings(self):
         """
@@ -142,7 +149,40 @@ class KrakenAuthenticator(Authenticator):
         RequestException
             If there is a networking problem
         """
-        pass
+        return self.get_account_state()[1]
+
+    def get_account_state(self):
+        """
+        Get the account balance and the holdings with a single request to the
+        private `Balance` endpoint
+
+        Returns
+        -------
+        balance: float
+            The current balance of the account defined by `price_currency`
+
+        holdings: float
+            The number of coins of `target_currency` held
+
+        Raises
+        ------
+        RuntimeError
+            If fetching fails for some reason
+
+        RequestException
+            If there is a networking problem
+        """
+        response = self._api.query_private('Balance')
+
+        # Check for errors
+        if len(response['error']) != 0:
+            raise RuntimeError(str(response['error']))
+
+        # Kraken leaves out assets with a zero balance
+        result = response['result']
+        balance = float(result.get('Z' + self.price_currency(), 0.0))
+        holdings = float(result.get('X' + self.target_currency(), 0.0))
+        return balance, holdings
 
     def buy(self, n_shares):
         """
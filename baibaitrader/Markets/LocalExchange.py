@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for Kraken's REST API. It serves the public and private
+endpoints the authenticators use from a threaded HTTP server on an ephemeral
+port, with injectable latency, error rates and price paths, so traders can be
+benchmarked against realistic exchange behaviour without any network.
+"""
+import json
+import math
+import time
+import random
+import itertools
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def constant_latency(seconds):
+    """
+    A latency distribution that always returns `seconds`
+    """
+    return lambda: seconds
+
+
+def lognormal_latency(median, sigma=0.5, seed=None):
+    """
+    A right skewed latency distribution like that of a real exchange: most
+    responses take about `median` seconds, and a few take many times longer
+
+    Parameters
+    ----------
+    median: float (seconds)
+        The median latency
+
+    sigma: float
+        The standard deviation of the log of the latency. Larger values give a
+        longer tail.
+
+    seed: int or None
+        Seeds the random numbers, for repeatable runs
+    """
+    rng = random.Random(seed)
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+def random_walk(start, volatility=0.001, seed=None):
+    """
+    An endless price path that changes by a normally distributed fraction of
+    the price at every step
+
+    Parameters
+    ----------
+    start: float
+        The first price
+
+    volatility: float
+        The standard deviation of the relative change per step
+
+    seed: int or None
+        Seeds the random numbers, for repeatable runs
+    """
+    rng = random.Random(seed)
+    price = float(start)
+    while True:
+        yield price
+        price *= 1 + rng.gauss(0, volatility)
+
+
+class _Market:
+    """
+    The prices of one pair. Every price query moves the path one step; when a
+    finite path runs out its last price is kept.
+    """
+
+    def __init__(self, path):
+        self._path = iter(path)
+        self.price = None
+
+    def next_price(self):
+        self.price = float(next(self._path, self.price))
+        return self.price
+
+
+class LocalExchange:
+    """
+    Emulates the Kraken endpoints `Depth`, `Ticker`, `Balance` and `AddOrder`
+    for a set of pairs and a single account. Signatures and nonces of private
+    queries are not checked. Market orders are filled at the current price of
+    their pair.
+
+    Point a `Transport` at `url` to trade against it:
+
+        exchange = LocalExchange(latency=lognormal_latency(0.05))
+        exchange.start()
+        auth = PracticeAuthenticator(
+            100, 'XBT', 'USD', transport=Transport(base_url=exchange.url))
+    """
+
+    def __init__(self, prices=None, balances=None, latency=None,
+                 error_rate=0.0, error_status=503, spread=0.001, levels=5,
+                 level_volume=1.0, seed=None, host='127.0.0.1'):
+        """
+        Parameters
+        ----------
+        prices: dict or None
+            Maps Kraken pairs such as 'XXBTZUSD' to the path their ask price
+            follows: an iterable of prices, e.g. `random_walk(100)`. Defaults
+            to XXBTZUSD at a constant 100.
+
+        balances: dict or None
+            Maps Kraken assets such as 'ZUSD' or 'XXBT' to the amount held by
+            the account. Defaults to 1000 ZUSD.
+
+        latency: callable, dict or None
+            Returns the number of seconds to wait before answering a request,
+            e.g. `lognormal_latency(0.05)`. A dict maps endpoint names to such
+            callables; endpoints it doesn't list answer right away. If None,
+            every request is answered right away.
+
+        error_rate: float
+            The fraction of requests answered with `error_status` instead of
+            a result
+
+        error_status: int
+            The HTTP status of injected errors. 5xx statuses are retried by
+            `Transport`.
+
+        spread: float
+            The gap between the best ask and the best bid, as a fraction of
+            the price
+
+        levels: int
+            The number of levels of each side of the `Depth` order book
+
+        level_volume: float
+            The volume of each level of the order book
+
+        seed: int or None
+            Seeds which requests fail, for repeatable runs
+
+        host: string
+            The address to listen on. The port is picked by the system.
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError('error_rate must be in [0, 1]')
+        if prices is None:
+            prices = {'XXBTZUSD': itertools.repeat(100.0)}
+        if balances is None:
+            balances = {'ZUSD': 1000.0}
+
+        self.balances = {asset: float(amount)
+                         for asset, amount in balances.items()}
+        self.latency = latency
+        self.error_rate = float(error_rate)
+        self.error_status = error_status
+        self.spread = float(spread)
+        self.levels = int(levels)
+        self.level_volume = float(level_volume)
+        self.requests = Counter()
+        self.n_errors = 0
+        self.orders = []
+        self.ready = threading.Event()
+        self._markets = {pair: _Market(path) for pair, path in prices.items()}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # The headers and the body are sent separately, which Nagle's
+            # algorithm would hold up on kept-alive connections
+            disable_nagle_algorithm = True
+
+            def respond(handler):
+                length = int(handler.headers.get('Content-Length', 0))
+                body = handler.rfile.read(length).decode('utf-8')
+                url = urlparse(handler.path)
+                params = parse_qs(url.query)
+                params.update(parse_qs(body))
+                params = {key: values[-1] for key, values in params.items()}
+                status, payload = exchange.handle(url.path, params)
+                payload = json.dumps(payload).encode('utf-8')
+                handler.send_response(status)
+                handler.send_header('Content-Type', 'application/json')
+                handler.send_header('Content-Length', str(len(payload)))
+                handler.end_headers()
+                handler.wfile.write(payload)
+
+            do_GET = respond
+            do_POST = respond
+
+            def log_message(handler, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, 0), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        """
+        The base URL of the exchange, e.g. http://127.0.0.1:49152
+        """
+        host, port = self._server.server_address[:2]
+        return 'http://%s:%d' % (host, port)
+
+    def start(self, timeout=5.0):
+        """
+        Start serving on a background thread and wait until requests are
+        accepted
+
+        Raises
+        ------
+        RuntimeError
+            If the server isn't ready within `timeout` seconds
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._serve,
+                                        name='LocalExchange', daemon=True)
+        self._thread.start()
+        if not self.ready.wait(timeout):
+            raise RuntimeError('LocalExchange did not start in time')
+
+    def stop(self):
+        """
+        Stop serving and close the listening socket
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.ready.clear()
+
+    def price(self, pair):
+        """
+        The last price served for `pair`, or None if it wasn't asked for yet
+        """
+        return self._markets[pair].price
+
+    def handle(self, path, params):
+        """
+        Answer a single request
+
+        Parameters
+        ----------
+        path: string
+            The path of the request, e.g. '/0/public/Depth'
+
+        params: dict
+            The query string and form parameters of the request
+
+        Returns
+        -------
+        status: int
+            The HTTP status
+
+        payload: dict
+            The JSON body, with Kraken's 'error' and 'result' keys
+        """
+        method = path.rstrip('/').rsplit('/', 1)[-1]
+        delay = self._latency_for(method)
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self.requests[method] += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.n_errors += 1
+                return self.error_status, {'error': ['EService:Unavailable']}
+
+            handler = getattr(self, '_' + method.lower(), None)
+            if handler is None:
+                return 404, {'error': ['EGeneral:Unknown method']}
+            try:
+                return 200, {'error': [], 'result': handler(params)}
+            except _KrakenError as e:
+                return 200, {'error': [str(e)]}
+
+    def _latency_for(self, method):
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(method)
+        return latency() if latency is not None else 0.0
+
+    def _serve(self):
+        self.ready.set()
+        self._server.serve_forever(poll_interval=0.05)
+
+    def _pairs(self, params):
+        pairs = params.get('pair', '').split(',')
+        for pair in pairs:
+            if pair not in self._markets:
+                raise _KrakenError('EQuery:Unknown asset pair')
+        return pairs
+
+    def _depth(self, params):
+        count = min(int(params.get('count', self.levels)), self.levels)
+        result = {}
+        for pair in self._pairs(params):
+            ask = self._markets[pair].next_price()
+            bid = ask * (1 - self.spread)
+            tick = ask * 0.0005
+            now = int(time.time())
+            result[pair] = {
+                'asks': [[str(ask + i * tick), str(self.level_volume), now]
+                         for i in range(count)],
+                'bids': [[str(bid - i * tick), str(self.level_volume), now]
+                         for i in range(count)]}
+        return result
+
+    def _ticker(self, params):
+        result = {}
+        for pair in self._pairs(params):
+            ask = self._markets[pair].next_price()
+            bid = ask * (1 - self.spread)
+            result[pair] = {'a': [str(ask), '1', '1.000'],
+                            'b': [str(bid), '1', '1.000']}
+        return result
+
+    def _balance(self, params):
+        return {asset: '%.10f' % amount
+                for asset, amount in self.balances.items()}
+
+    def _addorder(self, params):
+        pair = self._pairs(params)[0]
+        side = params.get('type')
+        if side not in ('buy', 'sell'):
+            raise _KrakenError('EGeneral:Invalid arguments:type')
+        try:
+            volume = float(params.get('volume', 0))
+        except ValueError:
+            raise _KrakenError('EGeneral:Invalid arguments:volume')
+        if volume <= 0:
+            raise _KrakenError('EGeneral:Invalid arguments:volume')
+
+        market = self._markets[pair]
+        price = market.price if market.price is not None \
+            else market.next_price()
+        if side == 'sell':
+            price *= 1 - self.spread
+        # Kraken pairs are X + asset + Z + currency, e.g. XXBTZUSD
+        target, currency = pair[:4], pair[4:]
+        cost = price * volume
+        if side == 'buy':
+            if cost > self.balances.get(currency, 0.0):
+                raise _KrakenError('EOrder:Insufficient funds')
+            self.balances[currency] = self.balances.get(currency, 0.0) - cost
+            self.balances[target] = self.balances.get(target, 0.0) + volume
+        else:
+            if volume > self.balances.get(target, 0.0):
+                raise _KrakenError('EOrder:Insufficient funds')
+            self.balances[target] = self.balances.get(target, 0.0) - volume
+            self.balances[currency] = self.balances.get(currency, 0.0) + cost
+
+        txid = 'O%06d' % (len(self.orders) + 1)
+        self.orders.append((txid, pair, side, volume, price))
+        return {'descr': {'order': '%s %s %s @ market' %
+                          (side, volume, pair)},
+                'txid': [txid]}
+
+
+class _KrakenError(Exception):
+    """
+    An error Kraken reports in the 'error' list of a successful response
+    """
+    pass
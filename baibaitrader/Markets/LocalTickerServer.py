@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for Kraken's websocket API. It accepts ticker subscriptions
+and pushes whatever prices it is told to, so `KrakenPriceStream` and streaming
+traders can be tested without a network connection.
+"""
+import json
+import threading
+from websocket_server import WebsocketServer
+
+
+class LocalTickerServer:
+    """
+    Listens on an ephemeral local port as soon as it is created. Call `start`
+    to begin accepting connections and `publish` to send a ticker update to
+    every client subscribed to a pair.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._server = WebsocketServer(host=host, port=port)
+        self._server.set_fn_message_received(self._received)
+        self._server.set_fn_client_left(self._client_left)
+        self._subscriptions = {}
+        self._channel_ids = {}
+        self._condition = threading.Condition()
+
+    @property
+    def url(self):
+        return 'ws://%s:%d' % (self._server.server_address[0],
+                               self._server.port)
+
+    def start(self):
+        """
+        Start serving clients from a background thread
+        """
+        self._server.run_forever(threaded=True)
+
+    def stop(self):
+        self._server.shutdown_gracefully()
+
+    def wait_for_subscribers(self, pair, n=1, timeout=5.0):
+        """
+        Block until at least `n` clients are subscribed to `pair`
+
+        Returns
+        -------
+        subscribed: boolean
+            False if the timeout expired first
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: len(self._subscribers(pair)) >= n, timeout)
+
+    def publish(self, pair, price):
+        """
+        Send a ticker update for `pair` with the given ask price to every
+        subscribed client, in the same format Kraken uses
+        """
+        channel_id = self._channel_ids.setdefault(pair,
+                                                  len(self._channel_ids) + 1)
+        price = '%.5f' % price
+        message = json.dumps([channel_id,
+                              {'a': [price, 1, '1.000'],
+                               'b': [price, 1, '1.000'],
+                               'c': [price, '0.1']},
+                              'ticker', pair])
+        with self._condition:
+            clients = self._subscribers(pair)
+        for client in clients:
+            self._server.send_message(client, message)
+
+    def _subscribers(self, pair):
+        return [client for client, pairs in self._subscriptions.values()
+                if pair in pairs]
+
+    def _received(self, client, server, message):
+        request = json.loads(message)
+        if request.get('event') != 'subscribe':
+            return
+        with self._condition:
+            _, pairs = self._subscriptions.get(client['id'], (client, set()))
+            pairs.update(request['pair'])
+            self._subscriptions[client['id']] = (client, pairs)
+            self._condition.notify_all()
+        for pair in request['pair']:
+            server.send_message(client, json.dumps(
+                {'event': 'subscriptionStatus', 'pair': pair,
+                 'status': 'subscribed',
+                 'subscription': {'name': 'ticker'}}))
+
+    def _client_left(self, client, server):
+        with self._condition:
+            if client is not None:
+                self._subscriptions.pop(client['id'], None)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A shared source of market prices. Instead of every `Trader` querying the market
+for its own pair, the hub fetches the prices of all subscribed pairs with a
+single request per interval and hands them out to every registered trader.
+"""
+import datetime
+import threading
+
+from ..PriceSample import PriceSample
+from ..Scheduler import Scheduler
+from ..utils import build_logger
+
+
+class MarketDataHub:
+    """
+    Polls Kraken's `Ticker` endpoint, which accepts several comma separated
+    pairs, once per `update_interval` and calls `Trader.process_price` on every
+    registered trader with the price of its pair.
+    """
+
+    def __init__(self, update_interval=60.0, output_console=True,
+                 transport=None):
+        """
+        Parameters
+        ----------
+        update_interval: float (seconds)
+            How often prices are fetched. Registered traders act on every
+            update, so this replaces their own `update_interval`.
+
+        output_console: boolean (default True)
+            Determines if logs will be printed to the console in addition to
+            written to disk.
+
+        transport: `Transport` or None
+            The HTTP transport queries are sent through. Defaults to the one
+            shared by all authenticators, see `default_transport`.
+        """
+        if transport is None:
+            from .Transport import default_transport
+            transport = default_transport()
+        self.update_interval = float(update_interval)
+        self._api = transport.api()
+        self._traders = {}
+        self._lock = threading.Lock()
+        self._scheduler = None
+        self.log = build_logger('MarketDataHub', 'market_data_hub.log',
+                                output_console=output_console)
+
+    @staticmethod
+    def pair_for(authenticator):
+        """
+        The Kraken pair traded by an authenticator
+
+        Parameters
+        ----------
+        authenticator: instance of `Authenticator`
+
+        Returns
+        -------
+        pair: string
+            For example XXBTZUSD for the BitCoin/USD pair
+        """
+        if hasattr(authenticator, 'get_pair'):
+            return authenticator.get_pair()
+        return 'X' + authenticator.target_currency() + \
+            'Z' + authenticator.price_currency()
+
+    def register(self, trader):
+        """
+        Start sending price updates to a `Trader`. The trader should not also
+        be trading on its own through `begin_trading`.
+        """
+        pair = self.pair_for(trader.authenticator)
+        with self._lock:
+            self._traders.setdefault(pair, []).append(trader)
+
+    def unregister(self, trader):
+        """
+        Stop sending price updates to a `Trader`
+        """
+        pair = self.pair_for(trader.authenticator)
+        with self._lock:
+            traders = self._traders.get(pair, [])
+            if trader in traders:
+                traders.remove(trader)
+            if not traders:
+                self._traders.pop(pair, None)
+
+    def pairs(self):
+        """
+        Returns
+        -------
+        pairs: list of string
+            Every pair at least one registered trader is interested in
+        """
+        with self._lock:
+            return sorted(self._traders)
+
+    def fetch_prices(self):
+        """
+        Get the current ask price of every subscribed pair with one request
+
+        Returns
+        -------
+        prices: dict
+            Maps each pair to a `PriceSample`
+
+        Raises
+        ------
+        RuntimeError
+            If Kraken returns an error
+
+        RequestException
+            If there is a networking problem
+        """
+        pairs = self.pairs()
+        if not pairs:
+            return {}
+
+        response = self._api.query_public(
+            'Ticker', {'pair': ','.join(pairs)})
+        if len(response['error']) != 0:
+            raise RuntimeError(str(response['error']))
+
+        date = datetime.datetime.now()
+        with self._lock:
+            traders = dict(self._traders)
+        prices = {}
+        for pair, ticker in response['result'].items():
+            if pair not in traders:
+                continue
+            auth = traders[pair][0].authenticator
+            prices[pair] = PriceSample(float(ticker['a'][0]), date,
+                                       auth.target_currency(),
+                                       auth.price_currency())
+        return prices
+
+    def publish(self):
+        """
+        Fetch the prices of all pairs and pass each one on to every trader
+        registered for that pair
+        """
+        try:
+            prices = self.fetch_prices()
+        except Exception as e:
+            self.log.error('Failed to get prices with error: %s', e)
+            return
+
+        with self._lock:
+            traders = [(pair, list(ts)) for pair, ts in self._traders.items()]
+        for pair, pair_traders in traders:
+            price = prices.get(pair)
+            if price is None:
+                self.log.error('No price received for %s', pair)
+                continue
+            for trader in pair_traders:
+                try:
+                    trader.authenticator.update_price(price)
+                    trader.process_price(price)
+                except Exception as e:
+                    self.log.error('%s failed to process price with error: '
+                                   '%s', trader.name, e)
+
+    def start(self):
+        """
+        Begin publishing prices every `update_interval` seconds
+        """
+        self._scheduler = Scheduler(self.update_interval, self.publish,
+                                    name='MarketDataHub')
+        self._scheduler.start()
+        self.log.info('Began publishing prices')
+
+    def stop(self):
+        """
+        Stop publishing prices
+        """
+        if self._scheduler is not None:
+            self._scheduler.stop()
+        self.log.info('Stopped publishing prices')
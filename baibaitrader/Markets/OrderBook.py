@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A local copy of a market's order book, used to price orders the way the market
+would fill them instead of at the best price for any size.
+"""
+import numpy as np
+
+BUY = 'buy'
+SELL = 'sell'
+
+
+class _Side:
+    """
+    The price levels of one side of the book, best price first. `sign` is 1
+    for asks and -1 for bids, so that `sign * prices` is ascending for both
+    sides and can be binary searched.
+    """
+
+    def __init__(self, levels, sign):
+        self.sign = sign
+        levels = [(float(p), float(v)) for p, v in levels]
+        levels = sorted((level for level in levels if level[1] > 0),
+                        key=lambda level: sign * level[0])
+        self.prices = np.array([p for p, _ in levels], dtype=np.float64)
+        self.volumes = np.array([v for _, v in levels], dtype=np.float64)
+        self._sums = None
+
+    def update(self, price, volume):
+        key = self.sign * price
+        i = np.searchsorted(self.sign * self.prices, key)
+        exists = i < len(self.prices) and self.prices[i] == price
+        if volume <= 0:
+            if exists:
+                self.prices = np.delete(self.prices, i)
+                self.volumes = np.delete(self.volumes, i)
+        elif exists:
+            self.volumes[i] = volume
+        else:
+            self.prices = np.insert(self.prices, i, price)
+            self.volumes = np.insert(self.volumes, i, volume)
+        self._sums = None
+
+    def truncate(self, depth):
+        self.prices = self.prices[:depth]
+        self.volumes = self.volumes[:depth]
+        self._sums = None
+
+    def sums(self):
+        """
+        The cumulative volume and cost of the levels, computed once per change
+        """
+        if self._sums is None:
+            self._sums = (np.cumsum(self.volumes),
+                          np.cumsum(self.prices * self.volumes))
+        return self._sums
+
+
+class OrderBook:
+    """
+    The asks and bids of a market as sorted numpy arrays of prices and
+    volumes. Fill prices for any volume are found with a binary search over
+    cumulative sums, which are only recomputed after the book changes.
+    """
+
+    def __init__(self, asks=(), bids=()):
+        """
+        Parameters
+        ----------
+        asks: iterable of (price, volume)
+            The offers to sell, in any order
+
+        bids: iterable of (price, volume)
+            The offers to buy, in any order
+        """
+        self._asks = _Side(asks, 1)
+        self._bids = _Side(bids, -1)
+
+    @classmethod
+    def from_depth(cls, depth):
+        """
+        Build a book from the result of Kraken's `Depth` endpoint for a pair
+
+        Parameters
+        ----------
+        depth: dict
+            With 'asks' and 'bids' lists of [price, volume, timestamp], where
+            price and volume may be strings
+        """
+        return cls([level[:2] for level in depth.get('asks', [])],
+                   [level[:2] for level in depth.get('bids', [])])
+
+    def update(self, side, price, volume):
+        """
+        Apply an incremental update to a single price level
+
+        Parameters
+        ----------
+        side: 'asks' or 'bids'
+            The side of the book the level belongs to
+
+        price: float
+            The price of the level
+
+        volume: float
+            The new volume at that price. 0 removes the level.
+        """
+        self._side(side).update(float(price), float(volume))
+
+    def truncate(self, depth):
+        """
+        Keep only the best `depth` levels of each side, like a subscription to
+        a book of limited depth does
+        """
+        self._asks.truncate(depth)
+        self._bids.truncate(depth)
+
+    def levels(self, side):
+        """
+        Returns
+        -------
+        prices, volumes: numpy arrays
+            The levels of 'asks' or 'bids', best price first
+        """
+        levels = self._side(side)
+        return levels.prices, levels.volumes
+
+    @property
+    def best_ask(self):
+        return self._asks.prices[0] if len(self._asks.prices) else None
+
+    @property
+    def best_bid(self):
+        return self._bids.prices[0] if len(self._bids.prices) else None
+
+    @property
+    def mid(self):
+        """
+        The price halfway between the best ask and the best bid, or whichever
+        of them exists
+        """
+        ask, bid = self.best_ask, self.best_bid
+        if ask is None or bid is None:
+            return ask if bid is None else bid
+        return (ask + bid) / 2
+
+    def cost(self, side, volume):
+        """
+        The total price of filling a market order against the book
+
+        Parameters
+        ----------
+        side: 'buy' or 'sell'
+            A buy is filled against the asks, a sell against the bids
+
+        volume: float
+            The number of shares to buy or sell
+
+        Raises
+        ------
+        ValueError
+            If the book doesn't hold enough volume to fill the order, or the
+            volume is not positive
+        """
+        if volume <= 0:
+            raise ValueError('volume must be > 0')
+        levels = self._asks if side == BUY else self._bids
+        volumes, costs = levels.sums()
+        i = np.searchsorted(volumes, volume)
+        if i == len(volumes):
+            raise ValueError('Not enough volume in the book to %s %s' %
+                             (side, volume))
+        filled, cost = (volumes[i - 1], costs[i - 1]) if i > 0 else (0.0, 0.0)
+        return float(cost + (volume - filled) * levels.prices[i])
+
+    def vwap(self, side, volume):
+        """
+        The volume weighted average price of filling a market order against
+        the book. See `cost`.
+        """
+        return self.cost(side, volume) / volume
+
+    def impact(self, side, volume):
+        """
+        The fill price of an order relative to the mid price, e.g. 1.002 for a
+        buy that pays 0.2% more than the mid price. See `cost`.
+        """
+        return self.vwap(side, volume) / self.mid
+
+    def _side(self, side):
+        if side == 'asks':
+            return self._asks
+        elif side == 'bids':
+            return self._bids
+        raise ValueError("side must be 'asks' or 'bids'")
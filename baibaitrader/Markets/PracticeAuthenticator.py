@@ -5,7 +5,6 @@ A simulated account that can be used to test out strategies
 without risk of losing any real money
 """
 import datetime
-import krakenex
 
 from .Authenticator import Authenticator
 from ..PriceSample import PriceSample
@@ -17,13 +16,47 @@ class PracticeAuthenticator(Authenticator):
     without risk of losing any real money
     """
 
-    def __init__(self, starting_balance, target_currency, account_currency):
+    def __init__(self, starting_balance, target_currency, account_currency,
+                 transport=None, depth=None):
+        """
+        Parameters
+        ----------
+        starting_balance: float
+            The simulated balance of `account_currency`
+
+        target_currency: string
+            The currency being traded for, e.g. XBT
+
+        account_currency: string
+            The currency used for purchasing, e.g. USD
+
+        transport: `Transport` or None
+            The HTTP transport queries are sent through. Defaults to the one
+            shared by all authenticators, see `default_transport`.
+
+        depth: int or None
+            If given, this many levels of each side of the order book are
+            fetched with every price, and orders are filled at the volume
+            weighted average price they would get on the market. If None, the
+            whole order is filled at the last price.
+        """
         self._target_currency = target_currency
         self._target_balance = 0
         self._account_currency = account_currency
         self._account_balance = float(starting_balance)
-        self._api = krakenex.API()
+        self._api = self._connect(transport)
         self.last_price = None
+        self.depth = depth
+        self.order_book = None
+
+    def _connect(self, transport):
+        """
+        The Kraken API prices are fetched from
+        """
+        if transport is None:
+            from .Transport import default_transport
+            transport = default_transport()
+        return transport.api()
 
     def get_pair(self):
         return 'X' + self.target_currency() + 'Z' + self.price_currency()
@@ -37,15 +70,21 @@ class PracticeAuthenticator(Authenticator):
     def get_current_price(self):
 
         # Query the public API
+        count = '1' if self.depth is None else str(self.depth)
         response = self._api.query_public(
-            'Depth', {'pair': self.get_pair(), 'count': '1'}, timeout=10.0)
+            'Depth', {'pair': self.get_pair(), 'count': count})
 
         # Check for errors
-        if len(response['error']) is not 0:
+        if len(response['error']) != 0:
             raise RuntimeError(str(response['error']))
 
         # Build a `PriceSample` to return
-        cost = response['result'][self.get_pair()]['asks'][0][0]
+        depth = response['result'][self.get_pair()]
+        cost = float(depth['asks'][0][0])
+        if self.depth is not None:
+            from .OrderBook import OrderBook
+            self.order_book = OrderBook.from_depth(depth)
+            cost = self.order_book.best_ask
         date = datetime.datetime.now()
         price = PriceSample(
             cost, date, self.target_currency(), self.price_currency())
@@ -53,6 +92,11 @@ class PracticeAuthenticator(Authenticator):
         self.last_price = price
         return price
 
+    def update_price(self, price):
+        self.last_price = price
+        # The book was fetched with an older price
+        self.order_book = None
+
     def get_account_balance(self):
         return self._account_balance
 
@@ -62,10 +106,7 @@ class PracticeAuthenticator(Authenticator):
     def buy(self, n_shares):
         super().buy(n_shares)
 
-        if self.last_price is None:
-            self.get_current_price()
-
-        cost = self.last_price.price * n_shares
+        cost = self._fill_cost('buy', n_shares)
         if cost > self.get_account_balance():
             raise ValueError('Note enough funds')
 
@@ -75,12 +116,25 @@ class PracticeAuthenticator(Authenticator):
     def sell(self, n_shares):
         super().sell(n_shares)
 
-        if self.last_price is None:
-            self.get_current_price()
-
-        profit = self.last_price.price * n_shares
+        profit = self._fill_cost('sell', n_shares)
         if n_shares > self.get_holdings():
             raise ValueError('You do not have that many shares')
 
         self._target_balance -= n_shares
         self._account_balance += profit
+
+    def _fill_cost(self, side, n_shares):
+        """
+        What filling an order for `n_shares` costs or brings in
+
+        Raises
+        ------
+        ValueError
+            If the order book is too thin to fill the order
+        """
+        if self.last_price is None or \
+                (self.depth is not None and self.order_book is None):
+            self.get_current_price()
+        if self.order_book is not None:
+            return self.order_book.cost(side, n_shares)
+        return self.last_price.price * n_shares
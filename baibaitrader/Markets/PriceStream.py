@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Push based price sources. Instead of being polled, a `PriceStream` calls its
+subscribers as soon as the market reports a new price.
+"""
+import json
+import datetime
+import threading
+from abc import ABC, abstractmethod
+
+from ..PriceSample import PriceSample
+
+_POLL = 0.25
+
+
+class PriceStream(ABC):
+    """
+    A source of prices that pushes every new `PriceSample` to its subscribers.
+    Subscribers are called on the stream's own thread, so they should return
+    quickly; wrap slow consumers in a `CoalescingDispatcher`.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """
+        Parameters
+        ----------
+        callback: callable
+            Called with a `PriceSample` for every price received
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, sample):
+        """
+        Send a price to every subscriber
+        """
+        for callback in list(self._subscribers):
+            callback(sample)
+
+    @abstractmethod
+    def start(self):
+        """
+        Connect to the market and start receiving prices in the background
+        """
+        pass
+
+    @abstractmethod
+    def stop(self):
+        """
+        Disconnect from the market
+        """
+        pass
+
+
+class KrakenPriceStream(PriceStream):
+    """
+    Receives ticker updates from Kraken's websocket API and publishes the best
+    ask price of every update, matching what `KrakenAuthenticator` reports.
+    """
+
+    def __init__(self, pairs, url='wss://ws.kraken.com', reconnect=5):
+        """
+        Parameters
+        ----------
+        pairs: list of string
+            The pairs to subscribe to in Kraken's websocket notation, for
+            example ['XBT/USD', 'ETH/USD']
+
+        url: string
+            The websocket endpoint. Point this at a `LocalTickerServer` for
+            testing.
+
+        reconnect: int (seconds)
+            How long to wait before reconnecting after the connection drops
+        """
+        super().__init__()
+        self.pairs = list(pairs)
+        self.url = url
+        self.reconnect = reconnect
+        self._app = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        # websocket-client is only needed by programs that stream prices
+        import websocket
+
+        self._stopped.clear()
+        self._app = websocket.WebSocketApp(self.url,
+                                           on_open=self._subscribe,
+                                           on_message=self._received)
+        self._thread = threading.Thread(target=self._run,
+                                        name='KrakenPriceStream', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._app is not None:
+            self._app.close()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _run(self):
+        # Reconnect here rather than through run_forever, whose reconnect delay
+        # can't be interrupted by `stop`. Closing the socket doesn't always wake
+        # up the receiving thread, so it also wakes up every `_POLL` seconds.
+        while not self._stopped.is_set():
+            self._app.run_forever(ping_timeout=_POLL)
+            self._stopped.wait(self.reconnect)
+
+    def _subscribe(self, app):
+        if self._stopped.is_set():
+            app.close()
+            return
+        app.send(json.dumps({'event': 'subscribe',
+                             'pair': self.pairs,
+                             'subscription': {'name': 'ticker'}}))
+
+    def _received(self, app, message):
+        sample = self.parse_ticker(message)
+        if sample is not None:
+            self.publish(sample)
+
+    @staticmethod
+    def parse_ticker(message):
+        """
+        Turn a ticker message into a `PriceSample`
+
+        Parameters
+        ----------
+        message: string
+            A message as sent by Kraken, e.g.
+            '[42, {"a": ["16200.0", 1, "1.0"], ...}, "ticker", "XBT/USD"]'
+
+        Returns
+        -------
+        sample: PriceSample or None
+            The best ask price, or None if the message isn't a ticker update
+        """
+        data = json.loads(message)
+        if not isinstance(data, list) or len(data) < 4 or \
+                data[-2] != 'ticker':
+            return None
+        currency, price_currency = data[-1].split('/')
+        return PriceSample(float(data[1]['a'][0]), datetime.datetime.now(),
+                           currency, price_currency)
+
+
+class CoalescingDispatcher:
+    """
+    Hands prices to a consumer on a dedicated thread. If several prices arrive
+    while the consumer is still busy, only the newest one is delivered, so a
+    burst of updates never builds up a backlog.
+    """
+
+    def __init__(self, callback, on_error=None, name='CoalescingDispatcher'):
+        """
+        Parameters
+        ----------
+        callback: callable
+            Called with the newest `PriceSample` whenever there is one
+
+        on_error: callable or None
+            Called with the exception if `callback` raises. If None, the
+            exception stops the dispatcher.
+
+        name: string
+            The name of the dispatcher thread
+        """
+        self.callback = callback
+        self.on_error = on_error
+        self.name = name
+        self.n_delivered = 0
+        self.n_coalesced = 0
+        self._latest = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name,
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop delivering prices. A delivery in progress is allowed to finish.
+        """
+        self._stopped.set()
+        self._ready.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def push(self, sample):
+        """
+        Offer a new price. Returns immediately; a price that hasn't been
+        delivered yet is replaced.
+        """
+        with self._lock:
+            if self._latest is not None:
+                self.n_coalesced += 1
+            self._latest = sample
+        self._ready.set()
+
+    def _run(self):
+        while True:
+            self._ready.wait()
+            if self._stopped.is_set():
+                return
+            with self._lock:
+                sample = self._latest
+                self._latest = None
+                self._ready.clear()
+            if sample is None:
+                continue
+            try:
+                self.callback(sample)
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(e)
+            self.n_delivered += 1
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A client side model of Kraken's API rate limits. Kraken keeps a call counter
+per account that every private query increases by its cost and that decays at
+a fixed rate; a query that would push the counter past its maximum is
+rejected, and clients that keep trying get locked out. Requests are limited
+per IP address as well, which is what throttles public queries such as price
+polls. The governor keeps both counters locally and makes queries wait, or
+drops them, before either limit is hit.
+"""
+import time
+import heapq
+import itertools
+import threading
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+# Private queries that increase the call counter by more than 1
+DEFAULT_COSTS = {'Ledgers': 2, 'QueryLedgers': 2, 'TradesHistory': 2,
+                 'QueryTrades': 2}
+
+# Orders are governed by a separate limit of the matching engine, so they
+# don't increase the call counter
+ORDER_METHODS = frozenset(['AddOrder', 'EditOrder', 'CancelOrder',
+                           'CancelAll'])
+
+
+class RateLimitExceeded(RuntimeError):
+    """
+    Raised when a query can't be sent without exceeding the rate limit
+    """
+    pass
+
+
+
+
+class TokenBucket:
+    """
+    A counter that every query increases by its cost and that decays at a
+    fixed rate. Queries are admitted in order of priority while the counter
+    stays within `max_counter`. Low priority queries may only use the counter
+    up to `max_counter - low_reserve`, so there is always room left for
+    queries of higher priority, and are dropped rather than queued if
+    `shed_low` is set.
+    """
+
+    def __init__(self, max_counter, decay_rate, low_reserve=0.0,
+                 shed_low=False, max_wait=30.0, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        max_counter: float
+            The highest value the counter may reach
+
+        decay_rate: float (per second)
+            How fast the counter goes down
+
+        low_reserve: float
+            The part of the counter low priority queries may not use
+
+        shed_low: boolean (default False)
+            Raise `RateLimitExceeded` for low priority queries that can't be
+            sent right away instead of making them wait
+
+        max_wait: float (seconds)
+            How long a query waits for room before `RateLimitExceeded` is
+            raised
+
+        clock: callable
+            Returns the current time in seconds. Must be monotonic.
+        """
+        if max_counter <= 0:
+            raise ValueError('max_counter must be > 0')
+        if decay_rate <= 0:
+            raise ValueError('decay_rate must be > 0')
+        if not 0 <= low_reserve < max_counter:
+            raise ValueError('low_reserve must be in [0, max_counter)')
+
+        self.max_counter = float(max_counter)
+        self.decay_rate = float(decay_rate)
+        self.low_reserve = float(low_reserve)
+        self.shed_low = shed_low
+        self.max_wait = float(max_wait)
+        self.clock = clock
+        self.n_admitted = 0
+        self.n_shed = 0
+        self.n_waited = 0
+        self._counter = 0.0
+        self._updated = clock()
+        self._waiting = []
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+
+    @property
+    def counter(self):
+        """
+        The current value of the modelled counter
+        """
+        with self._condition:
+            self._decay()
+            return self._counter
+
+    def acquire(self, cost, priority=NORMAL, timeout=None):
+        """
+        Wait until a query of the given cost can be sent and count it
+
+        Parameters
+        ----------
+        cost: float
+            How much the query increases the counter
+
+        priority: `HIGH`, `NORMAL` or `LOW`
+            Waiting queries of higher priority are admitted first
+
+        timeout: float (seconds) or None
+            How long to wait at most. Defaults to `max_wait`.
+
+        Raises
+        ------
+        RateLimitExceeded
+            If the query can't be admitted in time, or right away for a low
+            priority query when `shed_low` is set
+        """
+        if timeout is None:
+            timeout = self.max_wait
+        limit = self.max_counter
+        if priority == LOW:
+            limit -= self.low_reserve
+        if cost > limit:
+            raise RateLimitExceeded('A cost of %s can never be admitted' % cost)
+
+        with self._condition:
+            if cost <= 0:
+                self.n_admitted += 1
+                return
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            deadline = self.clock() + timeout
+            waited = False
+            try:
+                while True:
+                    self._decay()
+                    first = self._waiting[0] == ticket
+                    if first and self._counter + cost <= limit:
+                        self._counter += cost
+                        self.n_admitted += 1
+                        self.n_waited += waited
+                        return
+
+                    remaining = deadline - self.clock()
+                    if (priority == LOW and self.shed_low) or remaining <= 0:
+                        self.n_shed += 1
+                        raise RateLimitExceeded(
+                            'Rate limit counter at %.2f of %s' %
+                            (self._counter, self.max_counter))
+
+                    if first:
+                        wait = (self._counter + cost - limit) / self.decay_rate
+                    else:
+                        # Woken up when the queries ahead have been admitted
+                        wait = remaining
+                    waited = True
+                    self._condition.wait(min(wait, remaining))
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def penalize(self):
+        """
+        The exchange reported that the limit was exceeded anyway, e.g. because
+        of queries made by another program. Treat the counter as full.
+        """
+        with self._condition:
+            self._decay()
+            self._counter = self.max_counter
+
+    def _decay(self):
+        now = self.clock()
+        self._counter = max(
+            0.0, self._counter - (now - self._updated) * self.decay_rate)
+        self._updated = now
+
+
+class RateGovernor(TokenBucket):
+    """
+    A `TokenBucket` that mirrors Kraken's call counter, plus a second one,
+    `address`, for the limit on requests per IP address. Every request is
+    counted by `address`, where price polls have low priority: they leave
+    `address_reserve` free for orders and account queries and wait behind
+    them. Private queries other than orders are counted by the call counter
+    as well.
+    """
+
+    def __init__(self, max_counter=15.0, decay_rate=0.33, costs=None,
+                 low_reserve=3.0, shed_low=False, max_wait=30.0,
+                 address_max=20.0, address_rate=1.0, address_reserve=5.0,
+                 clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        max_counter: float
+            The highest value the call counter may reach. 15 for starter
+            accounts, 20 for intermediate and pro accounts.
+
+        decay_rate: float (per second)
+            How fast the call counter goes down. 0.33 for starter accounts,
+            0.5 for intermediate and 1 for pro accounts.
+
+        costs: dict or None
+            Maps private API method names to how much they increase the call
+            counter. Methods not listed cost 1, orders and public methods cost
+            nothing. Defaults to `DEFAULT_COSTS`.
+
+        low_reserve: float
+            The part of the call counter low priority queries may not use
+
+        shed_low: boolean (default False)
+            Raise `RateLimitExceeded` for low priority queries that can't be
+            sent right away, such as price polls while the address limit is
+            reached, instead of making them wait
+
+        max_wait: float (seconds)
+            How long a query waits for room before `RateLimitExceeded` is
+            raised
+
+        address_max: float
+            How many requests may be sent from this address in a burst
+
+        address_rate: float (per second)
+            How many requests per second may be sent from this address in the
+            long run
+
+        address_reserve: float
+            The part of the address limit price polls may not use
+
+        clock: callable
+            Returns the current time in seconds. Must be monotonic.
+        """
+        super().__init__(max_counter, decay_rate, low_reserve=low_reserve,
+                         shed_low=shed_low, max_wait=max_wait, clock=clock)
+        self.costs = dict(DEFAULT_COSTS if costs is None else costs)
+        self.address = TokenBucket(address_max, address_rate,
+                                   low_reserve=address_reserve,
+                                   shed_low=shed_low, max_wait=max_wait,
+                                   clock=clock)
+
+    def cost_for(self, method, private=True):
+        """
+        How much an API method such as 'Balance' increases the call counter.
+        Public methods are limited per IP address rather than by the call
+        counter, so they cost nothing.
+        """
+        if not private:
+            return 0
+        if method in ORDER_METHODS:
+            return self.costs.get(method, 0)
+        return self.costs.get(method, 1)
+
+    @staticmethod
+    def priority_for(method, private):
+        """
+        The priority of an API method: `HIGH` for orders, `NORMAL` for other
+        private queries and `LOW` for public ones such as price polls
+        """
+        if method in ORDER_METHODS:
+            return HIGH
+        return NORMAL if private else LOW
+
+    def admit(self, method, private, timeout=None):
+        """
+        Wait until a query of an API method can be sent and count it against
+        the call counter and the address limit
+
+        Raises
+        ------
+        RateLimitExceeded
+            If the query can't be admitted in time, see `TokenBucket.acquire`
+        """
+        priority = self.priority_for(method, private)
+        self.acquire(self.cost_for(method, private), priority, timeout)
+        self.address.acquire(1, priority, timeout)
+
+    def penalize(self, private=True):
+        """
+        Kraken reported that a limit was exceeded anyway. Treat the call
+        counter as full if the query was private, the address limit otherwise.
+        """
+        if private:
+            super().penalize()
+        else:
+            self.address.penalize()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A simulated account that serves prices from a recorded price log instead of
+the market, following a `VirtualClock`. Together they let the real `Trader`
+trade a month of recorded prices in seconds.
+"""
+import bisect
+import threading
+
+from .PracticeAuthenticator import PracticeAuthenticator
+from ..VirtualClock import VirtualClock
+from ..utils import read_price_history
+
+
+class ReplayFinished(RuntimeError):
+    """
+    Raised when a price is asked for after the last one in the log was served
+    """
+    pass
+
+
+class ReplayAuthenticator(PracticeAuthenticator):
+    """
+    Replays a price log as if it was the market. Every price lookup returns
+    the last logged price at the current time of `clock`, which starts at the
+    first logged price. Orders are filled at that price against a simulated
+    account, like `PracticeAuthenticator` does.
+
+    Run a `Trader` with the same clock to replay the log at the speed of its
+    cycles. The trader stops by itself at the first cycle after the last price
+    was served:
+
+        auth = ReplayAuthenticator('prices.log', 1000, 'XBT', 'USD')
+        trader = Trader('replay', auth, algorithm, clock=auth.clock)
+        trader.begin_trading()
+        auth.finished.wait()
+    """
+
+    def __init__(self, samples, starting_balance, target_currency,
+                 account_currency, clock=None, cache=None):
+        """
+        Parameters
+        ----------
+        samples: string or list of PriceSample
+            The path to a price log, or the samples to replay in any order.
+            Samples of other currency pairs are skipped.
+
+        starting_balance: float
+            The simulated balance of `account_currency`
+
+        target_currency: string
+            The currency being traded for, e.g. XBT
+
+        account_currency: string
+            The currency used for purchasing, e.g. USD
+
+        clock: `VirtualClock` or None
+            The clock that decides which price is current. Its `epoch` is set
+            to the first price if it has none. Defaults to a new clock.
+
+        cache: instance of `PriceLogCache` or None
+            If given, a price log is loaded from this cache instead of being
+            parsed again
+
+        Raises
+        ------
+        ValueError
+            If there are no samples of the currency pair to replay
+        """
+        super().__init__(starting_balance, target_currency, account_currency)
+        if isinstance(samples, str):
+            if cache is not None:
+                samples = cache.read_price_history(samples)
+            else:
+                samples = read_price_history(samples)
+        samples = [sample for sample in samples
+                   if sample.currency == target_currency and
+                   sample.price_currency == account_currency]
+        if not samples:
+            raise ValueError('No %s %s prices to replay' %
+                             (target_currency, account_currency))
+
+        self.samples = sorted(samples, key=lambda sample: sample.date)
+        self._dates = [sample.date for sample in self.samples]
+        self.clock = clock if clock is not None else VirtualClock()
+        if self.clock.epoch is None:
+            self.clock.epoch = self._dates[0]
+        self.finished = threading.Event()
+
+    def _connect(self, transport):
+        # Prices come from the log, so the market is never queried
+        return None
+
+    def get_current_price(self):
+        if self.finished.is_set():
+            raise ReplayFinished('All %s prices have been replayed' %
+                                 len(self.samples))
+        i = bisect.bisect_right(self._dates, self.clock.datetime()) - 1
+        price = self.samples[max(i, 0)]
+        if i >= len(self.samples) - 1:
+            self.finished.set()
+        self.last_price = price
+        return price
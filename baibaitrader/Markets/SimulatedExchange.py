@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+An in-process simulated market shared by many practice accounts. One price
+feed and one optional order book serve every account, balances are kept in
+numpy arrays indexed by account id, and orders are matched in a batch on every
+tick, so thousands of simulated traders can run in one process against the
+same consistent market.
+"""
+import datetime
+import threading
+
+import numpy as np
+
+from .Authenticator import Authenticator
+from ..PriceSample import PriceSample
+
+BUY = 'buy'
+SELL = 'sell'
+
+
+class SimulatedOrder:
+    """
+    A market order waiting for the next tick. `done` is set once it has been
+    filled, in which case `price` is the fill price, or rejected or
+    cancelled, in which case `error` holds a ValueError.
+    """
+
+    def __init__(self, account, side, volume, exchange=None):
+        self.account = account
+        self.side = side
+        self.volume = volume
+        self.price = None
+        self.error = None
+        self.done = threading.Event()
+        self._exchange = exchange
+
+    def cancel(self):
+        """
+        Take the order off the market if it hasn't been matched yet
+
+        Returns
+        -------
+        cancelled: boolean
+            False if the order was already matched
+        """
+        return self._exchange is not None and self._exchange.cancel(self)
+
+    def wait(self, timeout=None):
+        """
+        Block until the order was matched. If it isn't matched in time, it is
+        cancelled, so it can't be filled after the caller gave up on it.
+
+        Raises
+        ------
+        ValueError
+            If the order was rejected
+
+        TimeoutError
+            If it wasn't matched within `timeout` seconds and was cancelled
+        """
+        if not self.done.wait(timeout):
+            if self._exchange is None or self.cancel():
+                raise TimeoutError('Order was not matched in time')
+            # Matched while it was being cancelled, and about to be done
+            self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.price
+
+
+class SimulatedExchange:
+    """
+    A thread-safe market for a single currency pair. Prices come from `tick`,
+    which also fills every order submitted since the previous tick at that
+    tick's price. Accounts are rows of a ledger of balances and holdings.
+    """
+
+    def __init__(self, target_currency, account_currency, order_book=None,
+                 capacity=1024):
+        """
+        Parameters
+        ----------
+        target_currency: string
+            The currency being traded for, e.g. XBT
+
+        account_currency: string
+            The currency used for purchasing, e.g. USD
+
+        order_book: instance of `OrderBook` or None
+            A typical order book of the market, used as a liquidity profile.
+            If given, all buys of a tick are filled together at the price
+            their total volume would get against a book of that shape around
+            the tick's price, and so are all sells. If None, every order is
+            filled at the tick's price.
+
+        capacity: int
+            The number of accounts room is made for up front. The ledger
+            grows as needed.
+        """
+        self._target_currency = target_currency
+        self._account_currency = account_currency
+        self.order_book = order_book
+        self.last_price = None
+        self.n_ticks = 0
+        self.n_filled = 0
+        self.n_rejected = 0
+        self.n_cancelled = 0
+        self._balances = np.zeros(max(int(capacity), 1), dtype=np.float64)
+        self._holdings = np.zeros_like(self._balances)
+        self._n_accounts = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def target_currency(self):
+        return self._target_currency
+
+    def price_currency(self):
+        return self._account_currency
+
+    @property
+    def n_accounts(self):
+        return self._n_accounts
+
+    def open_account(self, balance, holdings=0.0):
+        """
+        Add an account to the ledger
+
+        Returns
+        -------
+        account: int
+            The id of the new account
+        """
+        if balance < 0 or holdings < 0:
+            raise ValueError('An account cannot start in debt')
+        with self._lock:
+            account = self._n_accounts
+            if account == len(self._balances):
+                self._balances = np.concatenate(
+                    [self._balances, np.zeros_like(self._balances)])
+                self._holdings = np.concatenate(
+                    [self._holdings, np.zeros_like(self._holdings)])
+            self._balances[account] = balance
+            self._holdings[account] = holdings
+            self._n_accounts += 1
+            return account
+
+    def account_state(self, account):
+        """
+        Returns
+        -------
+        balance, holdings: float
+            The state of one account
+        """
+        with self._lock:
+            self._check_account(account)
+            return (float(self._balances[account]),
+                    float(self._holdings[account]))
+
+    def ledger(self):
+        """
+        Returns
+        -------
+        balances, holdings: numpy arrays
+            Copies of the state of every account, indexed by account id
+        """
+        with self._lock:
+            n = self._n_accounts
+            return self._balances[:n].copy(), self._holdings[:n].copy()
+
+    def submit(self, account, side, volume):
+        """
+        Queue a market order for the next tick
+
+        Parameters
+        ----------
+        account: int
+            The id of the account placing the order
+
+        side: 'buy' or 'sell'
+
+        volume: float
+            The number of shares, must be > 0
+
+        Returns
+        -------
+        order: `SimulatedOrder`
+
+        Raises
+        ------
+        ValueError
+            If the side, volume or account is invalid
+        """
+        if side not in (BUY, SELL):
+            raise ValueError("side must be 'buy' or 'sell'")
+        if volume <= 0:
+            raise ValueError('volume must be > 0')
+        order = SimulatedOrder(account, side, float(volume), self)
+        with self._lock:
+            self._check_account(account)
+            self._pending.append(order)
+        return order
+
+    def cancel(self, order):
+        """
+        Remove an order that is waiting for the next tick
+
+        Returns
+        -------
+        cancelled: boolean
+            False if the order was already matched
+        """
+        with self._lock:
+            try:
+                self._pending.remove(order)
+            except ValueError:
+                return False
+            self.n_cancelled += 1
+        order.error = ValueError('Order was cancelled')
+        order.done.set()
+        return True
+
+    def tick(self, price, date=None):
+        """
+        Move the market to a new price and fill the orders submitted since the
+        last tick at it. An account whose orders of this tick together need
+        more money or shares than it holds has all of them rejected.
+
+        Parameters
+        ----------
+        price: float
+            The new price
+
+        date: datetime or None
+            When the price was seen. Defaults to now.
+
+        Returns
+        -------
+        n_filled: int
+            The number of orders filled
+        """
+        if date is None:
+            date = datetime.datetime.now()
+        sample = PriceSample(float(price), date, self._target_currency,
+                             self._account_currency)
+        with self._lock:
+            self.last_price = sample
+            self.n_ticks += 1
+            orders, self._pending = self._pending, []
+            if orders:
+                self._match(orders, sample.price)
+
+        for order in orders:
+            order.done.set()
+        return sum(order.error is None for order in orders)
+
+    def _match(self, orders, price):
+        accounts = np.fromiter((order.account for order in orders),
+                               dtype=np.int64, count=len(orders))
+        volumes = np.fromiter((order.volume for order in orders),
+                              dtype=np.float64, count=len(orders))
+        buys = np.fromiter((order.side == BUY for order in orders),
+                           dtype=bool, count=len(orders))
+
+        prices = np.full(len(orders), price)
+        valid = np.ones(len(orders), dtype=bool)
+        for side, mask in ((BUY, buys), (SELL, ~buys)):
+            total = volumes[mask].sum()
+            if total == 0 or self.order_book is None:
+                continue
+            try:
+                prices[mask] = price * self.order_book.impact(side, total)
+            except ValueError:
+                valid[mask] = False
+
+        # The change every order makes, summed per account
+        signs = np.where(buys, 1.0, -1.0)
+        n = self._n_accounts
+        d_holdings = np.bincount(accounts, signs * volumes * valid,
+                                 minlength=n)
+        d_balances = np.bincount(accounts, -signs * volumes * prices * valid,
+                                 minlength=n)
+        tolerance = 1e-9
+        overdrawn = (self._balances[:n] + d_balances < -tolerance) | \
+            (self._holdings[:n] + d_holdings < -tolerance)
+        filled = valid & ~overdrawn[accounts]
+
+        d_holdings = np.bincount(accounts, signs * volumes * filled,
+                                 minlength=n)
+        d_balances = np.bincount(accounts, -signs * volumes * prices * filled,
+                                 minlength=n)
+        self._holdings[:n] += d_holdings
+        self._balances[:n] += d_balances
+
+        for order, ok, liquid, fill_price in zip(orders, filled, valid,
+                                                 prices):
+            if ok:
+                order.price = float(fill_price)
+            elif not liquid:
+                order.error = ValueError('Not enough volume in the book')
+            else:
+                order.error = ValueError('Not enough funds or shares')
+        n_filled = int(filled.sum())
+        self.n_filled += n_filled
+        self.n_rejected += len(orders) - n_filled
+
+    def _check_account(self, account):
+        if not 0 <= account < self._n_accounts:
+            raise ValueError('Unknown account %s' % account)
+
+
+class SimulatedAuthenticator(Authenticator):
+    """
+    A practice account on a `SimulatedExchange`. Prices come from the
+    exchange's last tick, and orders are queued on the exchange and filled on
+    its next tick.
+    """
+
+    def __init__(self, exchange, starting_balance, starting_holdings=0.0,
+                 wait=True, timeout=None):
+        """
+        Parameters
+        ----------
+        exchange: `SimulatedExchange`
+            The market the account trades on
+
+        starting_balance: float
+            The simulated balance of the exchange's account currency
+
+        starting_holdings: float
+            The simulated holdings of the exchange's target currency
+
+        wait: boolean (default True)
+            Make `buy` and `sell` block until the order is matched, and raise
+            ValueError if it is rejected, like a real market does. This
+            requires ticks to come from another thread. If False, they return
+            once the order is queued and the outcome is in `last_order`.
+
+        timeout: float (seconds) or None
+            How long `buy` and `sell` wait for the next tick. An order that
+            isn't matched by then is cancelled and `TimeoutError` is raised.
+        """
+        self.exchange = exchange
+        self.account = exchange.open_account(starting_balance,
+                                             starting_holdings)
+        self.wait = wait
+        self.timeout = timeout
+        self.last_order = None
+
+    def target_currency(self):
+        return self.exchange.target_currency()
+
+    def price_currency(self):
+        return self.exchange.price_currency()
+
+    def get_current_price(self):
+        price = self.exchange.last_price
+        if price is None:
+            raise RuntimeError('The market has no price yet')
+        return price
+
+    def get_account_balance(self):
+        return self.get_account_state()[0]
+
+    def get_holdings(self):
+        return self.get_account_state()[1]
+
+    def get_account_state(self):
+        return self.exchange.account_state(self.account)
+
+    def buy(self, n_shares):
+        super().buy(n_shares)
+        self._order(BUY, n_shares)
+
+    def sell(self, n_shares):
+        super().sell(n_shares)
+        self._order(SELL, n_shares)
+
+    def _order(self, side, n_shares):
+        self.last_order = self.exchange.submit(self.account, side, n_shares)
+        if self.wait:
+            self.last_order.wait(self.timeout)
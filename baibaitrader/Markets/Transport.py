@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+The HTTP transport shared by everything that talks to Kraken's REST API. All
+queries go through one pooled keep-alive session, so traders reuse connections
+instead of each paying for their own TLS handshakes, and transient failures are
+retried with jittered exponential backoff.
+"""
+import time
+import random
+import threading
+import krakenex
+import requests
+from requests.adapters import HTTPAdapter
+
+from .RateGovernor import RateGovernor
+
+KRAKEN_URL = 'https://api.kraken.com'
+
+# Queries that must not be sent twice, because a request that failed on our
+# side may still have reached the exchange
+NON_IDEMPOTENT = frozenset(['AddOrder', 'EditOrder', 'CancelOrder',
+                            'CancelAll', 'Withdraw', 'WalletTransfer'])
+
+# The errors Kraken returns once its call counter, or the limit on requests
+# from one address, is exceeded
+RATE_LIMIT_ERRORS = frozenset(['EAPI:Rate limit exceeded',
+                               'EGeneral:Too many requests'])
+
+# HTTP status codes worth trying again
+RETRY_STATUS = frozenset([429, 500, 502, 503, 504])
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def default_transport():
+    """
+    The transport shared by all authenticators that are not given one of
+    their own. It is created on first use, with a `RateGovernor` that keeps
+    the whole process within Kraken's rate limit.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport(governor=RateGovernor())
+        return _transport
+
+
+class Transport:
+    """
+    A pooled `requests.Session` plus the policy for using it: how long each
+    endpoint may take and how failed queries are retried.
+    """
+
+    def __init__(self, base_url=KRAKEN_URL, pool_connections=4,
+                 pool_maxsize=16, retries=3, backoff=0.25, max_backoff=8.0,
+                 timeout=10.0, timeouts=None, governor=None,
+                 sleep=time.sleep, cassette=None):
+        """
+        Parameters
+        ----------
+        base_url: string
+            Where queries are sent. Point this at a local stand-in server for
+            testing.
+
+        pool_connections: int
+            The number of hosts connections are kept open to
+
+        pool_maxsize: int
+            The maximum number of open connections per host. Threads that need
+            a connection while all of them are in use wait for one.
+
+        retries: int
+            How often a query that failed with a connection error, a timeout
+            or a 429/5xx status is tried again. Queries that place or cancel
+            orders are never retried.
+
+        backoff: float (seconds)
+            The base of the exponential backoff. Before retry `n` (counting
+            from 0) a random delay between 0 and `backoff * 2**n` is waited.
+
+        max_backoff: float (seconds)
+            The longest delay before a retry
+
+        timeout: float (seconds)
+            The timeout of endpoints not listed in `timeouts`
+
+        timeouts: dict or None
+            Maps API method names, e.g. 'Depth' or 'AddOrder', to timeouts
+
+        governor: `RateGovernor` or None
+            If given, every query, including retries, first waits for the
+            governor to admit it
+
+        sleep: callable
+            Waits for the given number of seconds between retries
+
+        cassette: `Cassette` or None
+            If given, the HTTP traffic is recorded to the cassette, or answered
+            from it instead of the network, depending on its mode. Retries and
+            the governor work the same either way.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.timeout = float(timeout)
+        self.timeouts = dict(timeouts or {})
+        self.governor = governor
+        self.sleep = sleep
+        self.cassette = cassette
+        self.n_retries = 0
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            {'User-Agent': 'krakenex/' + krakenex.version.__version__})
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize, pool_block=True)
+        if cassette is not None:
+            adapter = cassette.adapter(adapter)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def api(self, key_file=None):
+        """
+        Create a `krakenex.API` that queries through this transport
+
+        Parameters
+        ----------
+        key_file: string or None
+            A key file to load, see `krakenex.API.load_key`
+        """
+        api = KrakenAPI(self)
+        if key_file is not None:
+            api.load_key(key_file)
+        return api
+
+    def timeout_for(self, method):
+        """
+        The timeout in seconds of an API method such as 'Depth'
+        """
+        return self.timeouts.get(method, self.timeout)
+
+    def backoff_delay(self, attempt):
+        """
+        The randomised delay before retry number `attempt`, counting from 0
+        """
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def close(self):
+        self.session.close()
+        if self.cassette is not None:
+            self.cassette.close()
+
+
+class KrakenAPI(krakenex.API):
+    """
+    A `krakenex.API` that sends its queries through a shared `Transport`
+    instead of opening its own session
+    """
+
+    def __init__(self, transport, key='', secret=''):
+        super().__init__(key, secret)
+        self.session.close()
+        self.session = transport.session
+        self.uri = transport.base_url
+        self.transport = transport
+
+    def _query(self, urlpath, data, headers=None, timeout=None):
+        transport = self.transport
+        method = urlpath.rsplit('/', 1)[-1]
+        if timeout is None:
+            timeout = transport.timeout_for(method)
+        retries = 0 if method in NON_IDEMPOTENT else transport.retries
+        governor = transport.governor
+        private = '/private/' in urlpath
+
+        attempt = 0
+        while True:
+            if governor is not None:
+                governor.admit(method, private)
+            if private and (attempt > 0 or governor is not None):
+                # Kraken rejects nonces lower than one it has already seen,
+                # which a query sent by another thread while this one waited
+                # or backed off may have used
+                data['nonce'] = max(self._nonce(), data['nonce'] + 1)
+                headers['API-Sign'] = self._sign(data, urlpath)
+            try:
+                response = super()._query(urlpath, data, headers, timeout)
+                if governor is not None and \
+                        RATE_LIMIT_ERRORS.intersection(
+                            response.get('error', [])):
+                    governor.penalize(private)
+                return response
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except requests.HTTPError as e:
+                if e.response is None or \
+                        e.response.status_code not in RETRY_STATUS:
+                    raise
+                error = e
+
+            if attempt >= retries:
+                raise error
+            transport.sleep(transport.backoff_delay(attempt))
+            transport.n_retries += 1
+            attempt += 1
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A worker that places orders on its own thread, so that a slow exchange never
+holds up fetching prices and making decisions.
+"""
+import queue
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+_STOP = object()
+
+
+class OrderWorker:
+    """
+    Runs submitted orders one at a time, in the order they were submitted, and
+    reports the outcome of each to its completion callbacks. At most
+    `max_pending` orders wait in the queue; submitting more fails immediately
+    instead of blocking the caller.
+    """
+
+    def __init__(self, max_pending=16, timeout=30.0, max_workers=2,
+                 on_error=None, name='OrderWorker'):
+        """
+        Parameters
+        ----------
+        max_pending: int
+            How many orders may wait to be placed
+
+        timeout: float (seconds)
+            How long the worker waits for an order before moving on to the
+            next one. An order that hasn't started by then is cancelled and
+            reported as failed with a `TimeoutError`. An order that is already
+            being placed can't be cancelled; it is reported as overdue, and its
+            outcome is reported when it returns.
+
+        max_workers: int
+            The threads the orders are run on. An order that overran its
+            timeout keeps its thread until it returns, so more than one thread
+            lets the next order go ahead.
+
+        on_error: callable or None
+            Called with the exception if a completion callback raises. If
+            None, the exception is ignored.
+
+        name: string
+            The name of the worker thread
+        """
+        if max_pending <= 0:
+            raise ValueError('max_pending must be > 0')
+        if timeout <= 0:
+            raise ValueError('timeout must be > 0')
+
+        self.timeout = float(timeout)
+        self.on_error = on_error
+        self.name = name
+        self.n_completed = 0
+        self.n_failed = 0
+        self.n_timed_out = 0
+        self.n_overdue = 0
+        self._queue = queue.Queue(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix=name)
+        self._thread = None
+
+    def start(self):
+        """
+        Start placing submitted orders. Does nothing if already started.
+        """
+        if self.is_running:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name,
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker once every order submitted so far has completed
+        """
+        if not self.is_running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pending(self):
+        """
+        The number of orders waiting to be placed
+        """
+        return self._queue.qsize()
+
+    def submit(self, order, *args, on_success=None, on_failure=None,
+               on_timeout=None):
+        """
+        Queue an order and return immediately
+
+        Parameters
+        ----------
+        order: callable
+            Places the order, for example `authenticator.buy`. Called with
+            `args` on a worker thread.
+
+        on_success: callable or None
+            Called on the worker thread with the return value of `order`
+
+        on_failure: callable or None
+            Called on the worker thread with the exception raised by `order`,
+            or a `TimeoutError` if it was cancelled because it didn't start
+            within `timeout`
+
+        on_timeout: callable or None
+            Called on the worker thread with a `TimeoutError` if the order is
+            still being placed after `timeout`. `on_success` or `on_failure`
+            is still called once it returns.
+
+        Raises
+        ------
+        queue.Full
+            If `max_pending` orders are already waiting
+        """
+        self._queue.put_nowait(
+            (order, args, on_success, on_failure, on_timeout))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            order, args, on_success, on_failure, on_timeout = item
+
+            future = self._executor.submit(order, *args)
+            try:
+                future.exception(self.timeout)
+            except FutureTimeoutError:
+                if future.cancel():
+                    self.n_timed_out += 1
+                    self.n_failed += 1
+                    self._notify(on_failure, TimeoutError(
+                        'Order did not start within %s seconds' %
+                        self.timeout))
+                else:
+                    # The order is being placed and may still reach the
+                    # market, so its outcome is reported once it returns
+                    self.n_overdue += 1
+                    self._notify(on_timeout, TimeoutError(
+                        'Order did not return within %s seconds' %
+                        self.timeout))
+                    future.add_done_callback(partial(
+                        self._finish, on_success=on_success,
+                        on_failure=on_failure))
+                continue
+            self._finish(future, on_success, on_failure)
+
+    def _finish(self, future, on_success, on_failure):
+        try:
+            result = future.result()
+        except Exception as e:
+            self.n_failed += 1
+            self._notify(on_failure, e)
+        else:
+            self.n_completed += 1
+            self._notify(on_success, result)
+
+    def _notify(self, callback, value):
+        if callback is None:
+            return
+        try:
+            callback(value)
+        except Exception as e:
+            if self.on_error is not None:
+                self.on_error(e)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A class that retroactively runs several algorithms, each on the price log of its
+own pair, against a single shared account balance. This shows how a group of
+traders drawing on the same fiat balance would have performed together.
+"""
+import heapq
+from .TransationRecord import TransationRecord
+from .PriceSample import PriceSample
+from .utils import iter_price_history
+
+
+class PortfolioValidator:
+
+    def __init__(self, pairs, balance, cache=None, chunk_size=4096):
+        """
+        Parameters
+        ----------
+        pairs: list of (string, Algorithm, float)
+            One `(logfile, algorithm, holdings)` tuple per traded pair: the
+            price log to replay, the algorithm deciding when to trade that
+            pair, and the number of coins held at the start.
+
+        balance: float
+            The shared account balance at the start of the simulation
+
+        cache: instance of `PriceLogCache` or None
+            If given, logs are read from memory mapped cache entries instead of
+            being parsed line by line.
+
+        chunk_size: int
+            How many samples are converted from a cache entry at a time
+        """
+        self.logfiles = [pair[0] for pair in pairs]
+        self.algorithms = [pair[1] for pair in pairs]
+        self.holdings = [pair[2] for pair in pairs]
+        self.balance = balance
+        self.cache = cache
+        self.chunk_size = int(chunk_size)
+        self.buys = []
+        self.sells = []
+        self.rejected = []
+        self.balance_history = []
+        self.holdings_history = [[] for _ in pairs]
+
+    def merged_samples(self):
+        """
+        Merge the price logs of all pairs into one chronological stream. The
+        logs are read lazily and merged with a k-way heap merge, so only one
+        pending sample per pair is held in memory at a time.
+
+        Yields
+        ------
+        (index, sample): (int, PriceSample)
+            The index of the pair in `pairs` and its next price sample
+        """
+        streams = [self._stream(i) for i in range(len(self.logfiles))]
+        return heapq.merge(*streams, key=lambda item: item[1].date)
+
+    def simulate_trading(self):
+        """
+        Replay every pair's log in chronological order. Each algorithm only
+        sees the prices of its own pair, but buys are paid from and sells are
+        credited to the shared balance. Orders the account can't cover are
+        recorded in `rejected` instead of being filled.
+        """
+        self.buys = []
+        self.sells = []
+        self.rejected = []
+        self.balance_history = []
+        self.holdings_history = [[] for _ in self.logfiles]
+
+        for i, sample in self.merged_samples():
+            if not self.balance_history:
+                self._update_history(None, sample.date)
+
+            algorithm = self.algorithms[i]
+            algorithm.process_data([sample])
+            if algorithm.check_should_buy():
+                volume = algorithm.determine_buy_volume(
+                    sample, self.holdings[i], self.balance)
+                self._fill(i, 'buy', sample, volume)
+            elif algorithm.check_should_sell():
+                volume = algorithm.determine_sell_volume(
+                    sample, self.holdings[i], self.balance)
+                self._fill(i, 'sell', sample, volume)
+
+    def _fill(self, i, side, sample, volume):
+        if not volume or volume <= 0:
+            return
+
+        total = sample.price * volume
+        record = TransationRecord(side, sample.date, sample.currency,
+                                  sample.price, volume, total,
+                                  sample.price_currency)
+        if side == 'buy' and total > self.balance:
+            self.rejected.append(record)
+            return
+        if side == 'sell' and volume > self.holdings[i]:
+            self.rejected.append(record)
+            return
+
+        if side == 'buy':
+            self.holdings[i] += volume
+            self.balance -= total
+            self.buys.append(record)
+        else:
+            self.holdings[i] -= volume
+            self.balance += total
+            self.sells.append(record)
+        self._update_history(i, sample.date)
+
+    def _stream(self, i):
+        if self.cache is None:
+            for sample in iter_price_history(self.logfiles[i]):
+                yield i, sample
+            return
+
+        dates, prices, pair_index, pairs = self.cache.load(self.logfiles[i])
+        for start in range(0, len(prices), self.chunk_size):
+            stop = start + self.chunk_size
+            for price, date, pair in zip(prices[start:stop].tolist(),
+                                         dates[start:stop].tolist(),
+                                         pair_index[start:stop].tolist()):
+                yield i, PriceSample(price, date, pairs[pair][0],
+                                     pairs[pair][1])
+
+    def _update_history(self, i, date):
+        """
+        Record the balance and the holdings of pair `i`, or of every pair if
+        `i` is None
+        """
+        self.balance_history.append((self.balance, date))
+        indexes = range(len(self.holdings)) if i is None else [i]
+        for index in indexes:
+            self.holdings_history[index].append((self.holdings[index], date))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This file contains the declaration for a data structure that summarizes the
+price of a currency over a period of time
+"""
+from collections import namedtuple
+
+"""
+An immutable tuple holding the open, high, low and close (OHLC) prices of a
+currency over a fixed interval
+
+Parameters
+----------
+    open: float
+        The first price seen during the interval
+
+    high: float
+        The highest price seen during the interval
+
+    low: float
+        The lowest price seen during the interval
+
+    close: float
+        The last price seen during the interval
+
+    date: datetime
+        The time at which the closing price was recorded
+
+    currency: string
+        The ticker symbol for currency in question, e.g. BTC for Bitcoin.
+
+    price_currency: string
+        The symbol for currency the price is given in, e.g. USD or JPY
+"""
+PriceBar = namedtuple("PriceBar",
+                      "open high low close date currency price_currency")
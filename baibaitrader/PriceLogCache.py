@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A persistent cache for parsed price logs. Parsing a large text log line by line
+is slow, so the parsed dates and prices are stored on disk as numpy arrays and
+memory mapped the next time the same, unchanged log is read.
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from collections.abc import Sequence
+import numpy as np
+
+from .PriceSample import PriceSample
+from .utils import iter_price_history
+
+
+class PriceHistory(Sequence):
+    """
+    A read-only list of `PriceSample` backed by the arrays of a cache entry.
+    Samples are only created when they are accessed, so opening a log costs
+    the same however long it is. Like `read_price_history`, the first element
+    is the most recent sample.
+    """
+
+    chunk_size = 4096
+
+    def __init__(self, dates, prices, pair_index, pairs):
+        """
+        Parameters
+        ----------
+        dates, prices, pair_index, pairs:
+            The arrays returned by `PriceLogCache.load`, oldest sample first
+        """
+        self._dates = dates
+        self._prices = prices
+        self._pair_index = pair_index
+        self._pairs = pairs
+
+    def __len__(self):
+        return len(self._prices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('PriceHistory index out of range')
+        i = n - 1 - index
+        currency, price_currency = self._pairs[self._pair_index[i]]
+        return PriceSample(float(self._prices[i]), self._dates[i].item(),
+                           currency, price_currency)
+
+    def __iter__(self):
+        # Convert a chunk of the arrays at a time, newest chunk first
+        for stop in range(len(self), 0, -self.chunk_size):
+            start = max(stop - self.chunk_size, 0)
+            for price, date, pair in zip(
+                    self._prices[start:stop][::-1].tolist(),
+                    self._dates[start:stop][::-1].tolist(),
+                    self._pair_index[start:stop][::-1].tolist()):
+                yield PriceSample(price, date, *self._pairs[pair])
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and \
+            all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<PriceHistory of %d samples>' % len(self)
+
+    def arrays(self):
+        """
+        The dates and prices of the samples as numpy arrays, in the same order
+        as the samples. No `PriceSample` objects are created.
+
+        Returns
+        -------
+        dates: numpy array of datetime64[us]
+
+        prices: numpy array of float64
+        """
+        return self._dates[::-1], self._prices[::-1]
+
+    def select(self, currency=None, price_currency=None, after_date=None):
+        """
+        The samples of one currency pair, or newer than a date, as another
+        `PriceHistory`. The filtering is done on the arrays.
+
+        Parameters
+        ----------
+        currency, price_currency: string or None
+            Only keep samples of this pair. None keeps every pair.
+
+        after_date: datetime or None
+            Only keep samples from this date on, like
+            `utils.read_price_history`
+
+        Returns
+        -------
+        history: PriceHistory
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if currency is not None or price_currency is not None:
+            keep = [i for i, (c, p) in enumerate(self._pairs)
+                    if currency in (None, c) and price_currency in (None, p)]
+            mask &= np.isin(self._pair_index, keep)
+        if after_date is not None:
+            mask &= self._dates >= np.datetime64(after_date, 'us')
+        return PriceHistory(self._dates[mask], self._prices[mask],
+                            self._pair_index[mask], self._pairs)
+
+
+class PriceLogCache:
+    """
+    Stores the parsed contents of price logs under `cache_dir`. Each entry is a
+    directory holding `.npy` arrays for the dates, prices and currency pairs of
+    a single log, keyed by a fingerprint of the log's path, size, modification
+    time and a hash of its first and last bytes. When the total size of the
+    cache grows past `max_bytes`, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir=os.path.join('log_files', 'price_cache'),
+                 max_bytes=512 * 1024 * 1024, hash_bytes=64 * 1024):
+        """
+        Parameters
+        ----------
+        cache_dir: string
+            The folder cache entries are written to. It is created if it does
+            not exist yet.
+
+        max_bytes: int
+            The maximum total size of all cache entries in bytes. Defaults to
+            512 MiB.
+
+        hash_bytes: int
+            The number of bytes read from both the head and the tail of a log
+            when fingerprinting it.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.hash_bytes = int(hash_bytes)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def fingerprint(self, log_file):
+        """
+        Build the key used to look up a log in the cache
+
+        Parameters
+        ----------
+        log_file: string
+            Path to the log file
+
+        Returns
+        -------
+        key: string
+            A hex digest that changes whenever the log's path, size,
+            modification time, head or tail change
+        """
+        stat = os.stat(log_file)
+        digest = hashlib.sha1()
+        digest.update(os.path.abspath(log_file).encode('utf-8'))
+        digest.update(('%d:%d' % (stat.st_size, stat.st_mtime_ns)).encode())
+        with open(log_file, 'rb') as f:
+            digest.update(f.read(self.hash_bytes))
+            if stat.st_size > self.hash_bytes:
+                f.seek(max(stat.st_size - self.hash_bytes, self.hash_bytes))
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def load(self, log_file):
+        """
+        Get the parsed contents of a log, parsing and storing it first if it is
+        not cached yet.
+
+        Parameters
+        ----------
+        log_file: string
+            Path to the log file
+
+        Returns
+        -------
+        dates: numpy array of datetime64[us]
+            The date of every sample in chronological order
+
+        prices: numpy array of float64
+            The price of every sample
+
+        pair_index: numpy array of uint16
+            For every sample, an index into `pairs`
+
+        pairs: list of (string, string)
+            The distinct (currency, price_currency) pairs in the log
+        """
+        key = self.fingerprint(log_file)
+        entry = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry):
+            self._store(log_file, key)
+        else:
+            os.utime(entry)
+        return self._read_entry(entry)
+
+    def read_price_history(self, log_file):
+        """
+        A cached equivalent of `utils.read_price_history` without the optional
+        filters.
+
+        Parameters
+        ----------
+        log_file: string
+            Path to the log file to read
+
+        Returns
+        -------
+        samples: PriceHistory
+            A lazy list of `PriceSample` objects with the first element being
+            the most recent data and the last element being the data furthest
+            in the past. Use `PriceHistory.arrays` to work on the prices
+            without creating a sample for each of them.
+        """
+        return PriceHistory(*self.load(log_file))
+
+    def clear(self):
+        """
+        Remove every entry from the cache
+        """
+        for name in os.listdir(self.cache_dir):
+            shutil.rmtree(os.path.join(self.cache_dir, name),
+                          ignore_errors=True)
+
+    def _store(self, log_file, key):
+        dates = []
+        prices = []
+        pair_index = []
+        pairs = {}
+        for sample in iter_price_history(log_file):
+            pair = (sample.currency, sample.price_currency)
+            dates.append(sample.date)
+            prices.append(sample.price)
+            pair_index.append(pairs.setdefault(pair, len(pairs)))
+
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        np.save(os.path.join(tmp, 'dates.npy'),
+                np.array(dates, dtype='datetime64[us]'))
+        np.save(os.path.join(tmp, 'prices.npy'),
+                np.array(prices, dtype=np.float64))
+        np.save(os.path.join(tmp, 'pairs.npy'),
+                np.array(pair_index, dtype=np.uint16))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'path': os.path.abspath(log_file),
+                       'count': len(prices),
+                       'pairs': sorted(pairs, key=pairs.get)}, f)
+
+        try:
+            os.rename(tmp, os.path.join(self.cache_dir, key))
+        except OSError:
+            # Another process stored the same log first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._evict(keep=key, path=os.path.abspath(log_file))
+
+    def _read_entry(self, entry):
+        with open(os.path.join(entry, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        # Zero length files can't be memory mapped
+        mmap_mode = 'r' if meta['count'] > 0 else None
+        dates = np.load(os.path.join(entry, 'dates.npy'), mmap_mode=mmap_mode)
+        prices = np.load(os.path.join(entry, 'prices.npy'),
+                         mmap_mode=mmap_mode)
+        pair_index = np.load(os.path.join(entry, 'pairs.npy'),
+                             mmap_mode=mmap_mode)
+        pairs = [tuple(pair) for pair in meta['pairs']]
+        return dates, prices, pair_index, pairs
+
+    def _evict(self, keep, path):
+        """
+        Drop outdated entries for `path`, then remove the least recently used
+        entries until the cache fits in `max_bytes`
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            if name != keep and self._entry_path(entry) == path:
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, f))
+                       for f in os.listdir(entry))
+            entries.append((os.path.getmtime(entry), name, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name),
+                          ignore_errors=True)
+            total -= size
+
+    def _entry_path(self, entry):
+        try:
+            with open(os.path.join(entry, 'meta.json'), 'r') as f:
+                return json.load(f)['path']
+        except (OSError, ValueError, KeyError):
+            return None
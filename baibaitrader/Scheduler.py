@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A scheduler that repeatedly calls a function on a fixed time grid from a single
+long lived thread.
+"""
+import time
+import threading
+
+
+class Scheduler:
+    """
+    Calls `callback` every `interval` seconds. Deadlines are computed from the
+    time the scheduler was started using a monotonic clock, so the time spent
+    in `callback` does not make later calls drift. A call that finishes after
+    the next deadline is an overrun, which is handled according to `overrun`.
+    """
+
+    SKIP = 'skip'
+    CATCH_UP = 'catch_up'
+
+    def __init__(self, interval, callback, overrun=SKIP, on_overrun=None,
+                 on_error=None, spin=0.001, clock=time.monotonic,
+                 name='Scheduler', daemon=False, sleep=None):
+        """
+        Parameters
+        ----------
+        interval: float (seconds)
+            The time between two consecutive deadlines. The `interval`
+            attribute may be changed while the scheduler is running and is
+            used from the next deadline on.
+
+        callback: callable
+            Called without arguments at every deadline
+
+        overrun: 'skip' or 'catch_up'
+            What to do with deadlines that passed while `callback` was still
+            running. 'skip' drops them and continues with the next deadline in
+            the future. 'catch_up' calls `callback` once for every missed
+            deadline, back to back, until the schedule is met again.
+
+        on_overrun: callable or None
+            Called with the number of missed deadlines whenever an overrun
+            happens
+
+        on_error: callable or None
+            Called with the exception if `callback` raises. If None, the
+            exception stops the scheduler.
+
+        spin: float (seconds)
+            The final stretch before each deadline is busy waited instead of
+            slept, which keeps the jitter of each call in the microsecond
+            range. Set to 0 to never busy wait.
+
+        clock: callable
+            Returns the current time in seconds. Must be monotonic.
+
+        name: string
+            The name of the scheduler thread
+
+        daemon: boolean (default False)
+            Whether the scheduler thread is a daemon thread. By default a
+            running scheduler keeps the interpreter alive, like a script that
+            only starts a `Trader` expects.
+
+        sleep: callable or None
+            Called with the number of seconds left until the next deadline
+            instead of waiting for them to pass, e.g. `VirtualClock.sleep`. It
+            must advance `clock`. `spin` is not used with a custom sleep.
+        """
+        if interval <= 0:
+            raise ValueError('interval must be > 0')
+        if overrun not in (self.SKIP, self.CATCH_UP):
+            raise ValueError("overrun must be 'skip' or 'catch_up'")
+
+        self.interval = float(interval)
+        self.callback = callback
+        self.overrun = overrun
+        self.on_overrun = on_overrun
+        self.on_error = on_error
+        self.spin = float(spin)
+        self.clock = clock
+        self.name = name
+        self.daemon = daemon
+        self.sleep = sleep
+        self.n_cycles = 0
+        self.n_overruns = 0
+        self.n_missed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, delay=0.0):
+        """
+        Start calling `callback`, the first time after `delay` seconds
+
+        Raises
+        ------
+        RuntimeError
+            If the scheduler is already running
+        """
+        if self.is_running:
+            raise RuntimeError('Scheduler is already running')
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(delay,),
+                                        name=self.name,
+                                        daemon=self.daemon)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the scheduler. A call to `callback` that is in progress is allowed
+        to finish; this blocks until it has, unless called from the scheduler
+        thread itself.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self, delay):
+        deadline = self.clock() + delay
+        catching_up = False
+        while self._wait_until(deadline):
+            try:
+                self.callback()
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(e)
+            self.n_cycles += 1
+
+            deadline += self.interval
+            now = self.clock()
+            if now <= deadline:
+                catching_up = False
+            elif not catching_up:
+                missed = int((now - deadline) // self.interval) + 1
+                self.n_overruns += 1
+                self.n_missed += missed
+                if self.overrun == self.SKIP:
+                    deadline += missed * self.interval
+                else:
+                    catching_up = True
+                if self.on_overrun is not None:
+                    self.on_overrun(missed)
+
+    def _wait_until(self, deadline):
+        """
+        Block until `deadline`. Returns False if the scheduler was stopped in
+        the meantime.
+        """
+        while not self._stop.is_set():
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return True
+            if self.sleep is not None:
+                self.sleep(remaining)
+            elif remaining > self.spin:
+                self._stop.wait(remaining - self.spin)
+        return False
@@ -8,13 +8,13 @@ import time
 import subprocess
 import select
 import threading
-from websocket_server import WebsocketServer
 from baibaitrader.utils import build_logger
 
 
 class TickerServer:
 
     def __init__(self, filepath):
+        from websocket_server import WebsocketServer
         self._log = build_logger('server_log', 'server_log.log')
         self.watched_file = filepath
         self._server = WebsocketServer(3000, host='127.0.0.1')
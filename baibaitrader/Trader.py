@@ -4,8 +4,16 @@
 Implementation for an automated trader that operates on a single market and 
 currency.
 """
+import os
+import time
+import queue
 import threading
-from .utils import build_logger
+from datetime import datetime, timedelta
+from .Scheduler import Scheduler
+from .Markets.PriceStream import CoalescingDispatcher
+from .Markets.ReplayAuthenticator import ReplayFinished
+from .Instrumentation import REGISTRY
+from .utils import build_logger, log_path, read_price_history
 
 
 class Trader:
@@ -17,7 +25,10 @@ class Trader:
     """
 
     def __init__(self, name, authenticator, algorithm,
-                 update_interval=300.0, output_console=True):
+                 update_interval=300.0, output_console=True,
+                 overrun=Scheduler.SKIP, account_ttl=5.0, metrics=REGISTRY,
+                 order_worker=None, interval_policy=None,
+                 timestamp_precision='s', clock=None):
         """
         Create a new `Trader` with a specific `Authenticator` and `Algorithm`
 
@@ -43,50 +54,276 @@ class Trader:
         output_console: boolean (default True)
             Determines if logs will be printed to the console in addition to 
             written to disk. Making this False is nice for unit testing.
+
+        overrun: 'skip' or 'catch_up' (default 'skip')
+            What to do when a cycle takes longer than `update_interval`. With
+            'skip' the cycles that should have started in the meantime are
+            dropped, with 'catch_up' they are run back to back. Either way the
+            overrun is logged.
+
+        account_ttl: float (seconds)
+            How long a snapshot of the account balance and holdings is reused
+            before it is fetched again. The snapshot is discarded whenever an
+            order may have changed the account. Set to 0 to fetch it for every
+            order.
+
+        metrics: `MetricsRegistry`
+            Where the trader records how long each stage of a cycle takes, and
+            counts failures, skipped cycles and overruns. Serve it with a
+            `MetricsServer` to have Prometheus scrape it.
+
+        order_worker: `OrderWorker` or None
+            If given, buy and sell orders are queued on the worker instead of
+            being placed on the trading thread, so a slow exchange doesn't
+            delay the next cycle. The worker may be shared between traders and
+            must be started by the caller. Completed orders are logged and
+            reported to the algorithm from the worker's thread. While one of
+            the trader's orders is in flight, no further orders are placed. An
+            order that is still being placed after the worker's timeout is
+            reported as failed with a `TimeoutError`, and no longer holds up
+            new orders; should it go through after all, it is still logged and
+            reported as filled.
+
+        interval_policy: `VolatilityAdaptiveInterval` or None
+            If given, the policy picks a new `update_interval` after every
+            price, e.g. to poll more often while the market is volatile. The
+            current interval is exported as the `baibai_update_interval_seconds`
+            gauge.
+
+        timestamp_precision: 's', 'ms' or 'us' (default 's')
+            The precision of the timestamps in the trader's logs. Use 'ms' or
+            'us' when polling more than once a second, so that every price in
+            the price log keeps its own time.
+
+        clock: `VirtualClock` or None
+            If given, cycles are scheduled on this clock instead of the real
+            one and the trader never sleeps: the clock jumps straight to the
+            next cycle. Use it with a `ReplayAuthenticator` sharing the same
+            clock to replay a price log faster than real time. The trader's
+            logs are then written to '<name>_replay_*.log' files instead of
+            its regular ones, dated with the clock's time, and the trader
+            stops once the replay raises `ReplayFinished`.
         """
         self.name = name
         self.authenticator = authenticator
         self.algorithm = algorithm
         self.update_interval = float(update_interval)
         self.is_running = False
-        self._thread = None
+        self.overrun = overrun
+        self._scheduler = None
+        self._stream = None
+        self._dispatcher = None
+        self.account_ttl = float(account_ttl)
+        self._account_snapshot = None
+        self.order_worker = order_worker
+        self._orders_in_flight = set()
+        self._orders_lock = threading.Lock()
+        self.interval_policy = interval_policy
+        self.clock = clock
+        if interval_policy is not None:
+            self.update_interval = interval_policy.interval
+
+        self._stage_seconds = metrics.histogram(
+            'baibai_cycle_stage_seconds',
+            'Time spent in each stage of a trading cycle')
+        self._failures = metrics.counter(
+            'baibai_cycle_failures_total',
+            'Cycles in which fetching a price, an order or the cycle failed')
+        self._skipped = metrics.counter(
+            'baibai_skipped_cycles_total',
+            'Cycles skipped because a previous cycle overran its interval')
+        self._overruns = metrics.counter(
+            'baibai_scheduler_overruns_total',
+            'Cycles that took longer than the update interval')
+        self._interval_gauge = metrics.gauge(
+            'baibai_update_interval_seconds',
+            'The current time between two trading cycles')
+        self._interval_gauge.set(self.update_interval, trader=self.name)
+
+        # Replayed prices must not end up in the log of real ones, where a
+        # later `warm_up` would take them for market history
+        log_name = self.name if clock is None else self.name + '_replay'
+        self.price_log_file = log_path(log_name + '_price_log.log')
 
-        self.log = build_logger(self.name + 'Debug',
-                                self.name + '_debug.log',
-                                output_console=output_console)
+        self.log = build_logger(log_name + 'Debug',
+                                log_name + '_debug.log',
+                                output_console=output_console,
+                                precision=timestamp_precision, clock=clock)
 
-        self.trade_log = build_logger(self.name + 'Records',
-                                      self.name + '_trade_records.log',
-                                      output_console=output_console)
+        self.trade_log = build_logger(log_name + 'Records',
+                                      log_name + '_trade_records.log',
+                                      output_console=output_console,
+                                      precision=timestamp_precision,
+                                      clock=clock)
 
-        self.price_log = build_logger(self.name + 'Prices',
-                                      self.name + '_price_log.log',
-                                      output_console=output_console)
+        self.price_log = build_logger(log_name + 'Prices',
+                                      log_name + '_price_log.log',
+                                      output_console=output_console,
+                                      precision=timestamp_precision,
+                                      clock=clock)
 
-    def begin_trading(self):
+    def begin_trading(self, warm_up=False, warm_up_days=None):
         """
-        Begin polling the market and trading
+        Begin polling the market and trading. Cycles run on a single scheduler
+        thread, starting immediately and then every `update_interval` seconds.
+
+        Parameters
+        ----------
+        warm_up: boolean (default False)
+            Load the trader's own price log into the algorithm before the
+            first cycle, see `warm_up`
+
+        warm_up_days: float or None
+            Only load this many days of the price log. Loads all of it if None.
         """
-        self._continue_trading()
+        if warm_up:
+            self.warm_up(days=warm_up_days)
+        self._scheduler = Scheduler(self.update_interval,
+                                    self.perform_one_cycle,
+                                    overrun=self.overrun,
+                                    on_overrun=self._cycle_overran,
+                                    on_error=self._cycle_failed,
+                                    name=self.name + 'Scheduler',
+                                    **self._scheduler_clock())
+        self._scheduler.start()
         self.is_running = True
         self.log.info('Began trading')
 
+    def _scheduler_clock(self):
+        if self.clock is None:
+            return {}
+        return {'clock': self.clock, 'sleep': self.clock.sleep}
+
+    def warm_up(self, samples=None, days=None, cache=None):
+        """
+        Hand past prices to the algorithm in a single `Algorithm.load_history`
+        call, so that it doesn't have to wait for live prices before it has
+        enough data to trade. Samples of other currency pairs are skipped.
+
+        Parameters
+        ----------
+        samples: list of PriceSample or None
+            The history to load, from any source. If None, the price log the
+            trader writes to is read, which holds every price seen by previous
+            runs of a trader with the same name.
+
+        days: float or None
+            When reading the price log, only load this many days of it
+
+        cache: instance of `PriceLogCache` or None
+            If given, the price log is read from this cache and filtered on
+            its arrays, so only the samples that are loaded are created
+
+        Returns
+        -------
+        n_samples: int
+            The number of samples loaded
+        """
+        start = time.perf_counter()
+        if samples is None:
+            path = self.price_log_file
+            if not os.path.exists(path):
+                return 0
+            after_date = None
+            if days is not None:
+                after_date = datetime.now() - timedelta(days=days)
+            if cache is not None:
+                samples = cache.read_price_history(path).select(
+                    after_date=after_date)
+            else:
+                samples = read_price_history(path, after_date=after_date)
+
+        target = self.authenticator.target_currency()
+        price_currency = self.authenticator.price_currency()
+        if hasattr(samples, 'select'):
+            samples = samples.select(target, price_currency)
+        else:
+            samples = [sample for sample in samples
+                       if sample.currency == target and
+                       sample.price_currency == price_currency]
+        if len(samples):
+            self.algorithm.load_history(samples)
+        self.log.info('Loaded %s samples of price history in %.3f seconds',
+                      len(samples), time.perf_counter() - start)
+        return len(samples)
+
+    def begin_streaming(self, stream):
+        """
+        Trade on every price pushed by a `PriceStream` instead of polling the
+        market. Prices are handled on a dispatcher thread; if several arrive
+        while a cycle is in progress, only the newest one is processed next.
+
+        Parameters
+        ----------
+        stream: instance of `PriceStream`
+            The source of prices. Samples for other currency pairs are ignored.
+            The stream is not started or stopped by the trader.
+        """
+        self._stream = stream
+        self._dispatcher = CoalescingDispatcher(
+            self._on_streamed_price, on_error=self._cycle_failed,
+            name=self.name + 'Dispatcher')
+        self._dispatcher.start()
+        stream.subscribe(self._dispatch)
+        self.is_running = True
+        self.log.info('Began trading on streamed prices')
+
     def stop_trading(self):
         """
-        Stop trading immediately
+        Stop trading. A cycle that is already in progress is allowed to finish
+        before this returns.
         """
-        self.thread.cancel()
+        if self._scheduler is not None:
+            self._scheduler.stop()
+        if self._stream is not None:
+            self._stream.unsubscribe(self._dispatch)
+            self._stream = None
+        if self._dispatcher is not None:
+            self._dispatcher.stop()
+            self._dispatcher = None
         self.is_running = False
         self.log.info('Stop trading')
 
-    def _continue_trading(self):
+    def _dispatch(self, sample):
+        dispatcher = self._dispatcher
+        if dispatcher is not None and \
+                sample.currency == self.authenticator.target_currency() and \
+                sample.price_currency == self.authenticator.price_currency():
+            dispatcher.push(sample)
+
+    def _on_streamed_price(self, price):
+        self.authenticator.update_price(price)
+        self.process_price(price)
+
+    def _set_update_interval(self, interval):
+        if interval != self.update_interval:
+            self.log.debug('Update interval changed to %s seconds', interval)
+        self.update_interval = interval
+        if self._scheduler is not None:
+            self._scheduler.interval = interval
+        self._interval_gauge.set(interval, trader=self.name)
+
+    def _cycle_overran(self, missed):
+        self._overruns.inc(trader=self.name)
+        if self.overrun == Scheduler.SKIP:
+            self._skipped.inc(missed, trader=self.name)
+            self.log.warning('Cycle overran update interval, skipped %s '
+                             'cycles', missed)
+        else:
+            self.log.warning('Cycle overran update interval, catching up on '
+                             '%s cycles', missed)
+
+    def _cycle_failed(self, error):
+        self._failures.inc(trader=self.name, stage='cycle')
+        self.log.error('Cycle failed with error: %s', error)
+
+    def _observe(self, stage, start):
         """
-        Recursively trigger more cycles of trading
+        Record the time since `start` for `stage` and return the current time
         """
-        self.perform_one_cycle()
-        self.thread = threading.Timer(self.update_interval,
-                                      self._continue_trading)
-        self.thread.start()
+        now = time.perf_counter()
+        self._stage_seconds.observe(now - start, trader=self.name, stage=stage)
+        return now
 
     def perform_one_cycle(self):
         """
@@ -95,48 +332,169 @@ class Trader:
         a sychronous manner. 
         """
         # Checking price
+        start = time.perf_counter()
         try:
             price = self.authenticator.get_current_price()
-            self.log.info('Received price update: %s', price)
-            self.price_log.info('%s %s = %s',
-                                self.authenticator.target_currency(),
-                                self.authenticator.price_currency(),
-                                price.price)
-
+        except ReplayFinished:
+            self.log.info('Replay finished')
+            self.stop_trading()
+            return
         except Exception as e:
+            self._failures.inc(trader=self.name, stage='price_fetch')
             self.log.error('Failed to get price with error: %s', e)
             return
+        finally:
+            self._observe('price_fetch', start)
 
+        self.process_price(price)
+
+    def process_price(self, price):
+        """
+        Act on a price that has already been fetched: log it, provide it to the
+        algorithm, and either buy or sell if appropriate. `perform_one_cycle`
+        calls this with the price it fetched itself, while shared price sources
+        such as `MarketDataHub` call it directly.
+
+        Parameters
+        ----------
+        price: PriceSample
+            The latest price of the authenticator's currency pair
+        """
+        self.log.info('Received price update: %s', price)
+        self.price_log.info('%s %s = %s',
+                            self.authenticator.target_currency(),
+                            self.authenticator.price_currency(),
+                            price.price)
+
+        if self.interval_policy is not None:
+            self._set_update_interval(self.interval_policy.update(price))
+
+        start = time.perf_counter()
         self.algorithm.process_data([price])
+        start = self._observe('process_data', start)
 
         # Buying
-        if self.algorithm.check_should_buy():
+        should_buy = self.algorithm.check_should_buy()
+        start = self._observe('check_should_buy', start)
+        if should_buy:
+            if self._order_in_flight('buy'):
+                return
 
-            balance = self.authenticator.get_account_balance()
-            holdings = self.authenticator.get_holdings()
+            balance, holdings = self._account_state()
+            start = self._observe('account_state', start)
             volume = self.algorithm.determine_buy_volume(
                 price, holdings, balance)
-
-            try:
-                self.log.debug('Trying to buy %s shares at %s', volume, price)
-                self.authenticator.buy(volume)
-                self.trade_log.info('Bought %s shares of %s at %s', volume,
-                                    self.authenticator.target_currency(), price)
-            except Exception as e:
-                self.log.error('Failed to buy with error: %s', e)
+            self._place_order('buy', volume, price)
+            return
 
         # Selling
-        elif self.algorithm.check_should_sell():
+        should_sell = self.algorithm.check_should_sell()
+        start = self._observe('check_should_sell', start)
+        if should_sell:
+            if self._order_in_flight('sell'):
+                return
 
-            balance = self.authenticator.get_account_balance()
-            holdings = self.authenticator.get_holdings()
+            balance, holdings = self._account_state()
+            start = self._observe('account_state', start)
             volume = self.algorithm.determine_sell_volume(
                 price, holdings, balance)
+            self._place_order('sell', volume, price)
+
+    def _place_order(self, side, volume, price):
+        """
+        Buy or sell `volume` shares, either right away or, if the trader has an
+        `order_worker`, by queueing the order and returning immediately
+        """
+        order = self.authenticator.buy if side == 'buy' \
+            else self.authenticator.sell
+        self.log.debug('Trying to %s %s shares at %s', side, volume, price)
+        start = time.perf_counter()
 
+        if self.order_worker is None:
             try:
-                self.log.debug('Trying to sell %s shares at %s', volume, price)
-                self.authenticator.sell(volume)
-                self.trade_log.info('Sold %s shares of %s at %s', volume,
-                                    self.authenticator.target_currency(), price)
+                order(volume)
             except Exception as e:
-                self.log.error('Failed to sell with error: %s', e)
+                self._order_failed(side, volume, price, e)
+            else:
+                self._order_filled(side, volume, price, start)
+            return
+
+        # The account will change once the order is placed, and another order
+        # mustn't be decided on before it has
+        self._account_snapshot = None
+        ticket = object()
+        with self._orders_lock:
+            self._orders_in_flight.add(ticket)
+        try:
+            self.order_worker.submit(
+                order, volume,
+                on_success=lambda result: self._order_done(
+                    ticket, self._order_filled, side, volume, price, start),
+                on_failure=lambda error: self._order_done(
+                    ticket, self._order_failed, side, volume, price, error),
+                on_timeout=lambda error: self._order_done(
+                    ticket, self._order_failed, side, volume, price, error))
+        except queue.Full:
+            self._order_done(ticket, self._order_failed, side, volume, price,
+                             RuntimeError('Too many orders pending'))
+
+    def _order_in_flight(self, side):
+        """
+        Whether an order of this trader is still queued or being placed, in
+        which case deciding on another one would act on a stale account
+        """
+        if self._orders_in_flight:
+            self.log.info('Not trying to %s, an order is still in flight',
+                          side)
+            return True
+        return False
+
+    def _order_done(self, ticket, callback, *args):
+        """
+        Report an outcome of the order `ticket` and stop counting it as in
+        flight. An order that timed out has been reported as failed already,
+        so if it fails once it returns, that is only logged.
+        """
+        with self._orders_lock:
+            overdue = ticket not in self._orders_in_flight
+        try:
+            if overdue and callback == self._order_failed:
+                self.log.error('Overdue order to %s failed with error: %s',
+                               args[0], args[-1])
+            else:
+                callback(*args)
+        finally:
+            with self._orders_lock:
+                self._orders_in_flight.discard(ticket)
+
+    def _order_filled(self, side, volume, price, start):
+        self._observe('order', start)
+        self.trade_log.info('%s %s shares of %s at %s',
+                            'Bought' if side == 'buy' else 'Sold', volume,
+                            self.authenticator.target_currency(), price)
+        self._account_snapshot = None
+        self.algorithm.order_filled(side, volume, price)
+
+    def _order_failed(self, side, volume, price, error):
+        self._failures.inc(trader=self.name, stage='order')
+        self.log.error('Failed to %s with error: %s', side, error)
+        if not isinstance(error, ValueError):
+            # Only a rejection before reaching the market leaves the account
+            # unchanged
+            self._account_snapshot = None
+        self.algorithm.order_failed(side, volume, price, error)
+
+    def _account_state(self):
+        """
+        The account balance and holdings, reusing the last snapshot if it is
+        younger than `account_ttl`
+        """
+        now = time.monotonic() if self.clock is None else self.clock()
+        if self._account_snapshot is not None:
+            fetched, balance, holdings = self._account_snapshot
+            if now - fetched < self.account_ttl:
+                return balance, holdings
+
+        balance, holdings = self.authenticator.get_account_state()
+        self._account_snapshot = (now, balance, holdings)
+        return balance, holdings
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A clock that only moves when it is told to, so that code written against the
+passage of time can be run faster than real time.
+"""
+import time
+import threading
+from datetime import timedelta
+
+
+class VirtualClock:
+    """
+    A monotonic clock whose time is advanced explicitly. Pass it as the
+    `clock` of a `Scheduler` or `Trader`: instead of sleeping until the next
+    deadline, the scheduler calls `sleep`, which jumps straight to it, so a
+    month of five minute cycles runs as fast as the cycles themselves.
+    """
+
+    def __init__(self, start=0.0, epoch=None):
+        """
+        Parameters
+        ----------
+        start: float (seconds)
+            The time the clock starts at
+
+        epoch: datetime or None
+            The date and time at `start`. Only needed for `datetime`.
+        """
+        self.epoch = epoch
+        self._start = float(start)
+        self._now = float(start)
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        """
+        The current time in seconds
+        """
+        return self._now
+
+    def datetime(self):
+        """
+        The current date and time, counted from `epoch`
+
+        Raises
+        ------
+        ValueError
+            If the clock has no `epoch`
+        """
+        if self.epoch is None:
+            raise ValueError('The clock has no epoch')
+        return self.epoch + timedelta(seconds=self._now - self._start)
+
+    def advance(self, seconds):
+        """
+        Move the clock forward by `seconds`, which must not be negative
+        """
+        if seconds < 0:
+            raise ValueError('A monotonic clock cannot go back')
+        with self._lock:
+            self._now += seconds
+
+    def sleep(self, seconds):
+        """
+        Advance the clock instead of sleeping. Other threads still get a chance
+        to run, like they would while a real clock sleeps.
+        """
+        self.advance(max(0.0, seconds))
+        time.sleep(0)
@@ -1,15 +1,92 @@
+"""
+Public names are imported on first use (PEP 562), so that importing the
+package doesn't load numpy, krakenex, requests and the websocket libraries for
+a script that only needs a few of its modules.
+"""
+import sys
+import types
+import importlib
+
 from .PriceSample import PriceSample
+from .PriceBar import PriceBar
 from .TransationRecord import TransationRecord
 
-from .Algorithms.Algorithm import Algorithm
-from .Algorithms.DummyAlgorithm import DummyAlgorithm
-from .Algorithms.ErikAlgorithm import ErikAlgorithm
+# Maps every lazily imported name to the module that defines it
+_LAZY = {
+    'Algorithm': '.Algorithms.Algorithm',
+    'DummyAlgorithm': '.Algorithms.DummyAlgorithm',
+    'ErikAlgorithm': '.Algorithms.ErikAlgorithm',
+
+    'Authenticator': '.Markets.Authenticator',
+    'AsyncAuthenticator': '.Markets.AsyncAuthenticator',
+    'SyncAuthenticatorAdapter': '.Markets.AsyncAuthenticator',
+    'KrakenAuthenticator': '.Markets.KrakenAuthenticator',
+    'PracticeAuthenticator': '.Markets.PracticeAuthenticator',
+    'DummyAuthenticator': '.Markets.DummyAuthenticator',
+    'MarketDataHub': '.Markets.MarketDataHub',
+    'CoalescingAuthenticator': '.Markets.CoalescingAuthenticator',
+    'PriceCoalescer': '.Markets.CoalescingAuthenticator',
+    'HedgedAuthenticator': '.Markets.HedgedAuthenticator',
+    'Transport': '.Markets.Transport',
+    'Cassette': '.Markets.Cassette',
+    'CassetteError': '.Markets.Cassette',
+    'RateGovernor': '.Markets.RateGovernor',
+    'RateLimitExceeded': '.Markets.RateGovernor',
+    'PriceStream': '.Markets.PriceStream',
+    'KrakenPriceStream': '.Markets.PriceStream',
+    'LocalTickerServer': '.Markets.LocalTickerServer',
+    'LocalExchange': '.Markets.LocalExchange',
+    'SimulatedExchange': '.Markets.SimulatedExchange',
+    'SimulatedAuthenticator': '.Markets.SimulatedExchange',
+    'ReplayAuthenticator': '.Markets.ReplayAuthenticator',
+    'ReplayFinished': '.Markets.ReplayAuthenticator',
+    'OrderBook': '.Markets.OrderBook',
+
+    'Trader': '.Trader',
+    'OrderWorker': '.OrderWorker',
+    'VolatilityAdaptiveInterval': '.AdaptiveInterval',
+    'VirtualClock': '.VirtualClock',
+    'AsyncTrader': '.AsyncTrader',
+    'run_traders': '.AsyncTrader',
+    'AlgorithmValidator': '.AlgorithmValidator',
+    'PortfolioValidator': '.PortfolioValidator',
+    'PriceLogCache': '.PriceLogCache',
+    'TickerServer': '.TickerServer',
+    'MetricsRegistry': '.Instrumentation',
+    'MetricsServer': '.Instrumentation',
+}
+
+__all__ = ['PriceSample', 'PriceBar', 'TransationRecord'] + list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r' %
+                             (__name__, name))
+    value = getattr(importlib.import_module(module, __name__), name)
+    # Later lookups find the name directly and skip this function
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+class _Package(types.ModuleType):
+    """
+    Importing a submodule such as `baibaitrader.Trader` binds it to the
+    package under its name, which would hide the class of the same name.
+    Bind the class instead, like the package did when it imported everything
+    up front.
+    """
+
+    def __setattr__(self, name, value):
+        if name in _LAZY and isinstance(value, types.ModuleType) and \
+                value.__name__ == self.__name__ + '.' + name:
+            value = getattr(value, name, value)
+        super().__setattr__(name, value)
 
-from .Markets.Authenticator import Authenticator
-from .Markets.KrakenAuthenticator import KrakenAuthenticator
-from .Markets.PracticeAuthenticator import PracticeAuthenticator
-from .Markets.DummyAuthenticator import DummyAuthenticator
 
-from .Trader import Trader
-from .AlgorithmValidator import AlgorithmValidator
-from .TickerServer import TickerServer
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Functions for measuring how well a trading strategy performed. Everything here
+works on numpy arrays so that reports stay cheap even for very long histories.
+"""
+import numpy as np
+
+SECONDS_PER_YEAR = 365.25 * 24 * 60 * 60
+
+
+def equity_curve(dates, prices, state_dates, balances, holdings):
+    """
+    Mark an account to market at every price sample
+
+    Parameters
+    ----------
+    dates: array of datetime64
+        The date of every price sample in chronological order
+
+    prices: array of float
+        The price at every sample
+
+    state_dates: array of datetime64
+        The dates at which the account balance or holdings changed, in
+        chronological order
+
+    balances: array of float
+        The account balance after each change in `state_dates`
+
+    holdings: array of float
+        The holdings after each change in `state_dates`
+
+    Returns
+    -------
+    equity: numpy array of float
+        The value of the account, balance plus holdings at the going price,
+        at every sample
+
+    held: numpy array of float
+        The holdings at every sample
+    """
+    dates = np.asarray(dates, dtype='datetime64[us]')
+    state_dates = np.asarray(state_dates, dtype='datetime64[us]')
+    idx = np.searchsorted(state_dates, dates, side='right') - 1
+    idx = np.clip(idx, 0, len(state_dates) - 1)
+    held = np.asarray(holdings, dtype=np.float64)[idx]
+    cash = np.asarray(balances, dtype=np.float64)[idx]
+    return cash + held * np.asarray(prices, dtype=np.float64), held
+
+
+def drawdown(equity):
+    """
+    The relative distance of the equity curve below its running maximum
+
+    Parameters
+    ----------
+    equity: array of float
+        The value of an account over time
+
+    Returns
+    -------
+    drawdown: numpy array of float
+        A value between 0 (at a new high) and 1 (everything lost) per sample
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dd = np.where(peak > 0, 1.0 - equity / peak, 0.0)
+    return dd
+
+
+def performance_metrics(dates, equity, held, prices, buys, sells,
+                        risk_free_rate=0.0):
+    """
+    Summarize the performance of an equity curve and the trades behind it
+
+    Parameters
+    ----------
+    dates: array of datetime64
+        The date of every sample in chronological order
+
+    equity: array of float
+        The marked to market account value at every sample, as returned by
+        `equity_curve`
+
+    held: array of float
+        The holdings at every sample
+
+    prices: array of float
+        The price at every sample
+
+    buys, sells: list of TransationRecord
+        The trades made during the period
+
+    risk_free_rate: float
+        The annual return of a riskless investment, used for the Sharpe ratio
+
+    Returns
+    -------
+    metrics: dict
+        total_return, annualized_return, annualized_volatility, sharpe_ratio,
+        max_drawdown, exposure, turnover, and trade statistics. Values that are
+        undefined for the given data (e.g. volatility of a single sample) are
+        NaN.
+    """
+    seconds = np.asarray(dates, dtype='datetime64[us]').astype(np.int64) / 1e6
+    equity = np.asarray(equity, dtype=np.float64)
+    held = np.asarray(held, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    nan = float('nan')
+
+    bought = np.array([[b.shares, b.price * b.shares] for b in buys],
+                      dtype=np.float64).reshape(-1, 2)
+    sold = np.array([[s.shares, s.price * s.shares] for s in sells],
+                    dtype=np.float64).reshape(-1, 2)
+    traded_notional = bought[:, 1].sum() + sold[:, 1].sum()
+    n_trades = len(bought) + len(sold)
+
+    metrics = {
+        'start_equity': nan,
+        'end_equity': nan,
+        'total_return': nan,
+        'annualized_return': nan,
+        'annualized_volatility': nan,
+        'sharpe_ratio': nan,
+        'max_drawdown': nan,
+        'exposure': nan,
+        'turnover': nan,
+        'n_buys': len(bought),
+        'n_sells': len(sold),
+        'bought_volume': float(bought[:, 0].sum()),
+        'sold_volume': float(sold[:, 0].sum()),
+        'bought_notional': float(bought[:, 1].sum()),
+        'sold_notional': float(sold[:, 1].sum()),
+        'average_trade_notional': float(traded_notional / n_trades)
+        if n_trades else nan,
+    }
+    if len(equity) == 0:
+        return metrics
+
+    metrics['start_equity'] = float(equity[0])
+    metrics['end_equity'] = float(equity[-1])
+    metrics['max_drawdown'] = float(drawdown(equity).max())
+    mean_equity = equity.mean()
+    if mean_equity > 0:
+        metrics['turnover'] = float(traded_notional / mean_equity)
+    if equity[0] > 0:
+        metrics['total_return'] = float(equity[-1] / equity[0] - 1.0)
+
+    elapsed = seconds[-1] - seconds[0]
+    if len(equity) < 2 or elapsed <= 0:
+        return metrics
+
+    # Time weighted share of the account that was invested in the asset
+    dt = np.diff(seconds)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        invested = np.where(equity > 0, held * prices / equity, 0.0)
+        returns = np.diff(equity) / equity[:-1]
+    metrics['exposure'] = float((invested[:-1] * dt).sum() / elapsed)
+
+    years = elapsed / SECONDS_PER_YEAR
+    if equity[0] > 0 and equity[-1] > 0:
+        metrics['annualized_return'] = float(
+            (equity[-1] / equity[0]) ** (1.0 / years) - 1.0)
+
+    returns = returns[np.isfinite(returns)]
+    if len(returns) > 1:
+        periods_per_year = len(returns) / years
+        volatility = returns.std(ddof=1) * np.sqrt(periods_per_year)
+        metrics['annualized_volatility'] = float(volatility)
+        if volatility > 0:
+            excess = returns.mean() * periods_per_year - risk_free_rate
+            metrics['sharpe_ratio'] = float(excess / volatility)
+    return metrics
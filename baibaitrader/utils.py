@@ -5,26 +5,89 @@ Contains various helpful utilities that don't have a home all their own
 """
 import os
 import logging
-from file_read_backwards import FileReadBackwards
-from dateutil.parser import parse
 from datetime import datetime, timedelta
 
 from .PriceSample import PriceSample
+from .PriceBar import PriceBar
 
+# Where loggers built by `build_logger` write their files
+LOG_FOLDER = 'log_files'
 
-def build_logger(identifier, filename, level=logging.INFO, output_console=True):
+# The number of decimals of the seconds in log timestamps, by precision
+TIMESTAMP_PRECISIONS = {'s': 0, 'ms': 3, 'us': 6}
+
+
+def log_path(filename):
+    """
+    The path of a log file written by a logger from `build_logger`
+
+    Parameters
+    ----------
+    filename: string
+        The file name given to `build_logger`, e.g. 'MyTrader_price_log.log'
+    """
+    return os.path.join(LOG_FOLDER, filename)
+
+
+class _PreciseFormatter(logging.Formatter):
+    """
+    Formats record times with a fixed number of decimals for the seconds,
+    taking them from `clock` if it has a date
+    """
+
+    def __init__(self, fmt, decimals, clock=None):
+        super().__init__(fmt)
+        self.decimals = decimals
+        self.clock = clock
+
+    def formatTime(self, record, datefmt=None):
+        if getattr(self.clock, 'epoch', None) is not None:
+            date = self.clock.datetime()
+        else:
+            date = datetime.fromtimestamp(record.created)
+        if not self.decimals:
+            return date.strftime('%Y-%m-%d %H:%M:%S')
+        return date.strftime('%Y-%m-%d %H:%M:%S.%f')[:20 + self.decimals]
+
+
+def build_logger(identifier, filename, level=logging.INFO, output_console=True,
+                 precision='s', clock=None):
     """
     Gets (or creates if nonexistent) a file logger that also logs out to the
-    stdout and stderror. Log entries will be dateed as well.
+    stdout and stderror. Log entries will be dateed as well. Building a logger
+    that already exists doesn't attach a second set of handlers, but dates its
+    entries with the given `precision` and `clock` from then on.
+
+    The precision of the dates is 's' for whole seconds, as in
+    '2017-12-11 13:00:46', 'ms' for milliseconds, as in
+    '2017-12-11 13:00:46.123', or 'us' for microseconds. If `clock` is a
+    `VirtualClock` with an epoch, entries are dated with its time instead of
+    the real one.
     """
-    log_folder = 'log_files'
-    if not os.path.exists(log_folder):
-        os.mkdir(log_folder)
+    if precision not in TIMESTAMP_PRECISIONS:
+        raise ValueError("precision must be one of 's', 'ms' or 'us'")
+
+    if not os.path.exists(LOG_FOLDER):
+        os.mkdir(LOG_FOLDER)
+
+    if clock is not None:
+        formatter = _PreciseFormatter('%(asctime)s : %(message)s',
+                                      TIMESTAMP_PRECISIONS[precision], clock)
+    elif precision == 's':
+        formatter = logging.Formatter(
+            '%(asctime)s : %(message)s', "%Y-%m-%d %H:%M:%S")
+    else:
+        formatter = _PreciseFormatter('%(asctime)s : %(message)s',
+                                      TIMESTAMP_PRECISIONS[precision])
 
     l = logging.getLogger(identifier)
-    formatter = logging.Formatter(
-        '%(asctime)s : %(message)s', "%Y-%m-%d %H:%M:%S")
-    fileHandler = logging.FileHandler(log_folder + '/' + filename, mode='a')
+    if l.handlers:
+        # Already built, e.g. by another trader with the same name
+        for handler in l.handlers:
+            handler.setFormatter(formatter)
+        return l
+
+    fileHandler = logging.FileHandler(log_path(filename), mode='a')
     fileHandler.setFormatter(formatter)
 
     if output_console:
@@ -45,7 +108,8 @@ def parse_price_sample(line):
     ----------
     line: string
         A string matching the following format
-        '2017-12-11 13:00:46 : XBT USD = 16200.00000'
+        '2017-12-11 13:00:46 : XBT USD = 16200.00000'. The seconds may have a
+        fractional part, e.g. '13:00:46.123'.
 
     Returns
     -------
@@ -54,7 +118,13 @@ def parse_price_sample(line):
         recorded at.
     """
     words = line.split(' ')
-    date = parse(words[0] + ' ' + words[1])
+    stamp = words[0] + ' ' + words[1]
+    try:
+        # Much faster than dateutil and covers everything `build_logger` writes
+        date = datetime.fromisoformat(stamp)
+    except ValueError:
+        from dateutil.parser import parse
+        date = parse(stamp)
     currency = words[3]
     price_currency = words[4]
     price = float(words[6])
@@ -96,6 +166,8 @@ def read_price_history(log_file, after_date=None, max_samples=None):
     if after_date is not None and not isinstance(after_date, datetime):
         raise TypeError('after_date must be a datetime object')
 
+    from file_read_backwards import FileReadBackwards
+
     samples = []
     with FileReadBackwards(log_file, encoding="utf-8") as frb:
         for line in frb:
@@ -108,6 +180,29 @@ def read_price_history(log_file, after_date=None, max_samples=None):
     return samples
 
 
+def iter_price_history(log_file):
+    """
+    Lazily read a price log from the beginning, yielding one `PriceSample` per
+    line. Unlike `read_price_history`, the samples are produced oldest first
+    and the file is never held in memory all at once.
+
+    Parameters
+    ----------
+    log_file: string
+        Path to the log file to read
+
+    Yields
+    ------
+    sample: PriceSample
+        The samples of the log in chronological order
+    """
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                yield parse_price_sample(line)
+
+
 def read_days_of_price_history(log_file, days, starting_from=datetime.now()):
     """
     Reads the previous x days of data from a price log. This is a convenience
@@ -139,3 +234,161 @@ def read_days_of_price_history(log_file, days, starting_from=datetime.now()):
     delta = timedelta(days=days)
     then = starting_from - delta
     return read_price_history(log_file, after_date=then)
+
+
+def downsample_minmax(dates, values, max_points):
+    """
+    Reduce a series to at most `max_points` points while preserving its shape.
+    The series is split into equally sized buckets and only the smallest and
+    largest value of each bucket is kept, so peaks and troughs survive the
+    reduction. The first and last points are always kept.
+
+    Parameters
+    ----------
+    dates: sequence of datetime
+        The x coordinates of the series
+
+    values: sequence of float
+        The y coordinates of the series
+
+    max_points: int
+        The maximum number of points to return. Must be at least 4.
+
+    Returns
+    -------
+    dates, values: numpy arrays
+        The reduced series, in the same order as the input
+    """
+    import numpy as np
+
+    if max_points < 4:
+        raise ValueError('max_points must be >= 4')
+
+    dates = np.asarray(dates, dtype='datetime64[us]')
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points:
+        return dates, values
+
+    n_buckets = (max_points - 2) // 2
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = values
+    padded = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    mins = offsets + np.nanargmin(padded, axis=1)
+    maxs = offsets + np.nanargmax(padded, axis=1)
+    keep = np.unique(np.concatenate(([0, n - 1], mins, maxs)))
+    return dates[keep], values[keep]
+
+
+def price_arrays(samples):
+    """
+    The dates and prices of a price history as numpy arrays
+
+    Parameters
+    ----------
+    samples: list of PriceSample
+        The samples in any order. A `PriceHistory` from `PriceLogCache` hands
+        out its arrays without creating the samples.
+
+    Returns
+    -------
+    dates: numpy array of datetime64[us]
+
+    prices: numpy array of float64
+        Both in the same order as `samples`
+    """
+    import numpy as np
+
+    if hasattr(samples, 'arrays'):
+        return samples.arrays()
+    dates = np.array([sample.date for sample in samples],
+                     dtype='datetime64[us]')
+    prices = np.array([sample.price for sample in samples], dtype=np.float64)
+    return dates, prices
+
+
+def _bucket_bounds(samples, interval):
+    """
+    Sort `samples` chronologically and split them into buckets of `interval`
+    seconds. Returns the indices of the samples in chronological order, their
+    prices in that order and the position of the first sample of every bucket.
+    """
+    import numpy as np
+
+    if interval <= 0:
+        raise ValueError('interval must be > 0')
+
+    dates, prices = price_arrays(samples)
+    order = np.argsort(dates, kind='stable')
+    buckets = dates[order].astype(np.int64) // int(interval * 1e6)
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[:1] - 1))
+    return order, prices[order], starts
+
+
+def resample_price_history(samples, interval):
+    """
+    Resample a price history to a fixed cadence by keeping only the last sample
+    of every `interval` seconds. This mimics a `Trader` polling the market once
+    per `update_interval`.
+
+    Parameters
+    ----------
+    samples: list of PriceSample
+        The samples to resample, in any order
+
+    interval: float
+        The length of each bucket in seconds. May be fractional.
+
+    Returns
+    -------
+    samples: list of PriceSample
+        The last sample of every non-empty bucket, with the first element being
+        the most recent data like `read_price_history`
+    """
+    import numpy as np
+
+    if not len(samples):
+        return []
+    order, _, starts = _bucket_bounds(samples, interval)
+    ends = np.append(starts[1:], len(order)) - 1
+    return [samples[i] for i in order[ends[::-1]].tolist()]
+
+
+def resample_price_bars(samples, interval):
+    """
+    Summarize a price history as open, high, low and close (OHLC) bars of
+    `interval` seconds each.
+
+    Parameters
+    ----------
+    samples: list of PriceSample
+        The samples to summarize, in any order
+
+    interval: float
+        The length of each bar in seconds. May be fractional.
+
+    Returns
+    -------
+    bars: list of PriceBar
+        One bar for every non-empty interval, with the first element being the
+        most recent data like `read_price_history`
+    """
+    import numpy as np
+
+    if not len(samples):
+        return []
+    order, prices, starts = _bucket_bounds(samples, interval)
+    ends = np.append(starts[1:], len(order)) - 1
+    highs = np.maximum.reduceat(prices, starts)
+    lows = np.minimum.reduceat(prices, starts)
+    bars = []
+    for end, open_, high, low in zip(ends.tolist(), prices[starts].tolist(),
+                                     highs.tolist(), lows.tolist()):
+        last = samples[order[end]]
+        bars.append(PriceBar(open_, high, low, last.price, last.date,
+                             last.currency, last.price_currency))
+    bars.reverse()
+    return bars
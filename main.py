@@ -5,10 +5,15 @@ Where the action happens
 """
 import time
 from baibaitrader import Trader, ErikAlgorithm, PracticeAuthenticator
+from baibaitrader import MetricsServer
 
 auth = PracticeAuthenticator(10000, 'XBT', 'USD')
 algorithm = ErikAlgorithm(500, 500, min_days_of_data=1)
 
 trader = Trader('ErikPracticeTrader', auth, algorithm, update_interval=60.0)
-trader.begin_trading()
+# Pick up where the last run left off instead of waiting a day for new data
+trader.begin_trading(warm_up=True, warm_up_days=3)
+
+# Cycle timings and failure counts for Prometheus at http://127.0.0.1:9100/metrics
+MetricsServer(port=9100).start()
 print("Began trading")
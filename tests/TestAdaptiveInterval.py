@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `VolatilityAdaptiveInterval` and for traders whose polling interval
+follows the market
+"""
+import datetime
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import (MetricsRegistry, PriceSample, Trader,
+                          VolatilityAdaptiveInterval, KrakenAuthenticator,
+                          LocalExchange, Transport)
+
+from .mocks import MockAlgorithm, MockAuthenticator
+
+
+def sample(price):
+    return PriceSample(price, datetime.datetime.now(), 'BTC', 'USD')
+
+
+class TestVolatilityAdaptiveInterval(TestCase):
+
+    def setUp(self):
+        self.policy = VolatilityAdaptiveInterval(10, 80, threshold=0.01,
+                                                 shrink=0.5, grow=2.0)
+
+    def test_starts_at_max(self):
+        assert self.policy.interval == 80
+
+    def test_first_price_keeps_interval(self):
+        assert self.policy.update(sample(100.0)) == 80
+
+    def test_shrinks_when_volatile(self):
+        self.policy.update(sample(100.0))
+        assert self.policy.update(sample(105.0)) == 40
+        assert self.policy.update(sample(100.0)) == 20
+
+    def test_respects_min(self):
+        self.policy.update(sample(100.0))
+        for i in range(10):
+            self.policy.update(sample(100.0 * (1.1 if i % 2 else 1.0)))
+        assert self.policy.interval == 10
+
+    def test_grows_when_quiet(self):
+        policy = VolatilityAdaptiveInterval(10, 80, threshold=0.01, grow=2.0,
+                                            initial_interval=10)
+        policy.update(sample(100.0))
+        assert policy.update(sample(100.5)) == 20
+        for _ in range(10):
+            policy.update(sample(100.5))
+        assert policy.interval == 80
+
+    @raises(ValueError)
+    def test_invalid_bounds(self):
+        VolatilityAdaptiveInterval(10, 5)
+
+    @raises(ValueError)
+    def test_invalid_shrink(self):
+        VolatilityAdaptiveInterval(1, 5, shrink=1.5)
+
+
+class TestTraderAdaptiveInterval(TestCase):
+
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+        self.policy = VolatilityAdaptiveInterval(1, 8, threshold=0.01)
+        self.trader = Trader('unit_tests', MockAuthenticator(),
+                             MockAlgorithm(), update_interval=42,
+                             output_console=False, metrics=self.metrics,
+                             interval_policy=self.policy)
+
+    def tearDown(self):
+        self.trader.stop_trading()
+
+    def test_starts_at_policy_interval(self):
+        assert self.trader.update_interval == 8
+
+    def test_interval_follows_prices(self):
+        self.trader.process_price(sample(100.0))
+        self.trader.process_price(sample(110.0))
+        assert self.trader.update_interval == 4
+
+    def test_interval_is_exported(self):
+        self.trader.process_price(sample(100.0))
+        self.trader.process_price(sample(110.0))
+        gauge = self.metrics.gauge('baibai_update_interval_seconds')
+        assert gauge.value(trader='unit_tests') == 4
+        assert 'baibai_update_interval_seconds{trader="unit_tests"} 4.0' in \
+            self.metrics.render()
+
+    def test_scheduler_follows_interval(self):
+        self.trader.begin_trading()
+        self.trader.process_price(sample(100.0))
+        self.trader.process_price(sample(200.0))
+        assert self.trader._scheduler.interval == self.trader.update_interval
+
+
+class TestAdaptiveIntervalLocalExchange(TestCase):
+
+    def setUp(self):
+        self.exchange = LocalExchange(
+            prices={'XXBTZUSD': [100.0, 110.0, 110.0]})
+        self.exchange.start()
+        self.transport = Transport(base_url=self.exchange.url)
+
+    def tearDown(self):
+        self.transport.close()
+        self.exchange.stop()
+
+    def test_prices_from_kraken_api(self):
+        policy = VolatilityAdaptiveInterval(1, 8, threshold=0.01)
+        trader = Trader('unit_tests', KrakenAuthenticator(
+                            'tests/fake_key.key', 'XBT', 'USD',
+                            transport=self.transport),
+                        MockAlgorithm(), output_console=False,
+                        metrics=MetricsRegistry(), interval_policy=policy)
+        for _ in range(3):
+            trader.perform_one_cycle()
+        # Shrunk by the jump to 110, then grown back a little
+        assert self.exchange.requests['Depth'] == 3
+        assert 1 < trader.update_interval < 8
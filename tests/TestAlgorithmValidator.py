@@ -8,6 +8,7 @@ import numpy as np
 from datetime import datetime, timedelta
 from unittest import TestCase
 from baibaitrader import AlgorithmValidator, PriceSample, TransationRecord
+from baibaitrader import PriceBar
 from baibaitrader.utils import read_price_history
 from .mocks import MockAlgorithm
 
@@ -111,6 +112,7 @@ class TestAlgorithmValidator(TestCase):
         self.tester.algorithm.should_sell = True
         self.tester.simulate_trading()
         assert len(self.tester.sells) == num_prices
+        assert self.tester.sells[0].price_currency == 'USD'
 
     def test_buy_updates_holdings_history(self):
         num_prices = len(read_price_history(log_file))
@@ -160,6 +162,89 @@ class TestAlgorithmValidator(TestCase):
         self.tester.simulate_trading()
         assert self.tester.holdings != original_holdings
 
+    def test_replays_oldest_first(self):
+        dates = []
+        self.tester.algorithm.process_data = \
+            lambda samples: dates.extend(s.date for s in samples)
+        self.tester.simulate_trading()
+        assert dates == sorted(dates)
+
+    def test_replay_interval_reduces_samples(self):
+        tester = AlgorithmValidator(log_file, MockAlgorithm(), 5.0, 311.0,
+                                    replay_interval=300)
+        tester.simulate_trading()
+        assert tester.algorithm.n_data == 3
+
+    def test_replay_bars(self):
+        algorithm = MockAlgorithm()
+        bars = []
+        algorithm.process_bars = bars.extend
+        tester = AlgorithmValidator(log_file, algorithm, 5.0, 311.0,
+                                    replay_interval=300, replay_bars=True)
+        tester.simulate_trading()
+        assert len(bars) == 3
+        assert all(isinstance(bar, PriceBar) for bar in bars)
+
+    def test_replay_bars_defaults_to_process_data(self):
+        tester = AlgorithmValidator(log_file, MockAlgorithm(), 5.0, 311.0,
+                                    replay_interval=300, replay_bars=True)
+        tester.simulate_trading()
+        assert tester.algorithm.n_data == 3
+
+    def test_replay_bars_trade_at_close(self):
+        tester = AlgorithmValidator(log_file, MockAlgorithm(), 5.0, 311.0,
+                                    replay_interval=300, replay_bars=True)
+        tester.algorithm.should_buy = True
+        tester.simulate_trading()
+        assert [buy.price for buy in tester.buys] == \
+            [bar.close for bar in reversed(tester.bar_history)]
+
+    def test_equity_curve_one_value_per_sample(self):
+        self.tester.simulate_trading()
+        dates, equity, drawdown = self.tester.equity_curve()
+        assert len(dates) == len(equity) == len(drawdown) == 8
+
+    def test_equity_curve_without_trades(self):
+        self.tester.simulate_trading()
+        _, equity, _ = self.tester.equity_curve()
+        prices = [s.price for s in reversed(self.tester.sample_history)]
+        assert np.allclose(equity, 311.0 + 5.0 * np.array(prices))
+
+    def test_equity_curve_includes_trades(self):
+        self.tester.algorithm.should_buy = True
+        self.tester.algorithm.buy_volume = 0.001
+        self.tester.simulate_trading()
+        _, equity, _ = self.tester.equity_curve()
+        assert np.isclose(equity[-1],
+                          self.tester.balance + self.tester.holdings *
+                          self.tester.sample_history[0].price)
+
+    def test_metrics(self):
+        self.tester.algorithm.should_buy = True
+        self.tester.algorithm.buy_volume = 0.001
+        self.tester.simulate_trading()
+        metrics = self.tester.performance_metrics()
+        assert metrics['n_buys'] == 8
+        assert metrics['n_sells'] == 0
+        assert np.isclose(metrics['bought_volume'], 0.008)
+        assert 0 <= metrics['max_drawdown'] < 1
+        assert 0 < metrics['exposure'] <= 1
+        assert np.isfinite(metrics['sharpe_ratio'])
+
+    def test_metrics_total_return(self):
+        self.tester.simulate_trading()
+        metrics = self.tester.performance_metrics()
+        first = 311.0 + 5.0 * 16250.0
+        last = 311.0 + 5.0 * 16200.0
+        assert np.isclose(metrics['total_return'], last / first - 1)
+
+    def test_metrics_max_drawdown(self):
+        self.tester.holdings = 1.0
+        self.tester.balance = 0.0
+        self.tester.simulate_trading()
+        metrics = self.tester.performance_metrics()
+        assert np.isclose(metrics['max_drawdown'], 1 - 16200.0 / 16352.2)
+
     def test_plot(self):
         data = self.sample_data()
         prices = [d.price for d in data]
@@ -180,3 +265,18 @@ class TestAlgorithmValidator(TestCase):
         self.tester.balance_history = [
             (1000, data[-1].date), (5000, buy.date), (3000, sell.date)]
         # self.tester.plot_results()
+
+    def test_plot_pairs_downsampled(self):
+        data = self.sample_data()
+        self.tester.sample_history = data
+        pairs = self.tester.data_pairs_for_plotting(max_points=100)
+        assert len(pairs['prices']['values']) <= 100
+        assert max(pairs['prices']['values']) == 1000
+        assert min(pairs['prices']['values']) == 100
+
+    def test_plot_pairs_downsampled_keeps_trades(self):
+        self.tester.algorithm.should_buy = True
+        self.tester.simulate_trading()
+        pairs = self.tester.data_pairs_for_plotting(max_points=4)
+        assert len(pairs['buys']['dates']) == len(self.tester.buys)
+        assert isinstance(pairs['buys']['values'], np.ndarray)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This file contains unit tests to ensure that `AsyncTrader` makes the proper
+calls to its members and that many traders can share one event loop
+"""
+import asyncio
+import threading
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import AsyncTrader, SyncAuthenticatorAdapter, run_traders
+from .mocks import MockAlgorithm, MockAuthenticator
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class StoppingAlgorithm(MockAlgorithm):
+    """
+    Stops its trader once it has been given `n_cycles` prices
+    """
+
+    def __init__(self, n_cycles):
+        self.n_cycles = n_cycles
+        self.trader = None
+
+    def process_data(self, samples):
+        super().process_data(samples)
+        if self.n_data == self.n_cycles:
+            self.trader.stop_trading()
+
+
+class TestAsyncTrader(TestCase):
+
+    def setUp(self):
+        self.trader = AsyncTrader('unit_tests_async',
+                                  MockAuthenticator(),
+                                  MockAlgorithm(),
+                                  update_interval=42,
+                                  output_console=False)
+
+    def test_wraps_sync_authenticator(self):
+        assert isinstance(self.trader.authenticator, SyncAuthenticatorAdapter)
+
+    def test_is_running_starts_false(self):
+        assert self.trader.is_running is False
+
+    def test_cycle_checks_price_once(self):
+        run(self.trader.perform_one_cycle())
+        assert self.trader.authenticator.authenticator.n_checks == 1
+        assert self.trader.algorithm.n_data == 1
+
+    def test_cycle_buys(self):
+        self.trader.algorithm.should_buy = True
+        run(self.trader.perform_one_cycle())
+        auth = self.trader.authenticator.authenticator
+        assert auth.n_buys == 1
+        assert auth.n_balance == 1
+        assert auth.n_holdings == 1
+        assert auth.n_sells == 0
+
+    def test_cycle_sells(self):
+        self.trader.algorithm.should_sell = True
+        run(self.trader.perform_one_cycle())
+        auth = self.trader.authenticator.authenticator
+        assert auth.n_sells == 1
+        assert auth.n_buys == 0
+
+    def test_failed_price_skips_cycle(self):
+        self.trader.authenticator.authenticator.should_fail = True
+        run(self.trader.perform_one_cycle())
+        assert self.trader.algorithm.n_data == 0
+
+    def test_starts_and_stops(self):
+        async def scenario():
+            task = asyncio.ensure_future(self.trader.begin_trading())
+            await asyncio.sleep(0.01)
+            assert self.trader.is_running is True
+            self.trader.stop_trading()
+            await task
+
+        run(scenario())
+        assert self.trader.is_running is False
+        assert self.trader.authenticator.authenticator.n_checks == 1
+
+    def test_many_traders_one_loop(self):
+        traders = [AsyncTrader('unit_tests_async', MockAuthenticator(),
+                               StoppingAlgorithm(3), update_interval=0.001,
+                               output_console=False)
+                   for _ in range(200)]
+        for trader in traders:
+            trader.algorithm.trader = trader
+        loop_threads = set()
+
+        async def scenario():
+            loop_threads.add(threading.current_thread().ident)
+            await asyncio.wait_for(run_traders(traders), 30)
+
+        run(scenario())
+        assert len(loop_threads) == 1
+        assert all(t.algorithm.n_data == 3 for t in traders)
+        assert all(t.is_running is False for t in traders)
+
+
+class TestSyncAuthenticatorAdapter(TestCase):
+
+    def setUp(self):
+        self.auth = SyncAuthenticatorAdapter(MockAuthenticator())
+
+    def test_currencies(self):
+        assert self.auth.target_currency() == 'BTC'
+        assert self.auth.price_currency() == 'USD'
+
+    def test_balance(self):
+        assert run(self.auth.get_account_balance()) == 20000.0
+
+    def test_runs_off_loop_thread(self):
+        loop_thread = []
+        call_thread = []
+        self.auth.authenticator.get_holdings = \
+            lambda: call_thread.append(threading.current_thread().ident)
+
+        async def scenario():
+            loop_thread.append(threading.current_thread().ident)
+            await self.auth.get_holdings()
+
+        run(scenario())
+        assert loop_thread != call_thread
+
+    @raises(Exception)
+    def test_propagates_errors(self):
+        self.auth.authenticator.should_fail = True
+        run(self.auth.get_current_price())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for recording the HTTP traffic of a `Transport` to a `Cassette` and
+replaying it without the network
+"""
+import os
+import gzip
+import json
+import shutil
+import tempfile
+from unittest import TestCase
+from nose.tools import raises
+import requests
+
+from baibaitrader import Cassette, CassetteError, LocalExchange, Transport
+from baibaitrader import KrakenAuthenticator, PracticeAuthenticator
+from baibaitrader.Markets.LocalExchange import constant_latency
+
+
+class TestCassette(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'kraken.jsonl.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def record(self, **kwargs):
+        """
+        Record three prices and a balance from a `LocalExchange`
+        """
+        exchange = LocalExchange(prices={'XXBTZUSD': [100.0, 101.0, 102.0]},
+                                 balances={'ZUSD': 50.0, 'XXBT': 2.0},
+                                 **kwargs)
+        exchange.start()
+        try:
+            with Cassette(self.path, mode='record') as cassette:
+                transport = Transport(base_url=exchange.url, retries=5,
+                                      sleep=lambda delay: None,
+                                      cassette=cassette)
+                prices = self.query(transport)
+                transport.close()
+        finally:
+            exchange.stop()
+        return prices, exchange
+
+    def query(self, transport):
+        practice = PracticeAuthenticator(100, 'XBT', 'USD',
+                                         transport=transport)
+        kraken = KrakenAuthenticator('tests/fake_key.key', 'XBT', 'USD',
+                                     transport=transport)
+        kraken._api.secret = 'c2VjcmV0'
+        prices = [practice.get_current_price().price for _ in range(3)]
+        return prices, kraken.get_account_state()
+
+    def replay(self, **kwargs):
+        cassette = Cassette(self.path, **kwargs)
+        # Nothing listens on the recorded port any more
+        transport = Transport(base_url='http://127.0.0.1:9', retries=5,
+                              sleep=lambda delay: None, cassette=cassette)
+        return self.query(transport), transport, cassette
+
+    def test_replays_recording(self):
+        recorded, _ = self.record()
+        replayed, transport, cassette = self.replay()
+        assert replayed == recorded
+        assert recorded == ([100.0, 101.0, 102.0], (50.0, 2.0))
+        assert cassette.n_played == 4
+        assert cassette.n_remaining == 0
+
+    def test_cassette_is_compact_json_lines(self):
+        self.record()
+        with gzip.open(self.path, 'rt') as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 4
+        assert lines[-1]['request'][1] == '/0/private/Balance'
+        assert 'nonce' not in lines[-1]['request'][2]
+
+    def test_replays_retries(self):
+        recorded, exchange = self.record(error_rate=0.4, seed=4)
+        assert exchange.n_errors > 0
+        replayed, transport, cassette = self.replay()
+        assert replayed == recorded
+        assert transport.n_retries == exchange.n_errors
+
+    def test_replays_scaled_timing(self):
+        self.record(latency=constant_latency(0.05))
+        delays = []
+        self.replay(time_scale=0.5, sleep=delays.append)
+        assert len(delays) == 4
+        assert all(0.02 <= delay < 0.5 for delay in delays)
+
+    @raises(CassetteError)
+    def test_unrecorded_request(self):
+        self.record()
+        _, transport, _ = self.replay()
+        transport.api().query_public('Ticker', {'pair': 'XXBTZUSD'})
+
+    @raises(requests.ConnectionError)
+    def test_replays_connection_errors(self):
+        with Cassette(self.path, mode='record') as cassette:
+            transport = Transport(base_url='http://127.0.0.1:9', retries=1,
+                                  sleep=lambda delay: None,
+                                  cassette=cassette)
+            try:
+                transport.api().query_public('Depth', {'pair': 'XXBTZUSD'})
+            except requests.ConnectionError:
+                pass
+        transport = Transport(base_url='http://127.0.0.1:9', retries=1,
+                              sleep=lambda delay: None,
+                              cassette=Cassette(self.path))
+        transport.api().query_public('Depth', {'pair': 'XXBTZUSD'})
+
+    @raises(ValueError)
+    def test_invalid_mode(self):
+        Cassette(self.path, mode='rewind')
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `PriceCoalescer` and `CoalescingAuthenticator` to make sure that
+concurrent price lookups of the same pair share a single query
+"""
+import time
+import threading
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import (CoalescingAuthenticator, MarketDataHub,
+                          PracticeAuthenticator, PriceCoalescer,
+                          LocalExchange, Transport)
+
+from .mocks import MockAuthenticator
+
+
+class SlowAuthenticator(MockAuthenticator):
+
+    def __init__(self, release):
+        self.release = release
+        self.prices = []
+
+    def get_current_price(self):
+        self.release.wait(5)
+        return super().get_current_price()
+
+    def update_price(self, price):
+        self.prices.append(price)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPriceCoalescer(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.coalescer = PriceCoalescer(freshness=1.0, clock=self.clock)
+        self.n_fetches = 0
+
+    def fetch(self):
+        self.n_fetches += 1
+        return self.n_fetches
+
+    def test_reuses_fresh_price(self):
+        assert self.coalescer.get('XBTUSD', self.fetch) == 1
+        self.clock.now += 0.5
+        assert self.coalescer.get('XBTUSD', self.fetch) == 1
+        assert self.n_fetches == 1
+
+    def test_refetches_stale_price(self):
+        self.coalescer.get('XBTUSD', self.fetch)
+        self.clock.now += 1.5
+        assert self.coalescer.get('XBTUSD', self.fetch) == 2
+
+    def test_keys_are_separate(self):
+        self.coalescer.get('XBTUSD', self.fetch)
+        assert self.coalescer.get('ETHUSD', self.fetch) == 2
+
+    def test_errors_are_not_cached(self):
+        def fail():
+            raise RuntimeError('No price')
+
+        with self.assertRaises(RuntimeError):
+            self.coalescer.get('XBTUSD', fail)
+        assert self.coalescer.get('XBTUSD', self.fetch) == 1
+
+    @raises(ValueError)
+    def test_invalid_freshness(self):
+        PriceCoalescer(freshness=-1)
+
+
+class TestCoalescingAuthenticator(TestCase):
+
+    def test_concurrent_lookups_share_one_query(self):
+        release = threading.Event()
+        coalescer = PriceCoalescer(freshness=0)
+        inner = [SlowAuthenticator(release) for _ in range(5)]
+        auths = [CoalescingAuthenticator(auth, coalescer) for auth in inner]
+        prices = []
+        threads = [threading.Thread(
+            target=lambda a=a: prices.append(a.get_current_price()))
+            for a in auths]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert sum(auth.n_checks for auth in inner) == 1
+        assert len(prices) == 5 and len(set(prices)) == 1
+        # Only the lookups that didn't fetch are told the price
+        assert sorted(len(auth.prices) for auth in inner) == [0, 1, 1, 1, 1]
+
+    def test_errors_reach_every_caller(self):
+        auth = MockAuthenticator()
+        auth.should_fail = True
+        wrapped = CoalescingAuthenticator(auth, PriceCoalescer())
+        with self.assertRaises(Exception):
+            wrapped.get_current_price()
+
+    def test_passes_other_calls_through(self):
+        auth = MockAuthenticator()
+        wrapped = CoalescingAuthenticator(auth, PriceCoalescer())
+        wrapped.buy(1)
+        wrapped.sell(1)
+        assert wrapped.get_account_state() == (20000.0, 2.7)
+        assert auth.n_buys == 1 and auth.n_sells == 1
+        assert wrapped.target_currency() == 'BTC'
+
+    def test_keeps_fetched_order_book(self):
+        exchange = LocalExchange()
+        exchange.start()
+        transport = Transport(base_url=exchange.url)
+        try:
+            auth = PracticeAuthenticator(100, 'XBT', 'USD',
+                                         transport=transport, depth=5)
+            wrapped = CoalescingAuthenticator(auth, PriceCoalescer())
+            wrapped.get_current_price()
+            assert auth.order_book is not None
+            # Served from the coalescer this time
+            wrapped.get_current_price()
+            assert auth.order_book is not None
+            assert exchange.requests['Depth'] == 1
+        finally:
+            transport.close()
+            exchange.stop()
+
+    def test_market_specific_methods(self):
+        wrapped = CoalescingAuthenticator(
+            PracticeAuthenticator(100, 'XBT', 'USD'), PriceCoalescer())
+        assert MarketDataHub.pair_for(wrapped) == 'XXBTZUSD'
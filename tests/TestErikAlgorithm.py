@@ -297,4 +297,18 @@ class TestErikAlgorithm(TestCase):
     def test_price_is_not_low(self):
         self.alg.data = self.sample_data(100, 5, 100)
         self.alg.data.insert(0, self.sample_price(200))
-        assert self.alg.price_is_low() == False
\ No newline at end of file
+        assert self.alg.price_is_low() == False
+
+    def test_load_history_matches_process_data(self):
+        data = self.sample_data(50, 5, 100)
+        other = ErikAlgorithm(1, 1, 3.0)
+        for sample in reversed(data):
+            other.process_data([sample])
+        self.alg.load_history(list(reversed(data)))
+        assert self.alg.data == other.data
+
+    def test_load_history_keeps_newer_data(self):
+        data = self.sample_data(50, 5, 100)
+        self.alg.process_data(data[:1])
+        self.alg.load_history(data[1:])
+        assert self.alg.data == data
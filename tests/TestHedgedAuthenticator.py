@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `HedgedAuthenticator`, which hedges slow price lookups across
+several sources
+"""
+import time
+import datetime
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import HedgedAuthenticator, PriceSample
+from .mocks import MockAuthenticator
+
+
+class TimedAuthenticator(MockAuthenticator):
+    """
+    Answers price lookups with `price` after `delays[i]` seconds for the i-th
+    lookup, or `delay` once `delays` runs out
+    """
+
+    def __init__(self, price, delay=0.0, delays=(), error=None):
+        self.price = price
+        self.delay = delay
+        self.delays = list(delays)
+        self.error = error
+        self.n_prices = 0
+        self.updates = []
+
+    def get_current_price(self):
+        self.n_prices += 1
+        time.sleep(self.delays.pop(0) if self.delays else self.delay)
+        if self.error is not None:
+            raise self.error
+        return PriceSample(self.price, datetime.datetime.now(),
+                           self.target_currency(), self.price_currency())
+
+    def update_price(self, price):
+        self.updates.append(price)
+
+
+class TestHedgedAuthenticator(TestCase):
+
+    def hedged(self, *sources, **kwargs):
+        kwargs.setdefault('initial_delay', 0.05)
+        auth = HedgedAuthenticator(sources, **kwargs)
+        self.addCleanup(auth.close)
+        return auth
+
+    def test_fast_primary_is_not_hedged(self):
+        primary, secondary = TimedAuthenticator(1.0), TimedAuthenticator(2.0)
+        auth = self.hedged(primary, secondary)
+        assert auth.get_current_price().price == 1.0
+        assert secondary.n_prices == 0
+        assert auth.n_hedged == 0
+
+    def test_slow_primary_is_hedged(self):
+        primary = TimedAuthenticator(1.0, delay=1.0)
+        secondary = TimedAuthenticator(2.0)
+        auth = self.hedged(primary, secondary)
+        start = time.perf_counter()
+        price = auth.get_current_price()
+        assert time.perf_counter() - start < 0.5
+        assert price.price == 2.0
+        assert auth.n_hedge_wins == 1
+        assert primary.updates == [price]
+
+    def test_failed_primary_is_hedged_right_away(self):
+        primary = TimedAuthenticator(1.0, error=RuntimeError('down'))
+        secondary = TimedAuthenticator(2.0)
+        auth = self.hedged(primary, secondary, initial_delay=5.0)
+        start = time.perf_counter()
+        assert auth.get_current_price().price == 2.0
+        assert time.perf_counter() - start < 1.0
+
+    def test_invalid_price_is_skipped(self):
+        primary, secondary = TimedAuthenticator(0.0), TimedAuthenticator(2.0)
+        auth = self.hedged(primary, secondary)
+        assert auth.get_current_price().price == 2.0
+
+    @raises(RuntimeError)
+    def test_every_source_fails(self):
+        auth = self.hedged(TimedAuthenticator(1.0, error=IOError('a')),
+                           TimedAuthenticator(1.0, error=IOError('b')))
+        auth.get_current_price()
+
+    def test_delay_adapts_to_latency(self):
+        primary = TimedAuthenticator(1.0, delay=0.02)
+        auth = self.hedged(primary, TimedAuthenticator(2.0),
+                           initial_delay=1.0, min_samples=5)
+        assert auth.hedge_delay() == 1.0
+        for _ in range(5):
+            auth.get_current_price()
+        assert 0.02 <= auth.hedge_delay() < 0.2
+        assert auth.latency_quantile(1, 0.5) is None
+
+    def test_delay_is_bounded(self):
+        primary = TimedAuthenticator(1.0)
+        auth = self.hedged(primary, min_delay=0.1, min_samples=1)
+        auth.get_current_price()
+        assert auth.hedge_delay() == 0.1
+
+    def test_orders_go_to_primary(self):
+        primary, secondary = TimedAuthenticator(1.0), TimedAuthenticator(2.0)
+        auth = self.hedged(primary, secondary)
+        auth.buy(1)
+        auth.sell(1)
+        assert (primary.n_buys, primary.n_sells) == (1, 1)
+        assert secondary.n_buys == 0
+
+    @raises(ValueError)
+    def test_needs_sources(self):
+        HedgedAuthenticator([])
+
+    @raises(ValueError)
+    def test_sources_trade_one_pair(self):
+        other = TimedAuthenticator(1.0)
+        other.price_currency = lambda: 'EUR'
+        HedgedAuthenticator([TimedAuthenticator(1.0), other])
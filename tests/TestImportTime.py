@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests that importing the package stays cheap. Every check runs in a fresh
+interpreter, since the test process has long imported everything.
+"""
+import os
+import sys
+import json
+import subprocess
+from unittest import TestCase
+
+# `import baibaitrader` may take at most this fraction of the time numpy takes
+# to import on the same machine. Loading every dependency up front took more
+# than twice as long as numpy alone.
+IMPORT_BUDGET = 0.25
+
+HEAVY_MODULES = ['numpy', 'krakenex', 'requests', 'websocket',
+                 'websocket_server', 'dateutil', 'file_read_backwards']
+
+SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [
+    name for name in %r if name in sys.modules]}))
+"""
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_import(statement):
+    """
+    Run `statement` in a new interpreter and return how long it took and
+    which heavy modules it loaded
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c', SCRIPT % (statement, HEAVY_MODULES)],
+        cwd=root)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+class TestImportTime(TestCase):
+
+    def test_package_import_within_budget(self):
+        # Compared with numpy rather than a fixed number of seconds, so that a
+        # slow or busy machine slows both down alike
+        package = min(run_import('import baibaitrader')['elapsed']
+                      for _ in range(3))
+        numpy = min(run_import('import numpy')['elapsed'] for _ in range(3))
+        assert package < IMPORT_BUDGET * numpy, \
+            'import baibaitrader took %.3f seconds, numpy %.3f' % (package,
+                                                                   numpy)
+
+    def test_package_import_loads_no_heavy_modules(self):
+        assert run_import('import baibaitrader')['loaded'] == []
+
+    def test_parsing_a_log_loads_no_heavy_modules(self):
+        result = run_import(
+            "from baibaitrader.utils import parse_price_sample\n"
+            "parse_price_sample('2017-12-11 12:50:23 : XBT USD = 1.0')")
+        assert result['loaded'] == []
+
+    def test_trader_loads_no_heavy_modules(self):
+        result = run_import('from baibaitrader import Trader, '
+                            'PracticeAuthenticator, ErikAlgorithm')
+        assert result['loaded'] == []
+
+    def test_names_are_loaded_on_use(self):
+        result = run_import('import baibaitrader\n'
+                            'baibaitrader.AlgorithmValidator')
+        assert 'numpy' in result['loaded']
+
+
+class TestLazyNames(TestCase):
+
+    def test_name_resolves_to_class(self):
+        import baibaitrader
+        from baibaitrader.Trader import Trader
+        assert baibaitrader.Trader is Trader
+
+    def test_dir_lists_lazy_names(self):
+        import baibaitrader
+        assert 'KrakenAuthenticator' in dir(baibaitrader)
+
+    def test_unknown_name(self):
+        import baibaitrader
+        with self.assertRaises(AttributeError):
+            baibaitrader.NoSuchTrader
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the metrics in `Instrumentation` and for the timings `Trader`
+records with them
+"""
+import urllib.request
+from unittest import TestCase
+
+from baibaitrader.Instrumentation import MetricsRegistry, MetricsServer
+from baibaitrader.Trader import Trader
+
+from .mocks import MockAlgorithm, MockAuthenticator
+
+
+class TestMetricsRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_same_name_same_metric(self):
+        assert self.registry.counter('a') is self.registry.counter('a')
+
+    def test_counter(self):
+        counter = self.registry.counter('hits_total', 'Hits')
+        counter.inc(stage='x')
+        counter.inc(2, stage='x')
+        assert counter.value(stage='x') == 3
+        assert counter.value(stage='y') == 0
+
+    def test_gauge(self):
+        gauge = self.registry.gauge('interval_seconds')
+        gauge.set(5)
+        gauge.set(3)
+        assert gauge.value() == 3
+
+    def test_histogram_buckets(self):
+        histogram = self.registry.histogram('t', buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(0.5)
+        histogram.observe(7)
+        text = self.registry.render()
+        assert 't_bucket{le="0.1"} 2.0' in text
+        assert 't_bucket{le="1.0"} 3.0' in text
+        assert 't_bucket{le="+Inf"} 4.0' in text
+        assert 't_count 4.0' in text
+        assert 't_sum 7.65' in text
+
+    def test_render_labels(self):
+        self.registry.counter('c', 'Things').inc(trader='a')
+        text = self.registry.render()
+        assert '# HELP c Things' in text
+        assert '# TYPE c counter' in text
+        assert 'c{trader="a"} 1.0' in text
+
+
+class TestMetricsServer(TestCase):
+
+    def test_serves_metrics(self):
+        registry = MetricsRegistry()
+        registry.counter('served_total').inc()
+        server = MetricsServer(registry)
+        server.start()
+        try:
+            url = 'http://127.0.0.1:%d/metrics' % server.port
+            body = urllib.request.urlopen(url, timeout=5).read().decode()
+        finally:
+            server.stop()
+        assert 'served_total 1.0' in body
+
+    def test_stop_without_start(self):
+        MetricsServer(MetricsRegistry()).stop()
+
+
+class TestTraderInstrumentation(TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.trader = Trader('unit_tests', MockAuthenticator(),
+                             MockAlgorithm(), output_console=False,
+                             metrics=self.registry)
+        self.stages = self.registry.histogram('baibai_cycle_stage_seconds')
+        self.failures = self.registry.counter('baibai_cycle_failures_total')
+
+    def count(self, stage):
+        return self.stages.count(trader='unit_tests', stage=stage)
+
+    def test_times_every_stage_of_buy(self):
+        self.trader.algorithm.should_buy = True
+        self.trader.perform_one_cycle()
+        for stage in ('price_fetch', 'process_data', 'check_should_buy',
+                      'account_state', 'order'):
+            assert self.count(stage) == 1
+        assert self.count('check_should_sell') == 0
+
+    def test_times_sell_check(self):
+        self.trader.perform_one_cycle()
+        assert self.count('check_should_sell') == 1
+        assert self.count('order') == 0
+
+    def test_counts_price_failures(self):
+        self.trader.authenticator.should_fail = True
+        self.trader.perform_one_cycle()
+        assert self.failures.value(trader='unit_tests',
+                                   stage='price_fetch') == 1
+
+    def test_counts_overruns(self):
+        self.trader._cycle_overran(3)
+        overruns = self.registry.counter('baibai_scheduler_overruns_total')
+        skipped = self.registry.counter('baibai_skipped_cycles_total')
+        assert overruns.value(trader='unit_tests') == 1
+        assert skipped.value(trader='unit_tests') == 3
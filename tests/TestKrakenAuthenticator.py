@@ -42,31 +42,40 @@ class TestKrakenAuthenticator(TestCase):
         self.auth.get_current_price()
         assert self.auth._api.n_query_pub == 1
 
-    # def test_check_balance_success(self):
-    #     x = self.auth.get_account_balance()
-    #     assert x == 99.9
+    def test_check_balance_success(self):
+        x = self.auth.get_account_balance()
+        assert x == 99.9
 
-    # @raises(RuntimeError)
-    # def test_check_balance_fails(self):
-    #     self.auth._api.should_fail = True
-    #     self.auth.get_account_balance()
+    @raises(RuntimeError)
+    def test_check_balance_fails(self):
+        self.auth._api.should_fail = True
+        self.auth.get_account_balance()
 
-    # def test_check_balance_calls_api_once(self):
-    #     self.auth.get_account_balance()
-    #     assert self.auth._api.n_query_account == 1
+    def test_check_balance_calls_api_once(self):
+        self.auth.get_account_balance()
+        assert self.auth._api.n_query_private == 1
 
-    # def test_check_holdings_success(self):
-    #     x = self.auth.get_holdings()
-    #     assert x == 99.9
+    def test_check_holdings_success(self):
+        x = self.auth.get_holdings()
+        assert x == 1.5
 
-    # @raises(RuntimeError)
-    # def test_check_holdings_fails(self):
-    #     self.auth._api.should_fail = True
-    #     self.auth.get_holdings()
+    @raises(RuntimeError)
+    def test_check_holdings_fails(self):
+        self.auth._api.should_fail = True
+        self.auth.get_holdings()
+
+    def test_check_holdings_calls_api_once(self):
+        self.auth.get_holdings()
+        assert self.auth._api.n_query_private == 1
+
+    def test_account_state_calls_api_once(self):
+        assert self.auth.get_account_state() == (99.9, 1.5)
+        assert self.auth._api.n_query_private == 1
 
-    # def test_check_holdings_calls_api_once(self):
-    #     self.auth._api.get_holdings()
-    #     assert self.auth._api.n_query_holdings == 1
+    def test_missing_asset_is_zero(self):
+        auth = KrakenAuthenticator('tests/fake_key.key', 'ETH', 'JPY')
+        auth._api = MockKrakenAPI()
+        assert auth.get_account_state() == (0.0, 0.0)
 
     # def test_buy_calls_api_once(self):
     #     self.auth.buy(3.14)
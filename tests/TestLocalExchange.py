@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `LocalExchange`, the local stand-in for Kraken's REST API, and for
+`DummyAuthenticator`'s server
+"""
+import time
+from unittest import TestCase
+from nose.tools import raises
+import requests
+
+from baibaitrader import LocalExchange, Transport, Trader, MetricsRegistry
+from baibaitrader import DummyAuthenticator, KrakenAuthenticator
+from baibaitrader import PracticeAuthenticator
+from baibaitrader.Markets.LocalExchange import constant_latency
+from baibaitrader.Markets.LocalExchange import lognormal_latency, random_walk
+from .mocks import MockAlgorithm
+
+
+class TestLocalExchange(TestCase):
+
+    def setUp(self):
+        self.exchange = LocalExchange(
+            prices={'XXBTZUSD': [100.0, 101.0, 102.0],
+                    'XETHZUSD': random_walk(10.0, seed=1)},
+            balances={'ZUSD': 1000.0, 'XXBT': 1.0})
+        self.exchange.start()
+        self.transport = Transport(base_url=self.exchange.url, retries=2,
+                                   sleep=lambda delay: None)
+        self.api = self.transport.api()
+        self.api.key, self.api.secret = 'key', 'c2VjcmV0'
+
+    def tearDown(self):
+        self.transport.close()
+        self.exchange.stop()
+
+    def test_ready_on_ephemeral_port(self):
+        assert self.exchange.ready.is_set()
+        assert not self.exchange.url.endswith(':8080')
+
+    def test_price_follows_path(self):
+        auth = PracticeAuthenticator(100, 'XBT', 'USD',
+                                     transport=self.transport)
+        prices = [auth.get_current_price().price for _ in range(4)]
+        assert prices == [100.0, 101.0, 102.0, 102.0]
+
+    def test_kraken_price_is_a_number(self):
+        auth = KrakenAuthenticator('tests/fake_key.key', 'XBT', 'USD',
+                                   transport=self.transport)
+        prices = [auth.get_current_price().price for _ in range(4)]
+        assert prices == [100.0, 101.0, 102.0, 102.0]
+        assert all(type(price) is float for price in prices)
+
+    def test_practice_round_trip(self):
+        auth = PracticeAuthenticator(1000, 'XBT', 'USD',
+                                     transport=self.transport)
+        auth.buy(2.0)
+        assert auth.get_account_state() == (800.0, 2.0)
+        auth.get_current_price()
+        auth.sell(2.0)
+        assert auth.get_account_state() == (1002.0, 0.0)
+
+    def test_practice_round_trip_with_depth(self):
+        auth = PracticeAuthenticator(1000, 'XBT', 'USD',
+                                     transport=self.transport, depth=5)
+        auth.buy(1.0)
+        auth.sell(1.0)
+        balance, holdings = auth.get_account_state()
+        assert holdings == 0.0
+        # Crossing the spread twice costs something
+        assert 990.0 < balance < 1000.0
+
+    def test_depth_book(self):
+        auth = PracticeAuthenticator(100, 'XBT', 'USD',
+                                     transport=self.transport, depth=3)
+        auth.get_current_price()
+        assert len(auth.order_book.levels('asks')[0]) == 3
+        assert auth.order_book.best_bid < auth.order_book.best_ask
+
+    def test_ticker_of_several_pairs(self):
+        response = self.api.query_public('Ticker',
+                                         {'pair': 'XXBTZUSD,XETHZUSD'})
+        assert response['error'] == []
+        assert float(response['result']['XETHZUSD']['a'][0]) == 10.0
+
+    def test_unknown_pair(self):
+        response = self.api.query_public('Ticker', {'pair': 'XDOGZUSD'})
+        assert response['error'] == ['EQuery:Unknown asset pair']
+
+    def test_balance(self):
+        auth = KrakenAuthenticator('tests/fake_key.key', 'XBT', 'USD',
+                                   transport=self.transport)
+        auth._api.secret = 'c2VjcmV0'
+        assert auth.get_account_state() == (1000.0, 1.0)
+
+    def test_market_orders(self):
+        self.api.query_public('Depth', {'pair': 'XXBTZUSD'})
+        response = self.api.query_private(
+            'AddOrder', {'pair': 'XXBTZUSD', 'type': 'buy',
+                         'ordertype': 'market', 'volume': '2'})
+        assert response['result']['txid'] == ['O000001']
+        assert self.exchange.balances == {'ZUSD': 800.0, 'XXBT': 3.0}
+        self.api.query_private(
+            'AddOrder', {'pair': 'XXBTZUSD', 'type': 'sell',
+                         'ordertype': 'market', 'volume': '3'})
+        assert self.exchange.balances['XXBT'] == 0
+        assert len(self.exchange.orders) == 2
+
+    def test_insufficient_funds(self):
+        response = self.api.query_private(
+            'AddOrder', {'pair': 'XXBTZUSD', 'type': 'buy',
+                         'ordertype': 'market', 'volume': '50'})
+        assert response['error'] == ['EOrder:Insufficient funds']
+        assert self.exchange.orders == []
+
+    def test_counts_requests(self):
+        self.api.query_public('Depth', {'pair': 'XXBTZUSD'})
+        self.api.query_private('Balance')
+        assert self.exchange.requests == {'Depth': 1, 'Balance': 1}
+
+    @raises(ValueError)
+    def test_invalid_error_rate(self):
+        LocalExchange(error_rate=2)
+
+
+class TestLocalExchangeFaults(TestCase):
+
+    def tearDown(self):
+        self.exchange.stop()
+
+    def test_errors_are_retried(self):
+        self.exchange = LocalExchange(error_rate=0.5, seed=3)
+        self.exchange.start()
+        transport = Transport(base_url=self.exchange.url, retries=10,
+                              sleep=lambda delay: None)
+        auth = PracticeAuthenticator(100, 'XBT', 'USD', transport=transport)
+        for _ in range(10):
+            auth.get_current_price()
+        transport.close()
+        assert self.exchange.n_errors > 0
+        assert transport.n_retries == self.exchange.n_errors
+
+    @raises(requests.HTTPError)
+    def test_every_request_fails(self):
+        self.exchange = LocalExchange(error_rate=1.0)
+        self.exchange.start()
+        transport = Transport(base_url=self.exchange.url, retries=1,
+                              sleep=lambda delay: None)
+        try:
+            transport.api().query_public('Depth', {'pair': 'XXBTZUSD'})
+        finally:
+            transport.close()
+
+    def test_latency_per_endpoint(self):
+        self.exchange = LocalExchange(
+            latency={'Depth': constant_latency(0.1)})
+        self.exchange.start()
+        transport = Transport(base_url=self.exchange.url)
+        api = transport.api()
+        start = time.perf_counter()
+        api.query_public('Ticker', {'pair': 'XXBTZUSD'})
+        assert time.perf_counter() - start < 0.1
+        start = time.perf_counter()
+        api.query_public('Depth', {'pair': 'XXBTZUSD'})
+        assert time.perf_counter() - start >= 0.1
+        transport.close()
+
+    def test_trader_against_slow_exchange(self):
+        self.exchange = LocalExchange(
+            prices={'XXBTZUSD': random_walk(100.0, seed=2)},
+            latency=lognormal_latency(0.005, seed=2))
+        self.exchange.start()
+        transport = Transport(base_url=self.exchange.url)
+        metrics = MetricsRegistry()
+        trader = Trader('unit_tests_exchange',
+                        PracticeAuthenticator(100, 'XBT', 'USD',
+                                              transport=transport),
+                        MockAlgorithm(), update_interval=0.01,
+                        output_console=False, metrics=metrics)
+        trader.begin_trading()
+        time.sleep(0.3)
+        trader.stop_trading()
+        transport.close()
+        n_cycles = metrics.histogram('baibai_cycle_stage_seconds').count(
+            trader='unit_tests_exchange', stage='price_fetch')
+        assert n_cycles > 5
+        assert n_cycles == self.exchange.requests['Depth']
+
+
+class TestDummyAuthenticator(TestCase):
+
+    def setUp(self):
+        self.auth = DummyAuthenticator()
+        self.auth.start_server()
+
+    def tearDown(self):
+        self.auth.stop_server()
+
+    def test_serves_valid_json(self):
+        assert self.auth.get_current_price().price == 100
+        assert self.auth.get_account_balance() == 1000
+        assert self.auth.get_holdings() == 5
+
+    def test_ephemeral_port(self):
+        other = DummyAuthenticator()
+        other.start_server()
+        assert other.url != self.auth.url
+        other.stop_server()
+
+    @raises(RuntimeError)
+    def test_url_needs_server(self):
+        self.auth.stop_server()
+        self.auth.url
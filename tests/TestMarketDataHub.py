@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `MarketDataHub` to make sure that one request serves every
+registered trader
+"""
+from unittest import TestCase
+
+from baibaitrader import MarketDataHub, PracticeAuthenticator, Trader
+
+from .mocks import MockAlgorithm, MockAuthenticator, MockKrakenAPI
+
+
+class TestMarketDataHub(TestCase):
+
+    def setUp(self):
+        self.hub = MarketDataHub(output_console=False)
+        self.hub._api = MockKrakenAPI()
+
+    def trader(self, authenticator=None):
+        if authenticator is None:
+            authenticator = MockAuthenticator()
+        return Trader('unit_tests', authenticator, MockAlgorithm(),
+                      output_console=False)
+
+    def test_pair_from_currencies(self):
+        assert self.hub.pair_for(MockAuthenticator()) == 'XBTCZUSD'
+
+    def test_pair_from_authenticator(self):
+        auth = PracticeAuthenticator(100, 'XBT', 'USD')
+        assert self.hub.pair_for(auth) == 'XXBTZUSD'
+
+    def test_register(self):
+        self.hub.register(self.trader())
+        self.hub.register(self.trader(PracticeAuthenticator(100, 'XBT', 'USD')))
+        assert self.hub.pairs() == ['XBTCZUSD', 'XXBTZUSD']
+
+    def test_unregister(self):
+        trader = self.trader()
+        self.hub.register(trader)
+        self.hub.unregister(trader)
+        assert self.hub.pairs() == []
+
+    def test_no_request_without_traders(self):
+        self.hub.publish()
+        assert self.hub._api.n_query_pub == 0
+
+    def test_one_request_for_all_traders(self):
+        traders = [self.trader() for _ in range(5)]
+        traders.append(self.trader(PracticeAuthenticator(100, 'XBT', 'USD')))
+        for trader in traders:
+            self.hub.register(trader)
+        self.hub.publish()
+        assert self.hub._api.n_query_pub == 1
+        assert all(t.algorithm.n_data == 1 for t in traders)
+
+    def test_traders_do_not_fetch_price(self):
+        trader = self.trader()
+        self.hub.register(trader)
+        self.hub.publish()
+        assert trader.authenticator.n_checks == 0
+
+    def test_price_values(self):
+        prices = []
+        trader = self.trader()
+        trader.algorithm.process_data = prices.extend
+        self.hub.register(trader)
+        self.hub.publish()
+        assert prices[0].price == 500.0
+        assert prices[0].currency == 'BTC'
+        assert prices[0].price_currency == 'USD'
+
+    def test_updates_practice_price(self):
+        auth = PracticeAuthenticator(1000, 'XBT', 'USD')
+        auth._api = MockKrakenAPI()
+        trader = self.trader(auth)
+        trader.algorithm.should_buy = True
+        trader.algorithm.buy_volume = 1.0
+        self.hub.register(trader)
+        self.hub.publish()
+        assert auth.last_price.price == 500.0
+        assert auth._api.n_query_pub == 0
+        assert auth.get_account_balance() == 500.0
+
+    def test_failed_request_skips_update(self):
+        trader = self.trader()
+        self.hub.register(trader)
+        self.hub._api.should_fail = True
+        self.hub.publish()
+        assert trader.algorithm.n_data == 0
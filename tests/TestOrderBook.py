@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `OrderBook` and the order book aware fills of
+`PracticeAuthenticator` and `AlgorithmValidator`
+"""
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import OrderBook, PracticeAuthenticator, AlgorithmValidator
+from .mocks import MockAlgorithm
+
+log_file = 'tests/test_log.log'
+
+DEPTH = {'asks': [['101.0', '1.0', 1], ['100.0', '2.0', 1],
+                  ['102.0', '5.0', 1]],
+         'bids': [['98.0', '1.0', 1], ['99.0', '2.0', 1]]}
+
+
+class DepthAPI:
+    """
+    Answers `Depth` queries with `DEPTH`
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def query_public(self, endpoint, json, timeout=None):
+        self.queries.append((endpoint, json))
+        return {'error': [], 'result': {'XXBTZUSD': DEPTH}}
+
+
+class TestOrderBook(TestCase):
+
+    def setUp(self):
+        self.book = OrderBook.from_depth(DEPTH)
+
+    def test_levels_are_sorted(self):
+        prices, volumes = self.book.levels('asks')
+        assert list(prices) == [100.0, 101.0, 102.0]
+        assert list(volumes) == [2.0, 1.0, 5.0]
+        prices, _ = self.book.levels('bids')
+        assert list(prices) == [99.0, 98.0]
+
+    def test_best_prices(self):
+        assert self.book.best_ask == 100.0
+        assert self.book.best_bid == 99.0
+        assert self.book.mid == 99.5
+
+    def test_cost_within_first_level(self):
+        assert self.book.cost('buy', 1.5) == 150.0
+
+    def test_vwap_across_levels(self):
+        assert self.book.cost('buy', 4.0) == 200.0 + 101.0 + 102.0
+        assert self.book.vwap('buy', 4.0) == 403.0 / 4
+        assert self.book.vwap('sell', 3.0) == (198.0 + 98.0) / 3
+
+    def test_impact(self):
+        assert self.book.impact('buy', 1.0) == 100.0 / 99.5
+        assert self.book.impact('sell', 1.0) == 99.0 / 99.5
+
+    def test_update_level(self):
+        self.book.update('asks', 100.0, 4.0)
+        self.book.update('asks', 99.5, 1.0)
+        prices, volumes = self.book.levels('asks')
+        assert list(prices) == [99.5, 100.0, 101.0, 102.0]
+        assert list(volumes) == [1.0, 4.0, 1.0, 5.0]
+        assert self.book.cost('buy', 3.0) == 99.5 + 200.0
+
+    def test_remove_level(self):
+        self.book.update('bids', 99.0, 0)
+        assert self.book.best_bid == 98.0
+        self.book.update('bids', 50.0, 0)
+        assert len(self.book.levels('bids')[0]) == 1
+
+    def test_truncate(self):
+        self.book.truncate(1)
+        assert list(self.book.levels('asks')[0]) == [100.0]
+        assert list(self.book.levels('bids')[0]) == [99.0]
+
+    def test_empty_book(self):
+        book = OrderBook()
+        assert book.best_ask is None
+        assert book.mid is None
+
+    @raises(ValueError)
+    def test_insufficient_liquidity(self):
+        self.book.cost('buy', 8.5)
+
+    @raises(ValueError)
+    def test_non_positive_volume(self):
+        self.book.cost('sell', 0)
+
+    @raises(ValueError)
+    def test_invalid_side(self):
+        self.book.update('offers', 100.0, 1.0)
+
+
+class TestPracticeDepth(TestCase):
+
+    def setUp(self):
+        self.auth = PracticeAuthenticator(1000, 'XBT', 'USD', depth=10)
+        self.auth._api = DepthAPI()
+
+    def test_price_is_best_ask(self):
+        assert self.auth.get_current_price().price == 100.0
+        assert self.auth._api.queries[0][1]['count'] == '10'
+
+    def test_buy_walks_the_book(self):
+        self.auth.get_current_price()
+        self.auth.buy(3.0)
+        assert self.auth.get_holdings() == 3.0
+        assert self.auth.get_account_balance() == 1000 - 301.0
+
+    def test_sell_walks_the_book(self):
+        self.auth.get_current_price()
+        self.auth.buy(3.0)
+        self.auth.sell(3.0)
+        assert self.auth.get_account_balance() == 1000 - 301.0 + 296.0
+
+    def test_book_fetched_after_update_price(self):
+        self.auth.get_current_price()
+        self.auth.update_price(self.auth.last_price)
+        self.auth.buy(1.0)
+        assert len(self.auth._api.queries) == 2
+
+    @raises(ValueError)
+    def test_insufficient_liquidity(self):
+        self.auth.buy(9.0)
+
+
+class TestValidatorOrderBook(TestCase):
+
+    def test_trades_pay_impact(self):
+        book = OrderBook([(100.0, 1.0), (110.0, 100.0)],
+                         [(100.0, 1.0), (90.0, 100.0)])
+        tester = AlgorithmValidator(log_file, MockAlgorithm(), 5.0, 311.0,
+                                    order_book=book)
+        tester.algorithm.should_buy = True
+        tester.simulate_trading()
+        assert tester.buys
+        for buy in tester.buys:
+            sample = [s for s in tester.sample_history
+                      if s.date == buy.date][0]
+            assert buy.price == sample.price * book.impact('buy', buy.shares)
+            assert buy.price > sample.price
+
+    def test_thin_book_skips_trades(self):
+        book = OrderBook([(100.0, 1e-9)], [(100.0, 1e-9)])
+        tester = AlgorithmValidator(log_file, MockAlgorithm(), 5.0, 311.0,
+                                    order_book=book)
+        tester.algorithm.should_buy = True
+        tester.simulate_trading()
+        assert tester.buys == []
+        assert tester.balance == 311.0
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `OrderWorker` and for trading with orders placed off the trading
+thread
+"""
+import time
+import queue
+import threading
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import OrderWorker, Trader
+
+from .mocks import MockAlgorithm, MockAuthenticator
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class RecordingAlgorithm(MockAlgorithm):
+
+    def __init__(self):
+        self.filled = []
+        self.failed = []
+
+    def order_filled(self, side, volume, price):
+        self.filled.append((side, volume))
+
+    def order_failed(self, side, volume, price, error):
+        self.failed.append((side, volume, error))
+
+
+class TestOrderWorker(TestCase):
+
+    def setUp(self):
+        self.worker = OrderWorker(timeout=1.0)
+        self.worker.start()
+
+    def tearDown(self):
+        self.worker.stop(5)
+
+    def test_success_callback(self):
+        results = []
+        self.worker.submit(lambda x: x * 2, 21, on_success=results.append)
+        assert wait_for(lambda: results == [42])
+        assert self.worker.n_completed == 1
+
+    def test_failure_callback(self):
+        errors = []
+
+        def fail():
+            raise RuntimeError('Rejected')
+
+        self.worker.submit(fail, on_failure=errors.append)
+        assert wait_for(lambda: len(errors) == 1)
+        assert isinstance(errors[0], RuntimeError)
+        assert self.worker.n_failed == 1
+
+    def test_orders_run_in_order(self):
+        placed = []
+        for i in range(10):
+            self.worker.submit(placed.append, i)
+        self.worker.stop(5)
+        assert placed == list(range(10))
+
+    def test_timeout_cancels_order(self):
+        release = threading.Event()
+        placed = []
+        errors = []
+        worker = OrderWorker(timeout=0.05, max_workers=1)
+        worker.start()
+        worker.submit(release.wait, 5)
+        # Can't start while the first order holds the only thread
+        worker.submit(placed.append, 1, on_failure=errors.append)
+        assert wait_for(lambda: len(errors) == 1)
+        release.set()
+        worker.stop(5)
+        assert isinstance(errors[0], TimeoutError)
+        assert worker.n_timed_out == 1
+        assert placed == []
+
+    def test_overdue_order_is_tracked(self):
+        release = threading.Event()
+        results = []
+        errors = []
+        timeouts = []
+        worker = OrderWorker(timeout=0.05)
+        worker.start()
+        worker.submit(release.wait, 5, on_success=results.append,
+                      on_failure=errors.append, on_timeout=timeouts.append)
+        assert wait_for(lambda: worker.n_overdue == 1)
+        assert len(timeouts) == 1
+        assert isinstance(timeouts[0], TimeoutError)
+        assert results == []
+        release.set()
+        assert wait_for(lambda: results == [True])
+        worker.stop(5)
+        assert errors == []
+        assert worker.n_timed_out == 0
+        assert worker.n_completed == 1
+
+    def test_callback_errors_are_reported(self):
+        errors = []
+        worker = OrderWorker(on_error=errors.append)
+        worker.start()
+
+        def broken(result):
+            raise KeyError('broken')
+
+        worker.submit(lambda: None, on_success=broken)
+        worker.submit(lambda: None)
+        worker.stop(5)
+        assert len(errors) == 1
+        assert worker.n_completed == 2
+
+    @raises(queue.Full)
+    def test_queue_is_bounded(self):
+        worker = OrderWorker(max_pending=2)
+        for _ in range(3):
+            worker.submit(lambda: None)
+
+    @raises(ValueError)
+    def test_invalid_max_pending(self):
+        OrderWorker(max_pending=0)
+
+
+class TestTraderOrderWorker(TestCase):
+
+    def setUp(self):
+        self.worker = OrderWorker(timeout=1.0)
+        self.worker.start()
+        self.algorithm = RecordingAlgorithm()
+        self.trader = Trader('unit_tests', MockAuthenticator(), self.algorithm,
+                             output_console=False, order_worker=self.worker)
+
+    def tearDown(self):
+        self.worker.stop(5)
+
+    def test_order_is_queued(self):
+        self.algorithm.should_buy = True
+        self.trader.perform_one_cycle()
+        self.worker.stop(5)
+        assert self.trader.authenticator.n_buys == 1
+        assert self.algorithm.filled == [('buy', 50.0)]
+
+    def test_slow_order_does_not_block_cycle(self):
+        release = threading.Event()
+        self.trader.authenticator.sell = lambda n: release.wait(5)
+        self.algorithm.should_sell = True
+        start = time.perf_counter()
+        self.trader.perform_one_cycle()
+        self.trader.perform_one_cycle()
+        elapsed = time.perf_counter() - start
+        release.set()
+        assert elapsed < 0.5
+        assert self.trader.authenticator.n_checks == 2
+
+    def test_failed_order_is_reported(self):
+        self.trader.authenticator.should_fail = True
+        self.algorithm.should_buy = True
+        self.trader.process_price(MockAuthenticator().get_current_price())
+        self.worker.stop(5)
+        assert len(self.algorithm.failed) == 1
+        assert self.algorithm.failed[0][0] == 'buy'
+
+    def test_full_queue_fails_order(self):
+        worker = OrderWorker(max_pending=1)
+        traders = [Trader('unit_tests', MockAuthenticator(), self.algorithm,
+                          output_console=False, order_worker=worker)
+                   for _ in range(2)]
+        self.algorithm.should_buy = True
+        for trader in traders:
+            trader.perform_one_cycle()
+        assert len(self.algorithm.failed) == 1
+        assert isinstance(self.algorithm.failed[0][2], RuntimeError)
+
+    def test_no_order_while_one_is_in_flight(self):
+        release = threading.Event()
+        sells = []
+        self.trader.authenticator.sell = lambda n: sells.append(n) or \
+            release.wait(5)
+        self.algorithm.should_sell = True
+        self.trader.perform_one_cycle()
+        self.trader.perform_one_cycle()
+        release.set()
+        self.worker.stop(5)
+        assert len(sells) == 1
+        assert self.algorithm.filled == [('sell', 25.0)]
+        self.trader.perform_one_cycle()
+        assert self.trader.authenticator.n_holdings == 2
+
+    def test_hung_order_does_not_block_later_orders(self):
+        worker = OrderWorker(timeout=0.05)
+        worker.start()
+        trader = Trader('unit_tests', MockAuthenticator(), self.algorithm,
+                        output_console=False, order_worker=worker)
+        hung = threading.Event()
+        sells = []
+        trader.authenticator.sell = lambda n: sells.append(n) or \
+            (len(sells) > 1 or hung.wait(5))
+        self.algorithm.should_sell = True
+        trader.perform_one_cycle()
+        assert wait_for(lambda: len(self.algorithm.failed) == 1)
+        assert isinstance(self.algorithm.failed[0][2], TimeoutError)
+        trader.perform_one_cycle()
+        assert wait_for(lambda: self.algorithm.filled == [('sell', 25.0)])
+        assert sells == [25.0, 25.0]
+        # The hung order is still logged and reported once it returns
+        hung.set()
+        assert wait_for(lambda: len(self.algorithm.filled) == 2)
+        worker.stop(5)
+        assert len(self.algorithm.failed) == 1
+        assert not trader._orders_in_flight
+
+    def test_account_state_refetched_after_submit(self):
+        self.worker.stop(5)
+        self.algorithm.should_sell = True
+        self.trader._account_snapshot = (time.monotonic(), 0.0, 0.0)
+        self.trader.perform_one_cycle()
+        assert self.trader._account_snapshot is None
+
+    def test_inline_orders_notify_algorithm(self):
+        trader = Trader('unit_tests', MockAuthenticator(), self.algorithm,
+                        output_console=False)
+        self.algorithm.should_sell = True
+        trader.perform_one_cycle()
+        assert self.algorithm.filled == [('sell', 25.0)]
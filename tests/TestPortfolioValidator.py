@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This file contains unit tests to ensure that `PortfolioValidator` replays
+several logs in order and keeps a single shared balance
+"""
+import os
+import shutil
+import tempfile
+import numpy as np
+from unittest import TestCase
+
+from baibaitrader import PortfolioValidator, PriceLogCache
+
+from .mocks import MockAlgorithm
+
+log_file = 'tests/test_log.log'
+eth_lines = ['2017-12-11 12:50:00 : ETH USD = 450.00000',
+             '2017-12-11 12:55:00 : ETH USD = 460.00000',
+             '2017-12-11 13:05:00 : ETH USD = 470.00000']
+
+
+class TestPortfolioValidator(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.eth_log = os.path.join(self.dir, 'eth.log')
+        with open(self.eth_log, 'w') as f:
+            f.write('\n'.join(eth_lines))
+        self.xbt = MockAlgorithm()
+        self.eth = MockAlgorithm()
+        self.validator = PortfolioValidator(
+            [(log_file, self.xbt, 1.0), (self.eth_log, self.eth, 2.0)], 1000.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_merged_samples_in_order(self):
+        dates = [s.date for _, s in self.validator.merged_samples()]
+        assert len(dates) == 11
+        assert dates == sorted(dates)
+
+    def test_merged_samples_keep_pair(self):
+        for i, sample in self.validator.merged_samples():
+            assert sample.currency == ['XBT', 'ETH'][i]
+
+    def test_each_algorithm_sees_own_pair(self):
+        self.validator.simulate_trading()
+        assert self.xbt.n_data == 8
+        assert self.eth.n_data == 3
+
+    def test_shared_balance(self):
+        self.xbt.should_sell = True
+        self.xbt.sell_volume = 0.01
+        self.eth.should_buy = True
+        self.eth.buy_volume = 0.1
+        self.validator.simulate_trading()
+        sold = sum(s.total for s in self.validator.sells)
+        bought = sum(b.total for b in self.validator.buys)
+        assert np.isclose(self.validator.balance, 1000.0 + sold - bought)
+        assert np.allclose(self.validator.holdings, [0.92, 2.3])
+
+    def test_rejects_buys_without_funds(self):
+        self.xbt.should_buy = True
+        self.xbt.buy_volume = 1.0
+        self.validator.simulate_trading()
+        assert self.validator.buys == []
+        assert len(self.validator.rejected) == 8
+        assert self.validator.balance == 1000.0
+
+    def test_rejects_sells_without_holdings(self):
+        self.eth.should_sell = True
+        self.eth.sell_volume = 1.5
+        self.validator.simulate_trading()
+        assert len(self.validator.sells) == 1
+        assert len(self.validator.rejected) == 2
+
+    def test_history(self):
+        self.eth.should_buy = True
+        self.eth.buy_volume = 0.1
+        self.validator.simulate_trading()
+        assert len(self.validator.balance_history) == 4
+        assert len(self.validator.holdings_history[0]) == 1
+        assert len(self.validator.holdings_history[1]) == 4
+
+    def test_cache_gives_same_stream(self):
+        cache = PriceLogCache(os.path.join(self.dir, 'cache'))
+        cached = PortfolioValidator(
+            [(log_file, MockAlgorithm(), 1.0),
+             (self.eth_log, MockAlgorithm(), 2.0)], 1000.0, cache=cache,
+            chunk_size=2)
+        assert list(cached.merged_samples()) == \
+            list(self.validator.merged_samples())
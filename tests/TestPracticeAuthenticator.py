@@ -54,6 +54,15 @@ class TestPracticeAuthenticator(TestCase):
         x = self.auth.get_holdings()
         assert x == 10.1
 
+    def test_string_prices_are_converted(self):
+        # Kraken sends prices as strings
+        self.auth._api.query_public = lambda method, data: {
+            'error': [], 'result': {'XXBTZUSD': {'asks': [['500.0', '1', 1]]}}}
+        assert self.auth.get_current_price().price == 500.0
+        self.auth._account_balance = 1000
+        self.auth.buy(2)
+        assert self.auth.get_account_balance() == 0
+
     def test_buy_success(self):
         self.auth._account_balance = 1000
         self.auth.buy(2)  # $500/share (see MockKrakenAPI)
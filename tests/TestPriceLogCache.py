@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `PriceLogCache` to make sure cached logs read back exactly like the
+original log and that changed logs are never served from a stale entry
+"""
+import os
+import time
+import shutil
+import datetime
+import tempfile
+from unittest import TestCase
+
+from baibaitrader import AlgorithmValidator, PriceLogCache
+from baibaitrader.utils import read_price_history, resample_price_history
+
+from .mocks import MockAlgorithm
+
+test_log = 'tests/test_log.log'
+
+
+class TestPriceLogCache(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.dir, 'prices.log')
+        shutil.copy(test_log, self.log)
+        self.cache = PriceLogCache(os.path.join(self.dir, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def entries(self):
+        return [name for name in os.listdir(self.cache.cache_dir)
+                if not name.startswith('.')]
+
+    def test_matches_read_price_history(self):
+        assert self.cache.read_price_history(self.log) == \
+            read_price_history(self.log)
+
+    def test_cached_read_matches(self):
+        self.cache.read_price_history(self.log)
+        assert self.cache.read_price_history(self.log) == \
+            read_price_history(self.log)
+
+    def test_creates_one_entry(self):
+        self.cache.load(self.log)
+        self.cache.load(self.log)
+        assert len(self.entries()) == 1
+
+    def test_loads_memory_mapped(self):
+        self.cache.load(self.log)
+        dates, prices, _, _ = self.cache.load(self.log)
+        assert prices.base is not None
+        assert len(dates) == 8
+
+    def test_changed_log_is_reparsed(self):
+        self.cache.load(self.log)
+        with open(self.log, 'a') as f:
+            f.write('\n2017-12-11 13:10:00 : XBT USD = 16000.00000\n')
+        samples = self.cache.read_price_history(self.log)
+        assert len(samples) == 9
+        assert samples[0].price == 16000.0
+
+    def test_changed_log_replaces_entry(self):
+        self.cache.load(self.log)
+        with open(self.log, 'a') as f:
+            f.write('\n2017-12-11 13:10:00 : XBT USD = 16000.00000\n')
+        self.cache.load(self.log)
+        assert len(self.entries()) == 1
+
+    def test_evicts_least_recently_used(self):
+        other = os.path.join(self.dir, 'other.log')
+        shutil.copy(test_log, other)
+        self.cache.max_bytes = 0
+        self.cache.load(self.log)
+        self.cache.load(other)
+        assert self.entries() == [self.cache.fingerprint(other)]
+
+    def test_empty_log(self):
+        empty = os.path.join(self.dir, 'empty.log')
+        open(empty, 'w').close()
+        assert self.cache.read_price_history(empty) == []
+
+    def test_clear(self):
+        self.cache.load(self.log)
+        self.cache.clear()
+        assert self.entries() == []
+
+    def test_history_is_lazy(self):
+        history = self.cache.read_price_history(self.log)
+        expected = read_price_history(self.log)
+        assert len(history) == 8
+        assert history[0] == expected[0]
+        assert history[-1] == expected[-1]
+        assert history[2:5] == expected[2:5]
+        assert list(history) == expected
+
+    def test_history_arrays(self):
+        history = self.cache.read_price_history(self.log)
+        dates, prices = history.arrays()
+        assert prices.tolist() == [sample.price for sample in history]
+        assert dates.tolist() == [sample.date for sample in history]
+
+    def test_history_select(self):
+        with open(self.log, 'a') as f:
+            f.write('\n2017-12-11 13:10:00 : ETH USD = 500.00000\n')
+        history = self.cache.read_price_history(self.log)
+        assert len(history.select('ETH', 'USD')) == 1
+        after = datetime.datetime(2017, 12, 11, 12, 59)
+        assert history.select('XBT', 'USD', after) == \
+            read_price_history(self.log, after_date=after)[1:]
+
+    def test_history_select_keeps_boundary_sample(self):
+        history = self.cache.read_price_history(self.log)
+        after = datetime.datetime(2017, 12, 11, 12, 55, 32)
+        selected = history.select(after_date=after)
+        assert selected == read_price_history(self.log, after_date=after)
+        assert selected[-1].date == after
+
+    def test_resample_history(self):
+        history = self.cache.read_price_history(self.log)
+        assert resample_price_history(history, 120) == \
+            resample_price_history(read_price_history(self.log), 120)
+
+    def test_large_log_opens_without_parsing(self):
+        start = datetime.datetime(2017, 1, 1)
+        with open(self.log, 'w') as f:
+            for i in range(200000):
+                date = start + datetime.timedelta(seconds=i)
+                f.write('%s : XBT USD = %.1f\n' % (date, 1000.0 + i % 100))
+        self.cache.load(self.log)
+        begin = time.perf_counter()
+        validator = AlgorithmValidator(self.log, MockAlgorithm(), 5.0, 311.0,
+                                       cache=self.cache)
+        elapsed = time.perf_counter() - begin
+        assert len(validator.sample_history) == 200000
+        # Creating a sample per line takes several times longer than this
+        assert elapsed < 0.05, 'Opening the log took %.3f seconds' % elapsed
+
+    def test_validator_uses_cache(self):
+        validator = AlgorithmValidator(self.log, MockAlgorithm(), 5.0, 311.0,
+                                       cache=self.cache)
+        assert validator.sample_history == read_price_history(self.log)
+        assert len(self.entries()) == 1
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for push based price streams, the coalescing dispatcher and trading on
+streamed prices
+"""
+import time
+import datetime
+import threading
+from unittest import TestCase
+
+from baibaitrader import (KrakenPriceStream, LocalTickerServer, PriceSample,
+                          PracticeAuthenticator, PriceStream, Trader)
+from baibaitrader.Markets.PriceStream import CoalescingDispatcher
+
+from .mocks import MockAlgorithm, MockAuthenticator
+
+
+def sample(price, currency='BTC', price_currency='USD'):
+    return PriceSample(price, datetime.datetime.now(), currency,
+                       price_currency)
+
+
+class ManualStream(PriceStream):
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class TestParseTicker(TestCase):
+
+    def test_ticker_message(self):
+        message = ('[42, {"a": ["16200.50000", 1, "1.000"], '
+                   '"b": ["16200.40000", 2, "2.000"]}, "ticker", "XBT/USD"]')
+        price = KrakenPriceStream.parse_ticker(message)
+        assert price.price == 16200.5
+        assert price.currency == 'XBT'
+        assert price.price_currency == 'USD'
+
+    def test_event_message(self):
+        message = '{"event": "heartbeat"}'
+        assert KrakenPriceStream.parse_ticker(message) is None
+
+    def test_other_channel(self):
+        message = '[42, [["16200.5", "0.1", "1.0", "b", "m", ""]], ' \
+                  '"trade", "XBT/USD"]'
+        assert KrakenPriceStream.parse_ticker(message) is None
+
+
+class TestCoalescingDispatcher(TestCase):
+
+    def test_delivers(self):
+        received = []
+        dispatcher = CoalescingDispatcher(received.append)
+        dispatcher.start()
+        dispatcher.push(sample(1.0))
+        assert wait_for(lambda: len(received) == 1)
+        dispatcher.stop(1)
+        assert received[0].price == 1.0
+
+    def test_coalesces_while_busy(self):
+        release = threading.Event()
+        received = []
+
+        def slow(price):
+            received.append(price)
+            release.wait(5)
+
+        dispatcher = CoalescingDispatcher(slow)
+        dispatcher.start()
+        dispatcher.push(sample(1.0))
+        assert wait_for(lambda: len(received) == 1)
+        for price in range(2, 12):
+            dispatcher.push(sample(float(price)))
+        release.set()
+        assert wait_for(lambda: len(received) == 2)
+        time.sleep(0.05)
+        dispatcher.stop(1)
+        assert [p.price for p in received] == [1.0, 11.0]
+        assert dispatcher.n_coalesced == 9
+
+    def test_errors_are_reported(self):
+        errors = []
+
+        def fail(price):
+            raise RuntimeError('failed')
+
+        dispatcher = CoalescingDispatcher(fail, on_error=errors.append)
+        dispatcher.start()
+        dispatcher.push(sample(1.0))
+        dispatcher.push(sample(2.0))
+        assert wait_for(lambda: len(errors) >= 1)
+        dispatcher.stop(1)
+        assert isinstance(errors[0], RuntimeError)
+
+
+class TestTraderStreaming(TestCase):
+
+    def setUp(self):
+        self.stream = ManualStream()
+        self.auth = MockAuthenticator()
+        self.trader = Trader('unit_tests', self.auth, MockAlgorithm(),
+                             output_console=False)
+
+    def tearDown(self):
+        self.trader.stop_trading()
+
+    def test_processes_streamed_price(self):
+        self.trader.begin_streaming(self.stream)
+        self.stream.publish(sample(500.0))
+        assert wait_for(lambda: self.trader.algorithm.n_data == 1)
+        assert self.auth.n_checks == 0
+
+    def test_ignores_other_pairs(self):
+        self.trader.begin_streaming(self.stream)
+        self.stream.publish(sample(500.0, 'ETH'))
+        self.stream.publish(sample(500.0, 'BTC', 'EUR'))
+        time.sleep(0.05)
+        assert self.trader.algorithm.n_data == 0
+
+    def test_stop_unsubscribes(self):
+        self.trader.begin_streaming(self.stream)
+        self.trader.stop_trading()
+        self.stream.publish(sample(500.0))
+        time.sleep(0.05)
+        assert self.trader.algorithm.n_data == 0
+        assert not self.trader.is_running
+
+    def test_updates_authenticator_price(self):
+        auth = PracticeAuthenticator(100, 'XBT', 'USD')
+        trader = Trader('unit_tests', auth, MockAlgorithm(),
+                        output_console=False)
+        trader.begin_streaming(self.stream)
+        self.stream.publish(sample(321.0, 'XBT'))
+        assert wait_for(lambda: trader.algorithm.n_data == 1)
+        trader.stop_trading()
+        assert auth.last_price.price == 321.0
+
+
+class TestLocalTickerServer(TestCase):
+
+    def setUp(self):
+        self.server = LocalTickerServer()
+        self.server.start()
+        self.stream = KrakenPriceStream(['XBT/USD'], url=self.server.url)
+
+    def tearDown(self):
+        self.stream.stop()
+        self.server.stop()
+
+    def test_stream_receives_prices(self):
+        received = []
+        self.stream.subscribe(received.append)
+        self.stream.start()
+        assert self.server.wait_for_subscribers('XBT/USD')
+        self.server.publish('XBT/USD', 16200.5)
+        self.server.publish('ETH/USD', 1200.0)
+        assert wait_for(lambda: len(received) == 1)
+        assert received[0].price == 16200.5
+        assert received[0].currency == 'XBT'
+
+    def test_trader_reacts_to_stream(self):
+        auth = PracticeAuthenticator(100, 'XBT', 'USD')
+        trader = Trader('unit_tests', auth, MockAlgorithm(),
+                        output_console=False)
+        trader.begin_streaming(self.stream)
+        self.stream.start()
+        assert self.server.wait_for_subscribers('XBT/USD')
+        self.server.publish('XBT/USD', 100.0)
+        assert wait_for(lambda: trader.algorithm.n_data == 1)
+        trader.stop_trading()
+        assert auth.last_price.price == 100.0
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `RateGovernor`, the client side model of Kraken's call counter
+"""
+import time
+import threading
+from unittest import TestCase
+from nose.tools import raises
+
+from unittest import mock
+from baibaitrader import RateGovernor, RateLimitExceeded, Transport
+from baibaitrader import LocalExchange, PracticeAuthenticator, Trader
+from baibaitrader import MetricsRegistry
+from baibaitrader.Markets import Transport as transport_module
+from baibaitrader.Markets.RateGovernor import HIGH, NORMAL, LOW
+from baibaitrader.Markets.Transport import default_transport
+
+from .TestTransport import StandInServer
+from .mocks import MockAlgorithm
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateGovernor(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.governor = RateGovernor(max_counter=10, decay_rate=1.0,
+                                     low_reserve=2, max_wait=0,
+                                     clock=self.clock)
+
+    def test_costs(self):
+        assert self.governor.cost_for('Balance') == 1
+        assert self.governor.cost_for('Ledgers') == 2
+        assert self.governor.cost_for('AddOrder') == 0
+        assert self.governor.cost_for('Depth', private=False) == 0
+
+    def test_priorities(self):
+        assert RateGovernor.priority_for('AddOrder', True) == HIGH
+        assert RateGovernor.priority_for('Balance', True) == NORMAL
+        assert RateGovernor.priority_for('Depth', False) == LOW
+
+    def test_counts_queries(self):
+        for _ in range(4):
+            self.governor.acquire(2)
+        assert self.governor.counter == 8
+
+    def test_counter_decays(self):
+        self.governor.acquire(5)
+        self.clock.now += 3
+        assert self.governor.counter == 2
+        self.clock.now += 10
+        assert self.governor.counter == 0
+
+    @raises(RateLimitExceeded)
+    def test_rejects_over_limit(self):
+        for _ in range(11):
+            self.governor.acquire(1)
+
+    def test_low_priority_leaves_reserve(self):
+        for _ in range(8):
+            self.governor.acquire(1, LOW)
+        with self.assertRaises(RateLimitExceeded):
+            self.governor.acquire(1, LOW)
+        self.governor.acquire(2, HIGH)
+        assert self.governor.counter == 10
+        assert self.governor.n_shed == 1
+
+    def test_free_queries_never_wait(self):
+        self.governor.penalize()
+        for _ in range(100):
+            self.governor.acquire(0, LOW)
+        assert self.governor.n_admitted == 100
+
+    def test_penalize_fills_counter(self):
+        self.governor.penalize()
+        assert self.governor.counter == 10
+        assert self.governor.address.counter == 0
+
+    def test_penalize_public_fills_address_limit(self):
+        self.governor.penalize(private=False)
+        assert self.governor.address.counter == 20
+        assert self.governor.counter == 0
+
+    def test_admit_counts_every_request_by_address(self):
+        self.governor.admit('Depth', False)
+        self.governor.admit('Balance', True)
+        self.governor.admit('AddOrder', True)
+        assert self.governor.counter == 1
+        assert self.governor.address.counter == 3
+
+    def test_polls_leave_room_for_orders(self):
+        for _ in range(15):
+            self.governor.admit('Depth', False)
+        with self.assertRaises(RateLimitExceeded):
+            self.governor.admit('Depth', False)
+        for _ in range(5):
+            self.governor.admit('AddOrder', True)
+        assert self.governor.address.counter == 20
+        assert self.governor.address.n_shed == 1
+
+    @raises(ValueError)
+    def test_invalid_reserve(self):
+        RateGovernor(max_counter=5, low_reserve=5)
+
+
+class TestRateGovernorWaiting(TestCase):
+
+    def test_waits_for_decay(self):
+        governor = RateGovernor(max_counter=2, decay_rate=20.0, low_reserve=0)
+        start = time.monotonic()
+        for _ in range(4):
+            governor.acquire(1)
+        assert time.monotonic() - start >= 0.09
+        assert governor.n_waited == 2
+
+    def test_high_priority_goes_first(self):
+        governor = RateGovernor(max_counter=1, decay_rate=10.0,
+                                low_reserve=0, shed_low=False)
+        governor.acquire(1)
+        order = []
+
+        def query(priority, name):
+            governor.acquire(1, priority)
+            order.append(name)
+
+        threads = [threading.Thread(target=query, args=(NORMAL, 'normal')),
+                   threading.Thread(target=query, args=(LOW, 'low'))]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.02)
+        high = threading.Thread(target=query, args=(HIGH, 'high'))
+        high.start()
+        for thread in threads + [high]:
+            thread.join(5)
+        assert order[0] == 'high'
+        assert order[-1] == 'low'
+
+    def test_orders_go_ahead_of_polls(self):
+        governor = RateGovernor(address_max=1, address_rate=10.0,
+                                address_reserve=0)
+        governor.admit('Depth', False)
+        order = []
+
+        def query(method, private):
+            governor.admit(method, private)
+            order.append(method)
+
+        poll = threading.Thread(target=query, args=('Depth', False))
+        poll.start()
+        time.sleep(0.02)
+        add = threading.Thread(target=query, args=('AddOrder', True))
+        add.start()
+        for thread in (poll, add):
+            thread.join(5)
+        assert order == ['AddOrder', 'Depth']
+        assert governor.address.n_waited == 2
+
+
+class TestGovernedTransport(TestCase):
+
+    def setUp(self):
+        self.server = StandInServer()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_price_polls_are_not_counted(self):
+        governor = RateGovernor(max_counter=5, decay_rate=0.01, low_reserve=2,
+                                address_rate=1000.0)
+        transport = Transport(base_url=self.server.url, governor=governor)
+        api = transport.api()
+        for _ in range(20):
+            api.query_public('Depth')
+        transport.close()
+        assert len(self.server.requests) == 20
+        assert governor.counter == 0
+        assert governor.address.n_admitted == 20
+
+    def test_public_rate_limit_penalizes_address(self):
+        governor = RateGovernor()
+        transport = Transport(base_url=self.server.url, governor=governor)
+        self.server.errors = ['EGeneral:Too many requests']
+        transport.api().query_public('Depth')
+        transport.close()
+        assert governor.address.counter > 19
+        assert governor.counter == 0
+
+    def test_default_transport_is_governed(self):
+        assert isinstance(default_transport().governor, RateGovernor)
+
+
+class TestDefaultTransportPolling(TestCase):
+
+    def setUp(self):
+        self.exchange = LocalExchange()
+        self.exchange.start()
+
+    def tearDown(self):
+        self.exchange.stop()
+
+    def test_many_traders_poll_prices(self):
+        # The default transport, only pointed at the local exchange and with
+        # an address limit that lets the polls queue for a moment only
+        governor = RateGovernor(address_max=5, address_rate=200.0,
+                                address_reserve=1)
+        transport = Transport(base_url=self.exchange.url, governor=governor)
+        metrics = MetricsRegistry()
+        with mock.patch.object(transport_module, '_transport', transport):
+            traders = [Trader('unit_tests', PracticeAuthenticator(
+                                  100, 'XBT', 'USD'),
+                              MockAlgorithm(), output_console=False,
+                              metrics=metrics)
+                       for _ in range(20)]
+            for _ in range(5):
+                for trader in traders:
+                    trader.perform_one_cycle()
+        transport.close()
+        assert self.exchange.requests['Depth'] == 100
+        assert governor.address.n_waited > 0
+        assert metrics.counter('baibai_cycle_failures_total').value(
+            trader='unit_tests', stage='price_fetch') == 0
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `ReplayAuthenticator` and `VirtualClock`, and for replaying a price
+log through the real `Trader` faster than real time
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import ReplayAuthenticator, ReplayFinished, VirtualClock
+from baibaitrader import PriceSample, Trader
+from baibaitrader.Scheduler import Scheduler
+from baibaitrader.utils import log_path, read_price_history
+from .mocks import MockAlgorithm
+
+log_file = 'tests/test_log.log'
+
+
+def day_of_prices(start=datetime(2018, 1, 1)):
+    return [PriceSample(100.0 + i % 10, start + timedelta(minutes=5 * i),
+                        'XBT', 'USD')
+            for i in range(288)]
+
+
+class TestVirtualClock(TestCase):
+
+    def test_advance(self):
+        clock = VirtualClock(start=10.0)
+        clock.advance(5)
+        assert clock() == 15.0
+
+    def test_sleep_advances(self):
+        clock = VirtualClock()
+        start = time.monotonic()
+        clock.sleep(3600)
+        assert clock() == 3600
+        assert time.monotonic() - start < 1
+
+    def test_datetime(self):
+        clock = VirtualClock(start=3.0, epoch=datetime(2018, 1, 1))
+        clock.advance(60)
+        assert clock.datetime() == datetime(2018, 1, 1, 0, 1)
+
+    @raises(ValueError)
+    def test_cannot_go_back(self):
+        VirtualClock().advance(-1)
+
+    @raises(ValueError)
+    def test_datetime_needs_epoch(self):
+        VirtualClock().datetime()
+
+    def test_scheduler_does_not_sleep(self):
+        clock = VirtualClock()
+        calls = []
+
+        def callback():
+            calls.append(clock())
+            if len(calls) == 10:
+                scheduler.stop()
+        scheduler = Scheduler(60, callback, clock=clock, sleep=clock.sleep)
+        start = time.monotonic()
+        scheduler.start()
+        scheduler._thread.join(5)
+        assert time.monotonic() - start < 1
+        assert calls == [60.0 * i for i in range(10)]
+        assert scheduler.n_overruns == 0
+
+
+class TestReplayAuthenticator(TestCase):
+
+    def setUp(self):
+        self.auth = ReplayAuthenticator(log_file, 1000000, 'XBT', 'USD')
+
+    def test_starts_at_first_price(self):
+        price = self.auth.get_current_price()
+        assert price == self.auth.samples[0]
+        assert price.date == datetime(2017, 12, 11, 12, 50, 23)
+
+    def test_follows_clock(self):
+        self.auth.clock.advance(4 * 60)
+        assert self.auth.get_current_price() == self.auth.samples[1]
+
+    def test_finishes_after_last_price(self):
+        self.auth.clock.advance(24 * 3600)
+        assert self.auth.get_current_price() == self.auth.samples[-1]
+        assert self.auth.finished.is_set()
+
+    @raises(ReplayFinished)
+    def test_raises_once_finished(self):
+        self.auth.clock.advance(24 * 3600)
+        self.auth.get_current_price()
+        self.auth.get_current_price()
+
+    def test_needs_no_transport(self):
+        assert self.auth._api is None
+
+    def test_trades_at_replayed_price(self):
+        self.auth.get_current_price()
+        self.auth.buy(1.0)
+        assert self.auth.get_account_balance() == 1000000 - 16250.0
+
+    def test_accepts_samples(self):
+        auth = ReplayAuthenticator(list(reversed(day_of_prices())), 100,
+                                   'XBT', 'USD')
+        assert auth.samples == day_of_prices()
+
+    @raises(ValueError)
+    def test_needs_prices_of_pair(self):
+        ReplayAuthenticator(log_file, 100, 'ETH', 'USD')
+
+
+class TestTraderReplay(TestCase):
+
+    def test_replays_a_day_through_trader(self):
+        auth = ReplayAuthenticator(day_of_prices(), 1000000, 'XBT', 'USD')
+        algorithm = MockAlgorithm()
+        algorithm.buy_volume = 1.0
+        algorithm.should_buy = True
+        trader = Trader('unit_tests_replay', auth, algorithm,
+                        update_interval=300, output_console=False,
+                        clock=auth.clock)
+        start = time.monotonic()
+        trader.begin_trading()
+        assert auth.finished.wait(30)
+        trader.stop_trading()
+        assert time.monotonic() - start < 30
+        assert algorithm.n_data == 288
+        assert auth.get_holdings() == 288
+        assert auth.clock() >= 287 * 300
+
+    def test_trader_stops_after_replay(self):
+        auth = ReplayAuthenticator(day_of_prices(), 1000000, 'XBT', 'USD')
+        trader = Trader('unit_tests_replay', auth, MockAlgorithm(),
+                        update_interval=300, output_console=False,
+                        clock=auth.clock)
+        trader.begin_trading()
+        trader._scheduler._thread.join(30)
+        assert not trader.is_running
+        assert not trader._scheduler.is_running
+
+    def test_replay_has_its_own_log(self):
+        path = log_path('unit_tests_replay_price_log.log')
+        real = read_price_history(path) if os.path.exists(path) else []
+        auth = ReplayAuthenticator(day_of_prices()[:12], 1000000, 'XBT',
+                                   'USD')
+        trader = Trader('unit_tests_replay', auth, MockAlgorithm(),
+                        update_interval=300, output_console=False,
+                        clock=auth.clock)
+        open(trader.price_log_file, 'w').close()
+        trader.begin_trading()
+        trader._scheduler._thread.join(30)
+        for handler in trader.price_log.handlers:
+            handler.flush()
+        assert trader.price_log_file != path
+        replayed = read_price_history(trader.price_log_file)
+        os.remove(trader.price_log_file)
+        assert [sample.date for sample in reversed(replayed)] == \
+            [sample.date for sample in day_of_prices()[:12]]
+        if os.path.exists(path):
+            assert read_price_history(path) == real
+
+    def test_second_replay_dates_its_own_log(self):
+        starts = [datetime(2020, 1, 1), datetime(2023, 6, 1)]
+        path = log_path('unit_tests_sweep_replay_price_log.log')
+        open(path, 'w').close()
+        for start in starts:
+            auth = ReplayAuthenticator(day_of_prices(start)[:5], 1000000,
+                                       'XBT', 'USD')
+            trader = Trader('unit_tests_sweep', auth, MockAlgorithm(),
+                            update_interval=300, output_console=False,
+                            clock=auth.clock)
+            trader.begin_trading()
+            trader._scheduler._thread.join(30)
+        for handler in trader.price_log.handlers:
+            handler.flush()
+        replayed = read_price_history(path)
+        os.remove(path)
+        assert [sample.date for sample in reversed(replayed)] == \
+            [sample.date for start in starts
+             for sample in day_of_prices(start)[:5]]
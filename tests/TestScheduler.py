@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This file contains unit tests to ensure that `Scheduler` keeps to its grid,
+handles overruns as configured and shuts down cleanly
+"""
+import time
+import threading
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader.Scheduler import Scheduler
+from baibaitrader.VirtualClock import VirtualClock
+
+
+class TestScheduler(TestCase):
+
+    def run_for(self, scheduler, seconds):
+        scheduler.start()
+        time.sleep(seconds)
+        scheduler.stop()
+
+    def run_virtual(self, interval, durations, n_calls, **kwargs):
+        """
+        Run a scheduler on a `VirtualClock` whose callback takes the next of
+        `durations` seconds, until it has been called `n_calls` times. Returns
+        the scheduler and the clock times of the calls.
+        """
+        clock = VirtualClock()
+        durations = iter(durations)
+        calls = []
+
+        def cycle():
+            calls.append(clock())
+            clock.advance(next(durations))
+            if len(calls) == n_calls:
+                scheduler.stop()
+
+        scheduler = Scheduler(interval, cycle, clock=clock, sleep=clock.sleep,
+                              **kwargs)
+        scheduler.start()
+        scheduler._thread.join(5)
+        return scheduler, calls
+
+    def test_calls_repeatedly(self):
+        scheduler, calls = self.run_virtual(10, [0] * 10, 10)
+        assert calls == [10.0 * i for i in range(10)]
+        assert scheduler.n_cycles == 10
+
+    def test_does_not_drift(self):
+        scheduler, calls = self.run_virtual(20, [5] * 10, 10)
+        assert calls == [20.0 * i for i in range(10)]
+        assert scheduler.n_overruns == 0
+
+    def test_runs_on_one_thread(self):
+        threads = set()
+        scheduler = Scheduler(0.005, lambda: threads.add(
+            threading.current_thread().ident))
+        self.run_for(scheduler, 0.05)
+        assert len(threads) == 1
+
+    def test_stop_joins_thread(self):
+        scheduler = Scheduler(10, lambda: None)
+        scheduler.start()
+        scheduler.stop()
+        assert scheduler.is_running is False
+
+    def test_skip_overruns(self):
+        missed = []
+        scheduler = Scheduler(0.01, lambda: time.sleep(0.025),
+                              on_overrun=missed.append)
+        self.run_for(scheduler, 0.1)
+        assert scheduler.n_overruns >= 2
+        # Sleeping 25 ms misses two 10 ms deadlines, or more on a busy machine
+        assert all(m >= 2 for m in missed)
+
+    def test_catch_up_overruns(self):
+        scheduler, calls = self.run_virtual(10, [35] + [0] * 6, 7,
+                                            overrun=Scheduler.CATCH_UP)
+        assert scheduler.n_overruns == 1
+        assert scheduler.n_missed == 3
+        # The three missed cycles run immediately after the slow one
+        assert calls == [0.0, 35.0, 35.0, 35.0, 40.0, 50.0, 60.0]
+
+    def test_errors_reported(self):
+        errors = []
+
+        def fail():
+            raise RuntimeError('boom')
+
+        scheduler = Scheduler(0.01, fail, on_error=errors.append)
+        self.run_for(scheduler, 0.035)
+        assert len(errors) >= 2
+
+    @raises(ValueError)
+    def test_interval_positive(self):
+        Scheduler(0, lambda: None)
+
+    @raises(ValueError)
+    def test_overrun_policy(self):
+        Scheduler(1, lambda: None, overrun='sometimes')
+
+    @raises(RuntimeError)
+    def test_cannot_start_twice(self):
+        scheduler = Scheduler(10, lambda: None)
+        scheduler.start()
+        try:
+            scheduler.start()
+        finally:
+            scheduler.stop()
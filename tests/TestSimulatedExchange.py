@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `SimulatedExchange` and the practice accounts trading on it
+"""
+import time
+import threading
+from unittest import TestCase
+from nose.tools import raises
+
+from baibaitrader import SimulatedExchange, SimulatedAuthenticator
+from baibaitrader import OrderBook, Trader, MetricsRegistry
+from .mocks import MockAlgorithm
+
+
+class TestSimulatedExchange(TestCase):
+
+    def setUp(self):
+        self.exchange = SimulatedExchange('XBT', 'USD', capacity=2)
+
+    def test_accounts_grow_ledger(self):
+        ids = [self.exchange.open_account(100.0 + i) for i in range(5)]
+        assert ids == list(range(5))
+        balances, holdings = self.exchange.ledger()
+        assert list(balances) == [100.0, 101.0, 102.0, 103.0, 104.0]
+        assert list(holdings) == [0.0] * 5
+
+    def test_orders_fill_on_next_tick(self):
+        account = self.exchange.open_account(1000.0)
+        self.exchange.tick(100.0)
+        order = self.exchange.submit(account, 'buy', 2.0)
+        assert not order.done.is_set()
+        assert self.exchange.account_state(account) == (1000.0, 0.0)
+        assert self.exchange.tick(110.0) == 1
+        assert order.wait(0) == 110.0
+        assert self.exchange.account_state(account) == (780.0, 2.0)
+
+    def test_batch_of_many_accounts(self):
+        accounts = [self.exchange.open_account(100.0, 1.0)
+                    for _ in range(3000)]
+        orders = [self.exchange.submit(account, 'buy' if i % 2 else 'sell',
+                                       1.0)
+                  for i, account in enumerate(accounts)]
+        assert self.exchange.tick(50.0) == 3000
+        balances, holdings = self.exchange.ledger()
+        assert list(balances[:2]) == [150.0, 50.0]
+        assert list(holdings[:2]) == [0.0, 2.0]
+        assert all(order.done.is_set() for order in orders)
+
+    def test_overdrawn_account_rejected(self):
+        rich = self.exchange.open_account(1000.0)
+        poor = self.exchange.open_account(150.0)
+        self.exchange.submit(rich, 'buy', 1.0)
+        first = self.exchange.submit(poor, 'buy', 1.0)
+        second = self.exchange.submit(poor, 'buy', 1.0)
+        assert self.exchange.tick(100.0) == 1
+        assert self.exchange.account_state(poor) == (150.0, 0.0)
+        assert self.exchange.account_state(rich) == (900.0, 1.0)
+        assert isinstance(first.error, ValueError)
+        assert isinstance(second.error, ValueError)
+        assert self.exchange.n_rejected == 2
+
+    def test_order_book_impact_of_batch(self):
+        book = OrderBook([(100.0, 1.0), (110.0, 10.0)],
+                         [(100.0, 1.0), (90.0, 10.0)])
+        exchange = SimulatedExchange('XBT', 'USD', order_book=book)
+        a = exchange.open_account(1000.0)
+        b = exchange.open_account(1000.0)
+        first = exchange.submit(a, 'buy', 1.0)
+        exchange.submit(b, 'buy', 1.0)
+        exchange.tick(100.0)
+        # Both share the impact of buying 2
+        assert first.price == 100.0 * book.impact('buy', 2.0)
+
+    def test_thin_book_rejects(self):
+        exchange = SimulatedExchange('XBT', 'USD',
+                                     order_book=OrderBook([(100.0, 1.0)],
+                                                          [(99.0, 1.0)]))
+        account = exchange.open_account(1000.0)
+        order = exchange.submit(account, 'buy', 5.0)
+        exchange.tick(100.0)
+        assert str(order.error) == 'Not enough volume in the book'
+
+    def test_cancel(self):
+        account = self.exchange.open_account(1000.0)
+        order = self.exchange.submit(account, 'buy', 1.0)
+        assert order.cancel()
+        assert self.exchange.tick(100.0) == 0
+        assert isinstance(order.error, ValueError)
+        assert not order.cancel()
+
+    def test_matched_order_cannot_be_cancelled(self):
+        account = self.exchange.open_account(1000.0)
+        order = self.exchange.submit(account, 'buy', 1.0)
+        self.exchange.tick(100.0)
+        assert not order.cancel()
+        assert order.wait(0) == 100.0
+
+    @raises(ValueError)
+    def test_unknown_account(self):
+        self.exchange.submit(7, 'buy', 1.0)
+
+    @raises(ValueError)
+    def test_invalid_side(self):
+        account = self.exchange.open_account(10.0)
+        self.exchange.submit(account, 'hold', 1.0)
+
+
+class TestSimulatedAuthenticator(TestCase):
+
+    def setUp(self):
+        self.exchange = SimulatedExchange('XBT', 'USD')
+
+    @raises(RuntimeError)
+    def test_no_price_before_tick(self):
+        SimulatedAuthenticator(self.exchange, 100.0).get_current_price()
+
+    def test_price_from_exchange(self):
+        auth = SimulatedAuthenticator(self.exchange, 100.0)
+        self.exchange.tick(42.0)
+        assert auth.get_current_price().price == 42.0
+        assert auth.target_currency() == 'XBT'
+
+    def test_queued_orders(self):
+        auth = SimulatedAuthenticator(self.exchange, 100.0, wait=False)
+        auth.buy(0.5)
+        self.exchange.tick(100.0)
+        assert auth.get_account_state() == (50.0, 0.5)
+
+    def test_blocking_order_raises_on_reject(self):
+        auth = SimulatedAuthenticator(self.exchange, 100.0, timeout=5)
+        errors = []
+
+        def buy():
+            try:
+                auth.buy(2.0)
+            except ValueError as e:
+                errors.append(e)
+        thread = threading.Thread(target=buy)
+        thread.start()
+        while auth.last_order is None:
+            time.sleep(0.001)
+        self.exchange.tick(100.0)
+        thread.join(5)
+        assert len(errors) == 1
+
+    @raises(TimeoutError)
+    def test_blocking_order_times_out(self):
+        SimulatedAuthenticator(self.exchange, 100.0, timeout=0.01).buy(1.0)
+
+    def test_timed_out_order_is_cancelled(self):
+        auth = SimulatedAuthenticator(self.exchange, 100.0, timeout=0.01)
+        with self.assertRaises(TimeoutError):
+            auth.buy(1.0)
+        assert self.exchange.tick(10.0) == 0
+        assert auth.get_account_state() == (100.0, 0.0)
+        assert self.exchange.n_cancelled == 1
+
+    def test_many_traders_share_market(self):
+        self.exchange.tick(10.0)
+        algorithm = MockAlgorithm()
+        algorithm.buy_volume = 1.0
+        algorithm.should_buy = True
+        traders = [Trader('unit_tests_sim', SimulatedAuthenticator(
+                              self.exchange, 100.0, wait=False),
+                          algorithm, output_console=False,
+                          metrics=MetricsRegistry())
+                   for _ in range(200)]
+        for trader in traders:
+            trader.perform_one_cycle()
+        self.exchange.tick(10.0)
+        balances, holdings = self.exchange.ledger()
+        assert (holdings == 1.0).all()
+        assert (balances == 90.0).all()
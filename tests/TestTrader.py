@@ -4,8 +4,16 @@
 This file contains unit tests to ensure that `Trader` makes the proper calls to
 its members and that its state is correct following each trade cycle.
 """
+import os
+import time
+import shutil
+import datetime
+import tempfile
+import threading
 from unittest import TestCase
+from baibaitrader import PriceSample, PriceLogCache, VirtualClock
 from baibaitrader.Trader import Trader
+from baibaitrader.utils import log_path, read_price_history
 from .mocks import MockAlgorithm, MockAuthenticator
 
 
@@ -138,3 +146,154 @@ class TestTrader(TestCase):
         self.trader.algorithm.should_sell = True
         self.trader.perform_one_cycle()
         assert self.trader.authenticator.n_buys == 0
+
+    def test_begin_trading_runs_first_cycle(self):
+        self.trader.begin_trading()
+        self.trader.stop_trading()
+        assert self.trader.authenticator.n_checks == 1
+
+    def test_cycles_repeat_on_one_scheduler(self):
+        clock = VirtualClock()
+        trader = Trader('unit_tests', MockAuthenticator(), MockAlgorithm(),
+                        update_interval=0.01, output_console=False,
+                        clock=clock)
+        fetch = trader.authenticator.get_current_price
+
+        def fetch_six_times():
+            price = fetch()
+            if trader.authenticator.n_checks == 6:
+                trader.stop_trading()
+            return price
+        trader.authenticator.get_current_price = fetch_six_times
+        trader.begin_trading()
+        trader._scheduler._thread.join(5)
+        assert trader.authenticator.n_checks == 6
+        assert trader._scheduler.n_cycles == 6
+        assert abs(clock() - 0.05) < 1e-9
+
+    def test_process_price_without_fetching(self):
+        price = self.trader.authenticator.get_current_price()
+        self.trader.process_price(price)
+        assert self.trader.authenticator.n_checks == 1
+        assert self.trader.algorithm.n_data == 1
+
+    def test_failed_price_skips_cycle(self):
+        self.trader.authenticator.should_fail = True
+        self.trader.perform_one_cycle()
+        assert self.trader.algorithm.n_data == 0
+
+    def test_account_state_fetched_concurrently(self):
+        threads = set()
+        auth = self.trader.authenticator
+        auth.get_holdings = lambda: threads.add(
+            threading.current_thread().ident) or 2.7
+        auth.get_account_balance = lambda: threads.add(
+            threading.current_thread().ident) or 20000.0
+        self.trader.algorithm.should_buy = True
+        self.trader.perform_one_cycle()
+        assert len(threads) == 2
+
+    def test_account_snapshot_reused_within_ttl(self):
+        def reject(n_shares):
+            raise ValueError('Not enough funds')
+
+        self.trader.authenticator.buy = reject
+        self.trader.algorithm.should_buy = True
+        self.trader.perform_one_cycle()
+        self.trader.perform_one_cycle()
+        assert self.trader.authenticator.n_balance == 1
+
+    def test_account_snapshot_discarded_after_order(self):
+        self.trader.algorithm.should_buy = True
+        self.trader.perform_one_cycle()
+        self.trader.perform_one_cycle()
+        assert self.trader.authenticator.n_balance == 2
+
+    def test_account_snapshot_expires(self):
+        def reject(n_shares):
+            raise ValueError('Not enough funds')
+
+        self.trader.account_ttl = 0
+        self.trader.authenticator.buy = reject
+        self.trader.algorithm.should_buy = True
+        self.trader.perform_one_cycle()
+        self.trader.perform_one_cycle()
+        assert self.trader.authenticator.n_balance == 2
+
+
+class TestTraderWarmUp(TestCase):
+
+    def setUp(self):
+        self.trader = Trader('unit_tests_warm_up', MockAuthenticator(),
+                             MockAlgorithm(), update_interval=42,
+                             output_console=False)
+        self.path = log_path('unit_tests_warm_up_price_log.log')
+        now = datetime.datetime.now()
+        with open(self.path, 'w') as f:
+            for i in range(10, 0, -1):
+                date = now - datetime.timedelta(hours=i)
+                f.write('%s : BTC USD = %s\n' %
+                        (date.strftime('%Y-%m-%d %H:%M:%S'), 100.0 + i))
+            f.write('%s : ETH USD = 5.0\n' % now.strftime('%Y-%m-%d %H:%M:%S'))
+
+    def tearDown(self):
+        self.trader.stop_trading()
+        os.remove(self.path)
+
+    def test_loads_own_price_log(self):
+        assert self.trader.warm_up() == 10
+        assert self.trader.algorithm.n_data == 10
+
+    def test_loads_recent_days(self):
+        assert self.trader.warm_up(days=5 / 24) == 4
+
+    def test_loads_given_samples(self):
+        now = datetime.datetime.now()
+        samples = [PriceSample(1.0, now, 'BTC', 'USD'),
+                   PriceSample(1.0, now, 'BTC', 'EUR')]
+        assert self.trader.warm_up(samples) == 1
+
+    def test_loads_from_cache(self):
+        folder = tempfile.mkdtemp()
+        try:
+            cache = PriceLogCache(folder)
+            assert self.trader.warm_up(days=5 / 24, cache=cache) == 4
+            assert self.trader.warm_up(cache=cache) == 10
+        finally:
+            shutil.rmtree(folder)
+
+    def test_single_batch(self):
+        batches = []
+        self.trader.algorithm.load_history = batches.append
+        self.trader.warm_up()
+        assert len(batches) == 1
+
+    def test_begin_trading_warms_up(self):
+        self.trader.begin_trading(warm_up=True)
+        assert self.trader.algorithm.n_data >= 10
+
+    def test_missing_log(self):
+        os.remove(self.path)
+        assert self.trader.warm_up() == 0
+        open(self.path, 'w').close()
+
+
+class TestTraderSubSecond(TestCase):
+
+    def test_sub_second_interval(self):
+        trader = Trader('unit_tests_sub_second', MockAuthenticator(),
+                        MockAlgorithm(), update_interval=0.05,
+                        output_console=False, timestamp_precision='ms')
+        path = log_path('unit_tests_sub_second_price_log.log')
+        open(path, 'w').close()
+        trader.begin_trading()
+        time.sleep(0.5)
+        trader.stop_trading()
+        for handler in trader.price_log.handlers:
+            handler.flush()
+        try:
+            samples = read_price_history(path)
+        finally:
+            os.remove(path)
+        assert len(samples) >= 8
+        assert len(set(sample.date for sample in samples)) == len(samples)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for `Transport` against a local stand-in for Kraken's REST API
+"""
+import json
+import threading
+from unittest import TestCase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from nose.tools import raises
+import requests
+
+from baibaitrader import KrakenAuthenticator, PracticeAuthenticator, Transport
+
+
+class StandInServer:
+    """
+    Answers every request with the next status code from `statuses`, then
+    with 200 and a Depth result that reports `errors`
+    """
+
+    def __init__(self):
+        self.statuses = []
+        self.errors = []
+        self.requests = []
+        self.ports = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def respond(handler):
+                length = int(handler.headers.get('Content-Length', 0))
+                body = handler.rfile.read(length).decode('utf-8')
+                server.requests.append((handler.path, body))
+                server.ports.add(handler.client_address[1])
+                status = server.statuses.pop(0) if server.statuses else 200
+                payload = json.dumps({'error': server.errors, 'result': {
+                    'XXBTZUSD': {'asks': [['500.0', '1.0', 1]]},
+                    'ZUSD': '10.0'}}).encode('utf-8')
+                handler.send_response(status)
+                handler.send_header('Content-Type', 'application/json')
+                handler.send_header('Content-Length', str(len(payload)))
+                handler.end_headers()
+                handler.wfile.write(payload)
+
+            do_GET = respond
+            do_POST = respond
+
+            def log_message(handler, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = 'http://127.0.0.1:%d' % self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05},
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TestTransport(TestCase):
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.delays = []
+        self.transport = Transport(base_url=self.server.url, retries=2,
+                                   sleep=self.delays.append)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_query_through_base_url(self):
+        auth = PracticeAuthenticator(100, 'XBT', 'USD',
+                                     transport=self.transport)
+        assert auth.get_current_price().price == 500.0
+        assert self.server.requests[0][0].startswith('/0/public/Depth')
+
+    def test_connections_are_reused(self):
+        auths = [PracticeAuthenticator(100, 'XBT', 'USD',
+                                       transport=self.transport)
+                 for _ in range(3)]
+        for auth in auths:
+            auth.get_current_price()
+        assert len(self.server.requests) == 3
+        assert len(self.server.ports) == 1
+
+    def test_retries_server_errors(self):
+        self.server.statuses = [503, 502]
+        auth = PracticeAuthenticator(100, 'XBT', 'USD',
+                                     transport=self.transport)
+        auth.get_current_price()
+        assert len(self.server.requests) == 3
+        assert len(self.delays) == 2
+        assert self.transport.n_retries == 2
+
+    @raises(requests.HTTPError)
+    def test_gives_up_after_retries(self):
+        self.server.statuses = [503, 503, 503]
+        auth = PracticeAuthenticator(100, 'XBT', 'USD',
+                                     transport=self.transport)
+        auth.get_current_price()
+
+    @raises(requests.HTTPError)
+    def test_client_errors_are_not_retried(self):
+        self.server.statuses = [404]
+        try:
+            self.transport.api().query_public('Depth')
+        finally:
+            assert len(self.server.requests) == 1
+
+    def test_orders_are_not_retried(self):
+        self.server.statuses = [503]
+        api = self.transport.api()
+        api.key, api.secret = 'key', 'c2VjcmV0'
+        try:
+            api.query_private('AddOrder')
+        except requests.HTTPError:
+            pass
+        assert len(self.server.requests) == 1
+
+    def test_private_retry_uses_new_nonce(self):
+        self.server.statuses = [503]
+        auth = KrakenAuthenticator('tests/fake_key.key', 'XBT', 'USD',
+                                   transport=self.transport)
+        auth._api.secret = 'c2VjcmV0'
+        auth.get_account_balance()
+        nonces = [body for path, body in self.server.requests]
+        assert len(nonces) == 2
+        assert nonces[0] != nonces[1]
+
+    def test_backoff_is_bounded(self):
+        transport = Transport(backoff=1.0, max_backoff=4.0)
+        delays = [transport.backoff_delay(attempt) for attempt in range(10)
+                  for _ in range(20)]
+        assert all(0 <= delay <= 4.0 for delay in delays)
+        transport.close()
+
+    def test_per_endpoint_timeouts(self):
+        transport = Transport(timeout=10.0, timeouts={'Depth': 2.0})
+        assert transport.timeout_for('Depth') == 2.0
+        assert transport.timeout_for('Balance') == 10.0
+        transport.close()
@@ -1,11 +1,17 @@
 
 
+import os
+import time
+import logging
+import numpy as np
 from unittest import TestCase
-from datetime import datetime
+from datetime import datetime, timedelta
 from nose.tools import raises
 
 from baibaitrader.utils import read_days_of_price_history, read_price_history
-from baibaitrader.utils import parse_price_sample
+from baibaitrader.utils import parse_price_sample, downsample_minmax
+from baibaitrader.utils import resample_price_history, resample_price_bars
+from baibaitrader.utils import build_logger, log_path
 
 test_log = 'tests/test_log.log'
 line = '2017-12-11 13:00:46 : XBT USD = 16200.00000'
@@ -74,3 +80,145 @@ class TestLogUtils(TestCase):
     @raises(TypeError)
     def test_date_type(self):
         read_price_history(test_log, 5)
+
+    def test_parse_milliseconds(self):
+        price = parse_price_sample(
+            '2017-12-11 13:00:46.123 : XBT USD = 16200.00000')
+        assert price.date == datetime(2017, 12, 11, 13, 0, 46, 123000)
+
+    def test_parse_microseconds(self):
+        price = parse_price_sample(
+            '2017-12-11 13:00:46.123456 : XBT USD = 16200.00000')
+        assert price.date == datetime(2017, 12, 11, 13, 0, 46, 123456)
+
+    def test_parse_other_date_format(self):
+        price = parse_price_sample('2017/12/11 13:00:46 : XBT USD = 16200.0')
+        assert price.date == datetime(2017, 12, 11, 13, 0, 46)
+
+
+class TestBuildLogger(TestCase):
+
+    def write_prices(self, name, precision, n=20):
+        log = build_logger(name, name + '.log', output_console=False,
+                           precision=precision)
+        for i in range(n):
+            log.info('XBT USD = %s', 100.0 + i)
+            time.sleep(0.002)
+        for handler in log.handlers:
+            handler.flush()
+        return log_path(name + '.log')
+
+    def tearDown(self):
+        for precision in ('ms', 'us', 'rebuilt'):
+            name = 'unit_tests_precision_' + precision
+            log = logging.getLogger(name)
+            for handler in list(log.handlers):
+                handler.close()
+                log.removeHandler(handler)
+            if os.path.exists(log_path(name + '.log')):
+                os.remove(log_path(name + '.log'))
+
+    def test_millisecond_timestamps(self):
+        path = self.write_prices('unit_tests_precision_ms', 'ms')
+        with open(path) as f:
+            stamp = f.readline().split(' : ')[0]
+        assert len(stamp) == len('2017-12-11 13:00:46.123')
+
+    def test_sub_second_samples_keep_their_order(self):
+        path = self.write_prices('unit_tests_precision_us', 'us')
+        samples = read_price_history(path)
+        assert len(samples) == 20
+        assert len(set(sample.date for sample in samples)) == 20
+        assert [s.price for s in samples] == [119.0 - i for i in range(20)]
+
+    def test_rebuilt_logger_takes_new_precision(self):
+        self.write_prices('unit_tests_precision_rebuilt', 's', n=1)
+        path = self.write_prices('unit_tests_precision_rebuilt', 'ms', n=1)
+        with open(path) as f:
+            stamps = [line.split(' : ')[0] for line in f]
+        assert len(stamps) == 2
+        assert len(stamps[0]) == len('2017-12-11 13:00:46')
+        assert len(stamps[1]) == len('2017-12-11 13:00:46.123')
+        log = logging.getLogger('unit_tests_precision_rebuilt')
+        assert len(log.handlers) == 1
+
+    @raises(ValueError)
+    def test_invalid_precision(self):
+        build_logger('unit_tests_precision', 'unit_tests.log', precision='ns')
+
+
+class TestResample(TestCase):
+
+    def setUp(self):
+        self.samples = read_price_history(test_log)
+
+    def test_last_price_per_interval(self):
+        samples = resample_price_history(self.samples, 300)
+        assert [s.price for s in samples] == [16200.0, 16200.0, 16315.9]
+
+    def test_resampled_newest_first(self):
+        samples = resample_price_history(self.samples, 300)
+        assert samples[0].date > samples[1].date > samples[2].date
+
+    def test_short_interval_keeps_everything(self):
+        samples = resample_price_history(self.samples, 1)
+        assert samples == self.samples
+
+    def test_bars(self):
+        bars = resample_price_bars(self.samples, 300)
+        assert len(bars) == 3
+        assert bars[-1].open == 16250.0
+        assert bars[-1].high == 16315.9
+        assert bars[-1].low == 16112.5
+        assert bars[-1].close == 16315.9
+        assert bars[-1].date == datetime(2017, 12, 11, 12, 54, 31)
+
+    def test_bars_empty(self):
+        assert resample_price_bars([], 300) == []
+
+    @raises(ValueError)
+    def test_interval_positive(self):
+        resample_price_history(self.samples, 0)
+
+
+class TestDownsample(TestCase):
+
+    def series(self, n):
+        dates = [datetime(2017, 12, 11) + timedelta(seconds=i)
+                 for i in range(n)]
+        values = np.sin(np.arange(n) / 50.0) * 100
+        return dates, values
+
+    def test_short_series_unchanged(self):
+        dates, values = self.series(10)
+        _, y = downsample_minmax(dates, values, 20)
+        assert len(y) == 10
+
+    def test_respects_max_points(self):
+        dates, values = self.series(100000)
+        x, y = downsample_minmax(dates, values, 1000)
+        assert len(x) == len(y) <= 1000
+
+    def test_keeps_extremes(self):
+        dates, values = self.series(100000)
+        values[12345] = 1000
+        values[54321] = -1000
+        _, y = downsample_minmax(dates, values, 100)
+        assert y.max() == 1000
+        assert y.min() == -1000
+
+    def test_keeps_endpoints(self):
+        dates, values = self.series(100000)
+        x, _ = downsample_minmax(dates, values, 100)
+        assert x[0] == np.datetime64(dates[0])
+        assert x[-1] == np.datetime64(dates[-1])
+
+    def test_keeps_order(self):
+        dates, values = self.series(100000)
+        x, _ = downsample_minmax(dates, values, 100)
+        assert np.all(np.diff(x.astype(np.int64)) > 0)
+
+    @raises(ValueError)
+    def test_max_points_too_small(self):
+        dates, values = self.series(100)
+        downsample_minmax(dates, values, 3)
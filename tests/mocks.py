@@ -88,17 +88,23 @@ class MockKrakenAPI:
 
     should_fail = False
 
-    def query_private(self, endpoint, timeout):
+    def query_private(self, endpoint, timeout=None):
         self.n_query_private += 1
         if self.should_fail:
             return {'error': ['Bad News!']}
+        elif endpoint == 'Balance':
+            return {'error': [], 'result': {'ZUSD': '99.9', 'XXBT': '1.5'}}
         else:
             return {'error': ['Bad News!']}
 
-    def query_public(self, endpoint, json, timeout):
+    def query_public(self, endpoint, json, timeout=None):
         self.n_query_pub += 1
         if self.should_fail:
             return {'error': ['Bad News!']}
+        elif endpoint == 'Ticker':
+            return {'error': [],
+                    'result': {pair: {'a': ['500.00000', '1', '1.000']}
+                               for pair in json['pair'].split(',')}}
         else:
             return {'error': [],
                     'result': {
@@ -4,7 +4,7 @@
 Run an algorithm on past data to validate its operation
 """
 import matplotlib.pyplot as plt
-from baibaitrader import AlgorithmValidator, ErikAlgorithm
+from baibaitrader import AlgorithmValidator, ErikAlgorithm, PriceLogCache
 
 # Define the algorithm to test
 buy_volume = 500.0
@@ -17,11 +17,12 @@ algorithm = ErikAlgorithm(buy_volume, sell_volume, sigma=1, min_samples=100,
 price_log = 'log_files/ErikPracticeTrader_price_log.log'
 holdings = 50.0
 balance = 5000.0
-validator = AlgorithmValidator(price_log, algorithm, holdings, balance)
+validator = AlgorithmValidator(price_log, algorithm, holdings, balance,
+                               cache=PriceLogCache())
 
 # Run validation and plot the results
 validator.simulate_trading()
-plot_pairs = validator.data_pairs_for_plotting()
+plot_pairs = validator.data_pairs_for_plotting(max_points=5000)
 
 px = plot_pairs['prices']['dates']
 py = plot_pairs['prices']['values']